@@ -0,0 +1,110 @@
+import sys, os
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+import fitz  # PyMuPDF
+
+from saras_engine.src.tools import pdf_extractor
+from saras_engine.src.tools.chunker import iter_fixed_chunks
+
+SIZES = [10, 100, 1000]
+CHUNK_SIZE = 3000
+EMBED_BATCH = 100
+EMBED_LATENCY = 0.05  # simulated seconds per embedding call
+
+LINE = "Retrieval augmented generation grounds answers in source documents. "
+
+
+def make_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 40, 560, 800), f"Page {i + 1}. " + LINE * 40, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def legacy_extract(file_bytes: bytes) -> str:
+    """The old extractor: every page kept, full text built by concatenation."""
+    doc = fitz.open(stream=file_bytes, filetype="pdf")
+    full_text, pages = "", []
+    for i, page in enumerate(doc):
+        text = page.get_text()
+        pages.append({"page": i + 1, "text": text})
+        full_text += text + "\n"
+    return full_text
+
+
+def fake_embed(batch):
+    time.sleep(EMBED_LATENCY)
+    return [[0.0] for _ in batch]
+
+
+def sequential_ingest(file_bytes: bytes) -> float:
+    """Extract everything, then chunk, then embed (old _ingest_document order)."""
+    start = time.perf_counter()
+    text = legacy_extract(file_bytes)
+    chunks = [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+    for i in range(0, len(chunks), EMBED_BATCH):
+        fake_embed(chunks[i:i + EMBED_BATCH])
+    return time.perf_counter() - start
+
+
+def pipelined_ingest(file_bytes: bytes, workers: int) -> float:
+    """Embedding batches start while later pages are still being decoded."""
+    from concurrent.futures import ThreadPoolExecutor
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures, batch = [], []
+        for chunk in iter_fixed_chunks(pdf_extractor.iter_pages(file_bytes, workers=workers), CHUNK_SIZE):
+            batch.append(chunk["text"])
+            if len(batch) == EMBED_BATCH:
+                futures.append(pool.submit(fake_embed, batch))
+                batch = []
+        if batch:
+            futures.append(pool.submit(fake_embed, batch))
+        for fut in futures:
+            fut.result()
+    return time.perf_counter() - start
+
+
+def first_page_ms(file_bytes: bytes, workers: int) -> float:
+    start = time.perf_counter()
+    pages = pdf_extractor.iter_pages(file_bytes, workers=workers)
+    next(pages)
+    elapsed = (time.perf_counter() - start) * 1000
+    pages.close()
+    return elapsed
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    workers = pdf_extractor.PDF_WORKERS
+    print(f"process pool workers: {workers} (cpus: {os.cpu_count()}), "
+          f"parallel from {pdf_extractor.PDF_PARALLEL_MIN_PAGES} pages\n")
+
+    print(f"{'pages':>6} {'legacy ms':>10} {'iter ms':>9} {'pool ms':>9} "
+          f"{'1st page ms':>12} {'seq ingest s':>13} {'pipelined s':>12}")
+    for n in SIZES:
+        data = make_pdf(n)
+
+        legacy = legacy_extract(data)
+        streamed = "".join(p["text"] + "\n" for p in pdf_extractor.iter_pages(data, workers=1))
+        pooled = "".join(p["text"] + "\n" for p in pdf_extractor.iter_pages(data, workers=workers))
+        assert streamed == legacy and pooled == legacy
+
+        legacy_ms = timed(lambda: legacy_extract(data))
+        iter_ms = timed(lambda: sum(1 for _ in pdf_extractor.iter_pages(data, workers=1)))
+        pool_ms = timed(lambda: sum(1 for _ in pdf_extractor.iter_pages(data, workers=workers)))
+
+        print(f"{n:>6} {legacy_ms:>10.1f} {iter_ms:>9.1f} {pool_ms:>9.1f} "
+              f"{first_page_ms(data, workers):>12.1f} {sequential_ingest(data):>13.2f} "
+              f"{pipelined_ingest(data, workers):>12.2f}")
@@ -0,0 +1,100 @@
+import sys, os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from saras_engine.src.tools import vector_index, vector_store
+
+DIM = 768
+SIZES = [10_000, 50_000, 100_000]
+SMALL_SIZES = [50, 500, 5_000]  # typical single documents (rag_pipeline)
+QUERIES = 50
+K = 10
+NPROBES = [4, 8, 16, 32]
+TOPICS = 500  # embeddings of real documents cluster by topic
+RECALL_TARGET = 0.9  # default nprobe must reach this recall@K vs exact search
+
+
+def clustered(rng, n: int) -> np.ndarray:
+    centers = rng.standard_normal((TOPICS, DIM), dtype=np.float32)
+    rows = centers[rng.integers(0, TOPICS, n)] + rng.standard_normal((n, DIM), dtype=np.float32) * 1.5
+    return rows
+
+
+def exact_ids(key: str, queries: np.ndarray) -> list:
+    results = vector_store.query_store_batch(key, queries, k=K, excerpt_chars=0)
+    return [{int(r["chunk_id"].split("-")[1]) for r in row} for row in results]
+
+
+def recall_at_k(truth: list, ids: np.ndarray) -> float:
+    return float(np.mean([len(truth[i] & set(ids[i].tolist())) / K for i in range(len(truth))]))
+
+
+def check(label: str, recall: float) -> bool:
+    ok = recall >= RECALL_TARGET
+    print(f"{label}: recall {recall:.3f} ({'ok' if ok else f'BELOW {RECALL_TARGET}'})")
+    return ok
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    vector_store.STORE_DIR = Path(tempfile.mkdtemp(prefix="saras_bench_"))
+    backend = "faiss" if vector_index._use_faiss() else "numpy"
+    print(f"IVF backend: {backend}, dim {DIM}, recall@{K} over {QUERIES} queries\n")
+    passed = True
+
+    # build_index/search_index as rag_pipeline uses them, vs brute force
+    for n in SMALL_SIZES:
+        emb = clustered(rng, n)
+        queries = emb[rng.integers(0, n, QUERIES)] + rng.standard_normal((QUERIES, DIM), dtype=np.float32)
+        scores = vector_store._normalize_rows(queries) @ vector_store._normalize_rows(emb).T
+        truth = [set(np.argsort(-row)[:K].tolist()) for row in scores]
+        index = vector_store.build_index(emb.tolist())
+        _, ids = vector_store.search_index(index, queries.tolist(), top_k=K)
+        passed &= check(f"{n:>8} build_index ({index.kind})", recall_at_k(truth, ids))
+    print()
+
+    print(f"{'rows':>8} {'build s':>8} {'nlist':>6} {'nprobe':>7} {'recall':>7} "
+          f"{'exact ms':>9} {'ivf ms':>7} {'speedup':>8}")
+    for n in SIZES:
+        emb = clustered(rng, n)
+        queries = emb[rng.integers(0, n, QUERIES)] + rng.standard_normal((QUERIES, DIM), dtype=np.float32)
+        key = f"bench_{n}"
+        vector_store.build_store(key, [f"chunk {i}" for i in range(n)], emb)
+
+        truth = exact_ids(key, queries)
+        exact_ms = timed(lambda: [vector_store.query_store(key, q, k=K, excerpt_chars=0) for q in queries], 1) / QUERIES
+
+        start = time.perf_counter()
+        vector_store.index_store(key, min_rows=0)
+        build_s = time.perf_counter() - start
+        index = vector_store._load_store(key)["index"]
+
+        normalized = vector_store._normalize_rows(queries)
+        for nprobe in NPROBES:
+            _, ids = index.search(normalized, K, nprobe)
+            recall = recall_at_k(truth, ids)
+            ivf_ms = timed(lambda: [index.search(normalized[i:i + 1], K, nprobe) for i in range(QUERIES)], 1) / QUERIES
+            print(f"{n:>8} {build_s:>8.2f} {index.nlist:>6} {nprobe:>7} {recall:>7.3f} "
+                  f"{exact_ms:>9.2f} {ivf_ms:>7.2f} {exact_ms / ivf_ms:>7.1f}x")
+
+        # query_store goes through the index once the store has one
+        via_store = exact_ids(key, queries)
+        recall = np.mean([len(truth[i] & via_store[i]) / K for i in range(QUERIES)])
+        nprobe = vector_index.default_nprobe(index.nlist)
+        passed &= check(f"{'':>8} query_store with index (default nprobe {nprobe})", recall)
+        print()
+
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,53 @@
+import sys, os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from saras_engine.src.tools import vector_store
+
+DIM = 768
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = 5
+
+
+def legacy_search(embeddings: np.ndarray, query: np.ndarray, k: int):
+    """The old query_store loop: per-row cosine, then a full Python sort."""
+    sims = []
+    q_norm = np.linalg.norm(query)
+    for i, row in enumerate(embeddings):
+        sims.append((i, float(row @ query / (np.linalg.norm(row) * q_norm))))
+    sims.sort(key=lambda x: x[1], reverse=True)
+    return [i for i, _ in sims[:k]]
+
+
+def timed(fn, repeat: int = QUERIES) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    vector_store.STORE_DIR = Path(tempfile.mkdtemp(prefix="saras_bench_"))
+
+    print(f"{'chunks':>8} {'legacy ms':>10} {'query_store ms':>15} {'speedup':>8}")
+    for n in SIZES:
+        emb = rng.standard_normal((n, DIM), dtype=np.float32)
+        query = rng.standard_normal(DIM, dtype=np.float32)
+        key = f"bench_{n}"
+        vector_store.build_store(key, [f"chunk {i}" for i in range(n)], emb)
+
+        legacy_ms = timed(lambda: legacy_search(emb, query, 3), repeat=1)
+        new_ms = timed(lambda: vector_store.query_store(key, query, k=3))
+
+        expected = legacy_search(emb, query, 3)
+        got = [int(r["chunk_id"].split("-")[1]) for r in vector_store.query_store(key, query, k=3)]
+        assert got == expected, (got, expected)
+
+        print(f"{n:>8} {legacy_ms:>10.1f} {new_ms:>15.2f} {legacy_ms / new_ms:>7.0f}x")
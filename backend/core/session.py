@@ -0,0 +1,17 @@
+import re
+from typing import Any, Optional
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def clean_session_id(value: Any) -> Optional[str]:
+    """
+    Client-supplied session id (JSON/form field "session_id"), or None.
+
+    Important:
+    - Ids are opaque tokens issued by the engine (returned as "session_id");
+      anything else is ignored and a fresh session is started.
+    """
+    if isinstance(value, str) and _SESSION_ID.match(value):
+        return value
+    return None
@@ -0,0 +1,26 @@
+import json
+from typing import Any, Dict, Iterable
+
+from django.http import StreamingHttpResponse
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events: Iterable[Dict[str, Any]]) -> StreamingHttpResponse:
+    """
+    Stream engine events ({"event": ..., "data": {...}}) as text/event-stream.
+
+    Important:
+    - no-cache / X-Accel-Buffering keep proxies (nginx) from buffering frames,
+      otherwise the client would still wait for the whole answer.
+    """
+    response = StreamingHttpResponse(
+        (format_sse(e["event"], e["data"]) for e in events),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
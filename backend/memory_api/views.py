@@ -1,18 +1,32 @@
 from django.http import JsonResponse
 from rest_framework.decorators import api_view
 
+from core.session import clean_session_id
+from saras_engine_integration.engine_runner import get_session_memory as engine_get_session_memory
+
+
+"""
+    Session memory endpoint:
+    - GET /api/memory/session/?session_id=<id>
+    - session_id is the one returned by the RAG / Non-RAG endpoints
+    - Returns the session's recent messages, oldest first
+"""
+
 @api_view(["GET"])
 def get_session_memory(request):
 
-    fake_session_memory = [
-        {"key": "last_query", "value": "Explain quantum computing"},
-        {"key": "last_mode", "value": "Non-RAG"}
-    ]
+    session_id = clean_session_id(request.GET.get("session_id"))
+    if session_id is None:
+        return JsonResponse(
+            {"status": "error", "message": "Missing or invalid 'session_id'."},
+            status=400
+        )
 
     return JsonResponse({
         "status": "success",
         "memory_type": "session",
-        "data": fake_session_memory
+        "session_id": session_id,
+        "data": engine_get_session_memory(session_id)
     })
 
 
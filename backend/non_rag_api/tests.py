@@ -1,3 +1,242 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from saras_engine.src.memory.response_cache import ResponseCache
+from saras_engine.src.tools import google_search
+from saras_engine.src.tools.json_stream import IncrementalJSONParser, repair_json
+from saras_engine_integration import engine_runner
+
+
+class _FakeCustomSearch(BaseHTTPRequestHandler):
+    """
+    Stand-in for the Custom Search JSON API. Every query returns one URL of
+    its own plus the same shared page (spelled differently each time).
+    """
+
+    delay = 0.2
+    lock = threading.Lock()
+    queries = []
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        cls = type(self)
+        query = parse_qs(urlsplit(self.path).query)["q"][0]
+        with cls.lock:
+            cls.queries.append(query)
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(cls.delay)
+        with cls.lock:
+            cls.in_flight -= 1
+
+        slug = query.replace(" ", "-")
+        shared = {"shared a": "https://example.com/shared",
+                  "shared b": "https://EXAMPLE.com/shared/",
+                  "shared c": "https://example.com/shared#intro"}.get(query, "https://example.com/shared")
+        payload = json.dumps({"items": [
+            {"title": query, "snippet": f"about {query}", "link": f"https://example.com/{slug}"},
+            {"title": "shared", "snippet": "shared page", "link": shared},
+        ]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class SearchManyTests(SimpleTestCase):
+    handler = _FakeCustomSearch
+
+    def setUp(self):
+        self.handler.queries = []
+        self.handler.in_flight = self.handler.max_in_flight = 0
+        google_search.clear_cache()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.provider = google_search.GoogleSearchProvider(
+            api_key="test-key", cx="test-cx",
+            base_url=f"http://127.0.0.1:{self.server.server_address[1]}/customsearch/v1",
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        google_search.clear_cache()
+
+    def test_sub_queries_run_concurrently(self):
+        queries = ["shared a", "shared b", "shared c"]
+
+        start = time.perf_counter()
+        result = google_search.search_many(queries, provider=self.provider)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(sorted(self.handler.queries), queries)
+        self.assertEqual(self.handler.max_in_flight, len(queries))
+        self.assertLess(elapsed, self.handler.delay * len(queries))
+
+    def test_repeat_query_is_served_from_cache(self):
+        first = google_search.search_many(["cached query"], provider=self.provider)
+        second = google_search.search_many(["  Cached   QUERY "], provider=self.provider)
+
+        self.assertEqual(self.handler.queries, ["cached query"])
+        self.assertEqual(second["results"], first["results"])
+
+    def test_duplicate_urls_are_merged(self):
+        result = google_search.search_many(["shared a", "shared b", "shared c"], provider=self.provider)
+
+        urls = [r["url"] for r in result["results"]]
+        self.assertEqual(len(urls), 4)  # three own pages + the shared one once
+        self.assertEqual(sum(1 for r in result["results"] if r["title"] == "shared"), 1)
+        # interleaved by rank: every query's first result comes before the shared page
+        self.assertEqual([r["title"] for r in result["results"][:3]], ["shared a", "shared b", "shared c"])
+
+
+class _FakeSession:
+    def __init__(self, history):
+        self.history = history
+
+    def get_history(self):
+        return self.history
+
+
+class _FakeRuntime:
+    """Sessions by id; "returning-*" sessions have earlier turns."""
+
+    def session(self, session_id):
+        return _FakeSession([{"role": "user", "content": "earlier"}] if session_id.startswith("returning") else [])
+
+
+class _FakeManager:
+    def __init__(self, context_used):
+        self.context_used = context_used
+        self.calls = 0
+
+    def handle_request(self, task, rag_context=None):
+        self.calls += 1
+        return {
+            "writer_agent_output": {"text": f"answer {self.calls}"},
+            "research_agent_output": {"results": []},
+            "context_used": self.context_used,
+        }
+
+
+class ResponseCacheScopeTests(SimpleTestCase):
+    """Answers built on one session's context must not reach other sessions."""
+
+    def setUp(self):
+        patches = [
+            mock.patch.object(engine_runner, "get_response_cache", return_value=ResponseCache()),
+            mock.patch.object(engine_runner, "get_runtime", return_value=_FakeRuntime()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_as(self, session_id, manager):
+        with mock.patch.object(engine_runner, "_manager", return_value=manager):
+            return engine_runner.run_non_rag("What is RAG?", session_id=session_id)
+
+    def test_context_free_answer_is_shared(self):
+        manager = _FakeManager(context_used=False)
+
+        first = self.run_as("fresh-session-1", manager)
+        second = self.run_as("fresh-session-2", manager)
+
+        self.assertEqual(first["cache"]["match"], "miss")
+        self.assertEqual(second["cache"]["match"], "exact")
+        self.assertEqual(second["answer"], first["answer"])
+        self.assertEqual(manager.calls, 1)
+
+    def test_answer_built_on_context_is_not_cached(self):
+        manager = _FakeManager(context_used=True)
+
+        self.run_as("fresh-session-1", manager)
+        second = self.run_as("fresh-session-2", manager)
+
+        self.assertEqual(second["cache"]["match"], "miss")
+        self.assertEqual(manager.calls, 2)
+
+    def test_session_with_history_skips_the_cache(self):
+        self.run_as("fresh-session-1", _FakeManager(context_used=False))
+        manager = _FakeManager(context_used=True)
+
+        result = self.run_as("returning-session", manager)
+
+        self.assertEqual(result["cache"]["match"], "skipped")
+        self.assertEqual(manager.calls, 1)
+
+
+def _feed(chunks):
+    parser = IncrementalJSONParser()
+    events = [event for chunk in chunks for event in parser.feed(chunk)]
+    return parser, events
+
+
+class IncrementalJSONParserTests(SimpleTestCase):
+    DOC = {
+        "summary": "Short \"quoted\" summary",
+        "sections": [{"heading": "One", "body": "a, b: {c}"}, {"heading": "Two", "body": "caf\u00e9"}],
+        "citations": [{"title": "Paper [1]", "url": "https://example.org/?a=1&b=2"}],
+        "confidence": 0.82,
+        "final_text": "Done.\nBye",
+    }
+
+    def test_any_chunking_gives_the_same_events_and_result(self):
+        text = "```json\n" + json.dumps(self.DOC, ensure_ascii=False) + "\n```"
+        _, whole = _feed([text])
+        for size in (1, 2, 3, 7):
+            parser, events = _feed([text[i:i + size] for i in range(0, len(text), size)])
+            self.assertEqual(events, whole, size)
+            self.assertTrue(parser.complete)
+            self.assertEqual(parser.result(), self.DOC)
+        self.assertEqual([e["event"] for e in whole], ["summary", "section", "section", "citation", "final_text"])
+        self.assertEqual(whole[2]["section"], self.DOC["sections"][1])
+
+    def test_keys_and_strings_split_across_chunks(self):
+        parser, events = _feed(['{"summ', 'ary": "par', 'tial', ' text", "sec', 'tions": [{"heading": "H', 'i"}', "]}"])
+
+        self.assertEqual(events, [
+            {"event": "summary", "text": "partial text"},
+            {"event": "section", "index": 0, "section": {"heading": "Hi"}},
+        ])
+        self.assertEqual(parser.result(), {"summary": "partial text", "sections": [{"heading": "Hi"}]})
+
+    def test_escapes_split_at_chunk_boundary(self):
+        # a backslash that ends a chunk must still escape the quote that starts the next one
+        parser, events = _feed(['{"summary": "say \\', '"hi\\', '" and \\u00', 'e9 \\\\', '"}'])
+
+        self.assertEqual(events, [{"event": "summary", "text": 'say "hi" and \u00e9 \\'}])
+        self.assertEqual(parser.result(), {"summary": 'say "hi" and \u00e9 \\'})
+
+    def test_truncated_string_drops_dangling_escape(self):
+        self.assertEqual(_feed(['{"summary": "cut \\'])[0].result(), {"summary": "cut "})
+        self.assertEqual(_feed(['{"summary": "caf\\u00'])[0].result(), {"summary": "caf"})
+
+    def test_repair_truncated_arrays_and_objects(self):
+        cases = [
+            ('{"sections": [{"heading": "A"}, {"heading": "B"', {"sections": [{"heading": "A"}, {"heading": "B"}]}),
+            ('{"sections": [{"heading": "A"}, {"head', {"sections": [{"heading": "A"}, {}]}),
+            ('{"sections": [{"heading": "A"},', {"sections": [{"heading": "A"}]}),
+            ('{"scores": [1, 2.5, tr', {"scores": [1, 2.5]}),
+            ('{"scores": [1, 2.5', {"scores": [1, 2.5]}),
+            ('{"summary": "ok", "confidence": 0.9', {"summary": "ok", "confidence": 0.9}),
+            ('{"summary": "ok", "final_text":', {"summary": "ok"}),
+            ('{"a": {"b": [{"c": "deep', {"a": {"b": [{"c": "deep"}]}}),
+        ]
+        for text, expected in cases:
+            self.assertEqual(repair_json(text), expected, text)
+
+    def test_repair_without_an_object(self):
+        self.assertIsNone(repair_json("no json here"))
+        self.assertEqual(repair_json("```json\n{"), {})
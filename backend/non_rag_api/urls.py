@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path("run/", views.run_non_rag, name="non-rag-run"),
+    path("stream/", views.stream_non_rag, name="non-rag-stream"),
 ]
@@ -1,30 +1,75 @@
+import json
 import time
 from django.http import JsonResponse
-from rest_framework.decorators import api_view, parser_classes
-from rest_framework.parsers import JSONParser
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
 
-from saras_engine_integration.engine_runner import run_non_rag as engine_run_non_rag
+from core.session import clean_session_id
+from core.sse import sse_response
+from saras_engine_integration.engine_runner import arun_non_rag as engine_arun_non_rag
+from saras_engine_integration.engine_runner import stream_non_rag as engine_stream_non_rag
 
 
-@api_view(["POST"])
-@parser_classes([JSONParser])
-def run_non_rag(request):
+def _read_json(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        data = {}
+    return data if isinstance(data, dict) else {}
+
+
+def _read_query(request):
+    query = _read_json(request).get("query")
+    if not query or not isinstance(query, str):
+        return None
+    return query
+
+
+def _read_session_id(request):
+    return clean_session_id(_read_json(request).get("session_id"))
+
+
+def _invalid_query():
+    return JsonResponse({
+        "status": "error",
+        "message": "Invalid or missing 'query'. Expected JSON: { 'query': '<text>' }"
+    }, status=400)
+
+
+# Async view: the worker is free while the LLM call is in flight.
+# (DRF's @api_view is sync-only, so JSON parsing is done by hand here.)
+@csrf_exempt
+@require_POST
+async def run_non_rag(request):
 
     start = time.time()
 
     # Validate JSON body
-    query = request.data.get("query")
-    if not query or not isinstance(query, str):
-        return JsonResponse({
-            "status": "error",
-            "message": "Invalid or missing 'query'. Expected JSON: { 'query': '<text>' }"
-        }, status=400)
+    query = _read_query(request)
+    if query is None:
+        return _invalid_query()
 
     # Call engine
-    result = engine_run_non_rag(query=query)
+    result = await engine_arun_non_rag(query=query, session_id=_read_session_id(request))
 
     # Add server timing
     result["server_time_ms"] = round((time.time() - start) * 1000, 2)
 
     return JsonResponse(result)
+
+
+# Streaming variant: Server-Sent Events
+#   event: start   {task_id, mode}
+#   event: delta   {text}          (repeated, raw model output)
+#   event: done    {...}           (same JSON as /run/)
+#   event: error   {...}
+@csrf_exempt
+@require_POST
+def stream_non_rag(request):
+
+    query = _read_query(request)
+    if query is None:
+        return _invalid_query()
+
+    return sse_response(engine_stream_non_rag(query=query, session_id=_read_session_id(request)))
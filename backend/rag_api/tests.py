@@ -1,3 +1,497 @@
-from django.test import TestCase
+import json
+import pickle
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+
+from saras_engine.src.services import embedding_cache, gemini_client
+from saras_engine.src.tools import corpus_index, embeddings, pdf_extractor, vector_index, vector_store
+from saras_engine.src.tools.chunker import iter_sentence_chunks
+from saras_engine.src.tools.context_builder import count_tokens
+from saras_engine_integration import engine_runner
+from rag_api import views
+
+
+class _FakeGemini(BaseHTTPRequestHandler):
+    """Stand-in for batchEmbedContents: vector[0] is the text's chunk number."""
+
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append({"path": self.path, "size": len(body["requests"])})
+        texts = [r["content"]["parts"][0]["text"] for r in body["requests"]]
+        payload = json.dumps({
+            "embeddings": [{"values": [float(t.split()[-1]), 0.0]} for t in texts]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeServerTestCase(SimpleTestCase):
+    handler = _FakeGemini
+
+    def setUp(self):
+        self.handler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class BatchEmbeddingTests(FakeServerTestCase):
+
+    def test_300_chunks_take_three_batch_calls_in_order(self):
+        chunks = [f"chunk {i}" for i in range(300)]
+
+        with mock.patch.object(gemini_client, "EMBED_BASE_URL", self.base_url), \
+                mock.patch.object(embedding_cache, "CACHE_ENABLED", False):
+            vectors = embeddings.embed_texts(chunks)
+
+        self.assertEqual(len(self.handler.requests), 3)
+        self.assertTrue(all(":batchEmbedContents" in r["path"] for r in self.handler.requests))
+        self.assertEqual(sorted(r["size"] for r in self.handler.requests), [100, 100, 100])
+        self.assertEqual([v[0] for v in vectors], [float(i) for i in range(300)])
+
+    def test_batched_reports_per_batch_latency(self):
+        chunks = [f"chunk {i}" for i in range(250)]
+
+        with mock.patch.object(gemini_client, "EMBED_BASE_URL", self.base_url):
+            result = gemini_client.embed_texts_batched(chunks)
+
+        self.assertEqual(len(self.handler.requests), 3)
+        self.assertEqual([b["size"] for b in result["batches"]], [100, 100, 50])
+        self.assertTrue(all(b["error"] is None and b["latency_ms"] >= 0 for b in result["batches"]))
+        self.assertEqual([v[0] for v in result["vectors"]], [float(i) for i in range(250)])
+
+
+class PDFPoolErrorTests(SimpleTestCase):
+
+    def test_error_code_survives_the_process_pool(self):
+        future = pdf_extractor._get_pool().submit(pdf_extractor._extract_range, b"%PDF-1.4 broken", 0, 1)
+
+        with self.assertRaises(pdf_extractor.PDFExtractionError) as raised:
+            future.result(timeout=120)
+        self.assertEqual(raised.exception.code, "pdf_open_failed")
+
+    def test_pickled_error_keeps_code_and_message(self):
+        error = pickle.loads(pickle.dumps(pdf_extractor.PDFExtractionError("pdf_read_failed", "bad page")))
+
+        self.assertEqual((error.code, error.message, str(error)), ("pdf_read_failed", "bad page", "bad page"))
+
+    def test_bad_pdf_returns_error_code(self):
+        self.assertEqual(pdf_extractor.extract_text_or_fail(b"not a pdf")["error"], "pdf_open_failed")
+
+
+class _RetrieverOnlyManager:
+    """Stands in for ManagerAgent: only runs the retrieval stage."""
+
+    def handle_request(self, task, retriever=None, **kwargs):
+        retriever()
+
+    def stream_request(self, task, retriever=None, **kwargs):
+        retriever()
+        yield {"event": "done", "result": {}}
+
+
+class IngestErrorShapeTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="saras_test_"))
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        patches = [
+            mock.patch.object(vector_store, "STORE_DIR", self.tmp),
+            mock.patch.object(engine_runner, "UPLOADS_DIR", self.tmp),
+            mock.patch.object(engine_runner, "_manager", return_value=_RetrieverOnlyManager()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_stream_reports_bad_pdf_like_run_rag(self):
+        ran = engine_runner.run_rag("q", b"not a pdf", "bad.pdf", session_id="session-alice")
+        events = list(engine_runner.stream_rag("q", b"not a pdf", "bad.pdf", session_id="session-alice"))
+
+        self.assertEqual(events[-1]["event"], "error")
+        streamed = events[-1]["data"]
+        self.assertEqual(streamed["error"], "pdf_open_failed")
+        self.assertEqual({k: v for k, v in streamed.items() if k != "task_id"},
+                         {k: v for k, v in ran.items() if k != "task_id"})
+
+
+class SentenceChunkerTests(SimpleTestCase):
+    PAGES = [
+        {"page": 1, "text": "Alpha one is here. Beta two is there."},
+        {"page": 2, "text": "Gamma three follows. Delta four ends it."},
+        {"page": 3, "text": "Epsilon five. Zeta six."},
+    ]
+
+    @staticmethod
+    def document(pages):
+        return "".join(page["text"] + "\n" for page in pages)
+
+    def test_run_on_sentence_is_capped(self):
+        text = " ".join(f"word{i}" for i in range(500))
+
+        chunks = list(iter_sentence_chunks([{"page": 1, "text": text}], max_tokens=20, overlap_tokens=0))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(count_tokens(c["text"]) <= 20 for c in chunks))
+        self.assertEqual(" ".join(c["text"] for c in chunks), text)
+
+    def test_cjk_without_whitespace_is_capped(self):
+        text = "漢字仮名交じり文" * 100
+
+        chunks = list(iter_sentence_chunks([{"page": 1, "text": text}], max_tokens=20, overlap_tokens=0))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(count_tokens(c["text"]) <= 20 for c in chunks))
+        self.assertEqual("".join(c["text"] for c in chunks), text)
+
+    def test_offsets_and_pages_are_exact(self):
+        document = self.document(self.PAGES)
+        page_starts = [0, 38, 79]  # offsets of each page in the document text
+
+        chunks = list(iter_sentence_chunks(self.PAGES, max_tokens=12, overlap_tokens=0))
+
+        self.assertEqual([(c["page_start"], c["page_end"]) for c in chunks], [(1, 1), (2, 2), (2, 3), (3, 3)])
+        for chunk in chunks:
+            self.assertEqual(document[chunk["start_char"]:chunk["end_char"]], chunk["text"])
+            self.assertEqual(chunk["page_start"], sum(s <= chunk["start_char"] for s in page_starts))
+            self.assertEqual(chunk["page_end"], sum(s < chunk["end_char"] for s in page_starts))
+
+    def test_overlap_repeats_whole_sentences(self):
+        document = self.document(self.PAGES)
+
+        without = list(iter_sentence_chunks(self.PAGES, max_tokens=12, overlap_tokens=0))
+        with_overlap = list(iter_sentence_chunks(self.PAGES, max_tokens=12, overlap_tokens=5))
+
+        self.assertTrue(all(a["end_char"] <= b["start_char"] for a, b in zip(without, without[1:])))
+        shared = [document[b["start_char"]:a["end_char"]]
+                  for a, b in zip(with_overlap, with_overlap[1:]) if b["start_char"] < a["end_char"]]
+        self.assertEqual(shared, ["Epsilon five."])
+        self.assertTrue(all(count_tokens(text) <= 5 for text in shared))
+        self.assertTrue(all(count_tokens(c["text"]) <= 12 for c in with_overlap))
+
+
+def _axis(direction, dim=8):
+    return [1.0 if d == direction else 0.0 for d in range(dim)]
+
+
+class TempStoreTestCase(SimpleTestCase):
+    """Vector stores in a throwaway STORE_DIR."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="saras_test_"))
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        patch = mock.patch.object(vector_store, "STORE_DIR", self.tmp)
+        patch.start()
+        self.addCleanup(patch.stop)
+        vector_store.clear_cache()
+        self.addCleanup(vector_store.clear_cache)
+
+
+class VectorStoreTests(TempStoreTestCase):
+    CHUNKS = ["first chunk", "zweiter Absatz – ü", "第三段"]
+    POSITIONS = [
+        {"page_start": 1, "page_end": 1, "start_char": 0, "end_char": 11},
+        {"page_start": 1, "page_end": 2, "start_char": 12, "end_char": 30},
+        {"page_start": 3, "page_end": 3, "start_char": 31, "end_char": 34},
+    ]
+
+    def test_build_query_get_chunk_round_trip(self):
+        embeddings = [[3.0 * v for v in _axis(i)] for i in range(3)]  # not normalized on input
+        vector_store.build_store("doc", self.CHUNKS, embeddings, positions=self.POSITIONS)
+
+        suffixes = {p.name[len("doc"):] for p in self.tmp.iterdir()}
+        self.assertEqual(suffixes, {".vec", ".txt", ".off", ".pos", ".meta.json"})
+
+        hits = vector_store.query_store("doc", _axis(1), k=2, with_text=True)
+        self.assertEqual([h["chunk_id"] for h in hits], ["chunk-1", "chunk-0"])
+        self.assertAlmostEqual(hits[0]["score"], 1.0, places=5)
+        self.assertEqual(hits[0]["text"], self.CHUNKS[1])
+        self.assertEqual({f: hits[0][f] for f in vector_store.POSITION_FIELDS}, self.POSITIONS[1])
+
+        for i, text in enumerate(self.CHUNKS):
+            self.assertEqual(vector_store.get_chunk("doc", f"chunk-{i}"),
+                             dict({"chunk_id": f"chunk-{i}", "text": text}, **self.POSITIONS[i]))
+        self.assertIsNone(vector_store.get_chunk("doc", "chunk-3"))
+        self.assertIsNone(vector_store.get_chunk("missing", "chunk-0"))
+
+    def test_append_is_searchable_cached_and_reloaded(self):
+        vector_store.build_store("doc", self.CHUNKS[:2], [_axis(0), _axis(1)], positions=self.POSITIONS[:2])
+        vector_store.query_store("doc", _axis(0))  # warm the cache
+
+        count = vector_store.append_store("doc", self.CHUNKS[2:], [_axis(2)], positions=self.POSITIONS[2:])
+
+        self.assertEqual((count, vector_store.store_count("doc")), (3, 3))
+        cached = vector_store.query_store_batch("doc", [_axis(i) for i in range(3)], k=1, with_text=True)
+        vector_store.clear_cache()
+        reloaded = vector_store.query_store_batch("doc", [_axis(i) for i in range(3)], k=1, with_text=True)
+        self.assertEqual(cached, reloaded)
+        self.assertEqual([row[0]["text"] for row in reloaded], self.CHUNKS)
+        self.assertEqual(vector_store.get_chunk("doc", "chunk-2")["page_start"], 3)
+
+    def test_legacy_json_store_is_migrated(self):
+        for key in ("legacy-a", "legacy-b"):
+            (self.tmp / f"{key}.json").write_text(json.dumps(
+                {"chunks": self.CHUNKS, "embeddings": [[2.0 * v for v in _axis(i)] for i in range(3)]}))
+
+        self.assertEqual(vector_store.migrate_all_json_stores(), ["legacy-a", "legacy-b"])
+        self.assertEqual(vector_store.migrate_all_json_stores(), [])  # already binary
+
+        meta = json.loads((self.tmp / "legacy-a.meta.json").read_text())
+        self.assertEqual((meta["format"], meta["count"], meta["dim"]), (vector_store.STORE_FORMAT, 3, 8))
+        hit = vector_store.query_store("legacy-b", _axis(2), k=1, with_text=True)[0]
+        self.assertEqual((hit["chunk_id"], hit["text"]), ("chunk-2", self.CHUNKS[2]))
+        self.assertAlmostEqual(hit["score"], 1.0, places=5)
+
+    def test_legacy_json_store_migrates_on_first_query(self):
+        (self.tmp / "old.json").write_text(json.dumps({"chunks": ["only"], "embeddings": [_axis(0)]}))
+
+        self.assertEqual(vector_store.query_store("old", _axis(0), k=1)[0]["chunk_id"], "chunk-0")
+        self.assertTrue((self.tmp / "old.meta.json").exists())
+
+    def test_cache_stays_within_byte_budget(self):
+        for key in ("a", "b", "c"):
+            vector_store.build_store(key, [f"{key} {i}" for i in range(10)], [_axis(i % 8) for i in range(10)])
+        vector_store.query_store("a", _axis(0))
+        size = vector_store.cache_stats()["bytes"]
+        vector_store.clear_cache()
+
+        with mock.patch.object(vector_store, "_cache", vector_store._StoreCache(int(size * 2.5))):
+            for key in ("a", "b", "c"):
+                vector_store.query_store(key, _axis(0))
+                self.assertLessEqual(vector_store.cache_stats()["bytes"], int(size * 2.5))
+            self.assertEqual(list(vector_store._cache._entries), ["b", "c"])  # least recently used went
+
+            vector_store.build_store("big", [f"big {i}" for i in range(100)], [_axis(i % 8) for i in range(100)])
+            self.assertEqual(vector_store.query_store("big", _axis(3), k=1)[0]["chunk_id"], "chunk-3")
+            self.assertNotIn("big", vector_store._cache._entries)  # over budget: served from the memmap
+            self.assertLessEqual(vector_store.cache_stats()["bytes"], int(size * 2.5))
+
+
+class VectorIndexTests(TempStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(7)
+        centers = rng.normal(size=(40, 32))
+        self.vectors = vector_store._normalize_rows(
+            (centers[rng.integers(0, 40, 4000)] + 0.35 * rng.normal(size=(4000, 32))).astype(np.float32))
+        self.queries = vector_store._normalize_rows(
+            (centers[rng.integers(0, 40, 50)] + 0.35 * rng.normal(size=(50, 32))).astype(np.float32))
+
+    def _exact(self, k):
+        return np.argsort(-(self.queries @ self.vectors.T), axis=1, kind="stable")[:, :k]
+
+    def test_ivf_recall_at_default_nprobe(self):
+        index = vector_index.IVFIndex.build(self.vectors)
+        self.assertLess(vector_index.default_nprobe(index.nlist), index.nlist)  # really approximate
+
+        _, ids = index.search(self.queries, 10)
+        exact = self._exact(10)
+        recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(ids, exact)])
+        self.assertGreaterEqual(recall, 0.9)
+
+    @unittest.skipUnless(vector_index.faiss, "faiss is not installed")
+    def test_faiss_recall_and_file_round_trip(self):
+        index = vector_index.FaissIVFIndex.build(self.vectors)
+        _, ids = index.search(self.queries, 10)
+        exact = self._exact(10)
+        self.assertGreaterEqual(np.mean([len(set(a) & set(b)) / 10 for a, b in zip(ids, exact)]), 0.9)
+
+        index.save(self.tmp / "f.ivf")
+        loaded = vector_index.load_ivf(index.kind, self.tmp / "f.ivf", self.vectors)
+        np.testing.assert_array_equal(loaded.search(self.queries, 10)[1], ids)
+
+    def test_ivf_file_round_trip(self):
+        vector_store.build_store("big", [f"row {i}" for i in range(len(self.vectors))], self.vectors.tolist())
+        self.assertTrue(vector_store.index_store("big", min_rows=1000))
+
+        meta = json.loads((self.tmp / "big.meta.json").read_text())
+        self.assertEqual((meta["index"], meta["index_rows"]), (vector_index.IVFIndex.kind, 4000))
+        self.assertTrue((self.tmp / "big.ivf").exists())
+        built = vector_store._load_store("big")["index"]
+        before = built.search(self.queries, 5)
+
+        vector_store.clear_cache()
+        loaded = vector_store._load_store("big")["index"]
+        self.assertIsInstance(loaded, vector_index.IVFIndex)
+        self.assertIsNot(loaded, built)
+        np.testing.assert_array_equal(loaded.centroids, built.centroids)
+        np.testing.assert_array_equal(loaded.list_ids, built.list_ids)
+        for a, b in zip(before, loaded.search(self.queries, 5)):
+            np.testing.assert_array_equal(a, b)
+
+        hits = vector_store.query_store_batch("big", self.queries[:3].tolist(), k=1)
+        self.assertEqual([row[0]["chunk_id"] for row in hits], [f"chunk-{i}" for i in before[1][:3, 0]])
+
+    def test_small_collections_use_flat_index(self):
+        small = self.vectors[:200]
+        index = vector_store.build_index(small.tolist())
+        self.assertIsInstance(index, vector_index.FlatIndex)
+        self.assertEqual((index.kind, index.ntotal), ("flat", 200))
+        self.assertIsInstance(vector_store.build_index(small.tolist(), min_rows=100), vector_index.IVFIndex)
+
+        scores, ids = vector_store.search_index(index, self.queries, top_k=5)
+        np.testing.assert_array_equal(ids, np.argsort(-(self.queries @ small.T), axis=1, kind="stable")[:, :5])
+        self.assertEqual(scores.shape, (50, 5))
+        _, padded = vector_store.search_index(vector_store.build_index(small[:3].tolist()), self.queries[0], top_k=5)
+        self.assertEqual(padded[0, 3:].tolist(), [-1, -1])
+
+        vector_store.build_store("small", [f"row {i}" for i in range(200)], small.tolist())
+        self.assertFalse(vector_store.index_store("small"))
+        self.assertFalse((self.tmp / "small.ivf").exists())
+        self.assertIsNone(vector_store._load_store("small")["index"])
+
+        ivf = vector_store.build_index(small.tolist(), min_rows=100)
+        vector_store.persist_index(ivf, [{"text": f"row {i}"} for i in range(200)], "saved")
+        loaded, metadatas = vector_store.load_index("saved")
+        self.assertIsInstance(loaded, vector_index.FlatIndex)  # below VECTOR_INDEX_MIN_ROWS
+        self.assertEqual(metadatas[7]["text"], "row 7")
+
+
+class CorpusIndexTests(TempStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.corpus = corpus_index.CorpusIndex("test", db_path=self.tmp / "corpus.sqlite3", shard_rows=10)
+        self.addCleanup(self.corpus.wait_maintenance, 10)
+
+    def add(self, name, direction, rows=4):
+        """Store `rows` chunks pointing at axis `direction` and add them to the corpus."""
+        document = name * 64
+        vector_store.build_store(document, [f"{name} chunk {i}" for i in range(rows)], [_axis(direction)] * rows)
+        self.corpus.add_document(document, f"{name}.pdf")
+        return document
+
+    def shards(self):
+        return self.corpus._conn.execute(
+            "SELECT key, rows, deleted, sealed FROM corpus_shards ORDER BY id").fetchall()
+
+    def test_removed_document_does_not_come_back(self):
+        a, b = self.add("a", 0), self.add("b", 1)
+
+        before = self.corpus.search([_axis(0)], k=3, with_text=True)[0]
+        self.assertTrue(self.corpus.remove_document(a))
+        self.corpus.wait_maintenance(10)
+        after = self.corpus.search([_axis(0)], k=3)[0]
+
+        self.assertEqual({hit["document"] for hit in before[:3]}, {a})
+        self.assertEqual(before[0]["text"], "a chunk 0")
+        self.assertNotIn(a, {hit["document"] for hit in after})
+        self.assertEqual([d["document"] for d in self.corpus.documents()], [b])
+        self.assertFalse(self.corpus.remove_document(a))
+
+    def test_compaction_drops_tombstoned_rows(self):
+        a, b = self.add("a", 0), self.add("b", 1)
+        old_key = self.shards()[0][0]
+
+        self.corpus.remove_document(a)  # 4 of 8 rows dead: above CORPUS_COMPACT_RATIO
+        self.corpus.wait_maintenance(10)
+
+        (key, rows, deleted, _), = self.shards()
+        self.assertNotEqual(key, old_key)
+        self.assertEqual((rows, deleted), (4, 0))
+        self.assertEqual(vector_store.store_count(key), 4)
+        self.assertFalse(vector_store.has_store(old_key))
+        hit = self.corpus.search([_axis(1)], k=1, with_text=True)[0][0]
+        self.assertEqual((hit["document"], hit["chunk_id"], hit["text"]), (b, "chunk-0", "b chunk 0"))
+
+    def test_full_shard_rolls_over(self):
+        documents = [self.add(name, i) for i, name in enumerate("abc")]  # 4 rows each, 10 per shard
+
+        shards = self.shards()
+        self.assertEqual([(rows, sealed) for _, rows, _, sealed in shards], [(8, 0), (4, 0)])
+
+        self.add("d", 3, rows=6)  # fills the first shard exactly
+        self.assertEqual([(rows, sealed) for _, rows, _, sealed in self.shards()], [(8, 0), (10, 1)])
+        self.assertEqual(self.corpus.stats()["rows"], 18)
+        for i, document in enumerate(documents):
+            self.assertEqual(self.corpus.search([_axis(i)], k=1)[0][0]["document"], document)
+
+
+class CorpusAccessTests(SimpleTestCase):
+    """Uploads are private to the session that made them unless configured otherwise."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="saras_test_"))
+        self.corpus = corpus_index.CorpusIndex("test", db_path=self.tmp / "corpus.sqlite3")
+        patches = [
+            mock.patch.object(vector_store, "STORE_DIR", self.tmp),
+            mock.patch.object(engine_runner, "get_corpus", lambda: self.corpus),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.document = "a" * 64
+        vector_store.build_store(self.document, ["first chunk", "second chunk"], [[1.0, 0.0], [0.0, 1.0]])
+
+    def tearDown(self):
+        self.corpus.wait_maintenance(10)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_uploads_are_not_shared_by_default(self):
+        self.assertFalse(engine_runner.CORPUS_AUTO_ADD)
+        engine_runner._add_to_corpus(self.document, "a.pdf", "session-alice")
+
+        self.assertEqual(self.corpus.stats()["documents"], 0)
+        self.assertTrue(self.corpus.is_owner(self.document, "session-alice"))
+
+    def test_citation_only_resolves_for_the_uploading_session(self):
+        engine_runner._add_to_corpus(self.document, "a.pdf", "session-alice")
+        url = "/api/rag/citation/"
+        params = {"document": self.document, "chunk_id": "chunk-1"}
+
+        own = self.client.get(url, dict(params, session_id="session-alice"))
+        other = self.client.get(url, dict(params, session_id="session-mallory"))
+        anonymous = self.client.get(url, params)
+
+        self.assertEqual(own.status_code, 200)
+        self.assertEqual(own.json()["citation"]["text"], "second chunk")
+        self.assertEqual(other.status_code, 404)
+        self.assertEqual(anonymous.status_code, 400)
+
+    def test_listing_requires_a_session(self):
+        with mock.patch.object(engine_runner, "CORPUS_AUTO_ADD", True):
+            engine_runner._add_to_corpus(self.document, "a.pdf", "session-alice")
+
+        anonymous = self.client.get("/api/rag/corpus/")
+        other = self.client.get("/api/rag/corpus/", {"session_id": "session-mallory"})
+        own = self.client.get("/api/rag/corpus/", {"session_id": "session-alice"})
+
+        self.assertEqual(anonymous.status_code, 400)
+        self.assertEqual(other.json()["documents"], [])
+        self.assertEqual([d["document"] for d in own.json()["documents"]], [self.document])
+
+    def test_scope_all_is_disabled_by_default(self):
+        body = json.dumps({"query": "anything", "scope": "all"})
+
+        with mock.patch.object(views, "engine_run_rag_corpus") as run:
+            response = self.client.post("/api/rag/corpus/query/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+        run.assert_not_called()
+        self.assertEqual(engine_runner.run_rag_corpus("anything", scope="all")["error"], "corpus_scope_forbidden")
+
+        with mock.patch.object(engine_runner, "CORPUS_ALLOW_SCOPE_ALL", True), \
+                mock.patch.object(views, "engine_run_rag_corpus", return_value={"status": "success"}) as run:
+            response = self.client.post("/api/rag/corpus/query/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(run.call_args.kwargs["scope"], "all")
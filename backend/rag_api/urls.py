@@ -3,4 +3,10 @@ from . import views
 
 urlpatterns = [
     path("run/", views.run_rag, name="rag-run"),
+    path("batch/", views.run_rag_batch, name="rag-batch"),
+    path("stream/", views.stream_rag, name="rag-stream"),
+    path("citation/", views.get_citation, name="rag-citation"),
+    path("corpus/", views.list_corpus, name="rag-corpus"),
+    path("corpus/query/", views.query_corpus, name="rag-corpus-query"),
+    path("corpus/<str:document>/", views.remove_corpus_document, name="rag-corpus-remove"),
 ]
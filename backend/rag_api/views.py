@@ -1,23 +1,39 @@
+import json
+import re
 import time
 from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser, JSONParser
 
-from saras_engine_integration.engine_runner import run_rag as engine_run_rag
+from core.session import clean_session_id
+from core.sse import sse_response
+from saras_engine_integration.engine_runner import arun_rag as engine_arun_rag
+from saras_engine_integration.engine_runner import stream_rag as engine_stream_rag
+from saras_engine_integration.engine_runner import run_rag_batch as engine_run_rag_batch
+from saras_engine_integration.engine_runner import get_citation as engine_get_citation
+from saras_engine_integration.engine_runner import run_rag_corpus as engine_run_rag_corpus
+from saras_engine_integration.engine_runner import list_corpus as engine_list_corpus
+from saras_engine_integration.engine_runner import remove_from_corpus as engine_remove_from_corpus
+from saras_engine_integration.engine_runner import corpus_scopes as engine_corpus_scopes
 
 
 """
     RAG endpoint:
     - Accepts query + PDF
     - Reads file bytes
-    - Passes everything to engine_runner.run_rag()
+    - Passes everything to engine_runner.arun_rag()
     - Returns structured JSON result
+
+    Async view (DRF's @api_view is sync-only): the worker is free while
+    embeddings and the LLM call are in flight.
 """
 
-@api_view(["POST"])
-@parser_classes([MultiPartParser, JSONParser])
-def run_rag(request):
+@csrf_exempt
+@require_POST
+async def run_rag(request):
 
     # Validate file
     uploaded_file = request.FILES.get("file")
@@ -35,7 +51,7 @@ def run_rag(request):
         )
 
     # Read query
-    query = request.data.get("query", "").strip()
+    query = request.POST.get("query", "").strip()
     if not query:
         query = "Summarize this document"
 
@@ -49,11 +65,12 @@ def run_rag(request):
 
     # Run engine
     try:
-        result = engine_run_rag(
+        result = await engine_arun_rag(
             query=query,
             file_bytes=file_bytes,
             filename=uploaded_file.name,
-            file_url=None   # file_url is no longer used by engine
+            file_url=None,   # file_url is no longer used by engine
+            session_id=clean_session_id(request.POST.get("session_id"))
         )
     except Exception as e:
         return JsonResponse(
@@ -62,3 +79,261 @@ def run_rag(request):
 
     # Return JSON
     return JsonResponse(result, status=200)
+
+
+MAX_BATCH_QUERIES = 20
+
+
+def _read_queries(request):
+    """
+    Accept queries as repeated form fields (queries=a&queries=b)
+    or as one JSON list (queries='["a", "b"]').
+    """
+    if hasattr(request.data, "getlist"):
+        raw = request.data.getlist("queries")
+    else:
+        raw = request.data.get("queries", [])
+
+    if isinstance(raw, str):
+        raw = [raw]
+    if len(raw) == 1 and isinstance(raw[0], str) and raw[0].strip().startswith("["):
+        try:
+            raw = json.loads(raw[0])
+        except ValueError:
+            return None
+
+    if not isinstance(raw, list):
+        return None
+    return [q.strip() for q in raw if isinstance(q, str) and q.strip()]
+
+
+"""
+    Batch RAG endpoint:
+    - Accepts a list of queries + one PDF
+    - Document is parsed, embedded and indexed once for all queries
+"""
+
+@api_view(["POST"])
+@parser_classes([MultiPartParser, JSONParser])
+def run_rag_batch(request):
+
+    uploaded_file = request.FILES.get("file")
+    if uploaded_file is None:
+        return JsonResponse(
+            {"status": "error", "message": "Missing file for RAG."},
+            status=400
+        )
+
+    filename = uploaded_file.name.lower()
+    if not (filename.endswith(".pdf") or filename.endswith(".txt")):
+        return JsonResponse(
+            {"status": "error", "message": "Only PDF or text files allowed."},
+            status=400
+        )
+
+    queries = _read_queries(request)
+    if not queries:
+        return JsonResponse(
+            {"status": "error", "message": "Expected a non-empty list of 'queries'."},
+            status=400
+        )
+    if len(queries) > MAX_BATCH_QUERIES:
+        return JsonResponse(
+            {"status": "error", "message": f"At most {MAX_BATCH_QUERIES} queries per request."},
+            status=400
+        )
+
+    file_bytes = uploaded_file.read()
+    if not file_bytes:
+        return JsonResponse(
+            {"status": "error", "message": "Uploaded file is empty."},
+            status=400
+        )
+
+    try:
+        result = engine_run_rag_batch(
+            queries=queries,
+            file_bytes=file_bytes,
+            filename=uploaded_file.name,
+            session_id=clean_session_id(request.data.get("session_id"))
+        )
+    except Exception as e:
+        return JsonResponse(
+            {"status": "error", "message": str(e)}, status=500
+        )
+
+    return JsonResponse(result, status=200)
+
+
+"""
+    Streaming RAG endpoint (Server-Sent Events):
+    - Same form fields as /run/ (file + query)
+    - event: start -> sources -> delta* -> done | error
+    - done carries the same JSON as /run/
+"""
+
+@csrf_exempt
+@require_POST
+def stream_rag(request):
+
+    uploaded_file = request.FILES.get("file")
+    if uploaded_file is None:
+        return JsonResponse(
+            {"status": "error", "message": "Missing file for RAG."},
+            status=400
+        )
+
+    filename = uploaded_file.name.lower()
+    if not (filename.endswith(".pdf") or filename.endswith(".txt")):
+        return JsonResponse(
+            {"status": "error", "message": "Only PDF or text files allowed."},
+            status=400
+        )
+
+    query = request.POST.get("query", "").strip()
+    if not query:
+        query = "Summarize this document"
+
+    file_bytes = uploaded_file.read()
+    if not file_bytes:
+        return JsonResponse(
+            {"status": "error", "message": "Uploaded file is empty."},
+            status=400
+        )
+
+    return sse_response(engine_stream_rag(
+        query=query,
+        file_bytes=file_bytes,
+        filename=uploaded_file.name,
+        session_id=clean_session_id(request.POST.get("session_id"))
+    ))
+
+
+_DOCUMENT_ID = re.compile(r"^[0-9a-f]{64}$")
+_CHUNK_ID = re.compile(r"^chunk-[0-9]{1,9}$")
+
+
+"""
+    Citation endpoint:
+    - GET /api/rag/citation/?document=<id>&chunk_id=chunk-N&session_id=
+    - document is returned with every RAG result ("document")
+    - Returns the chunk's full text and page/char position, so results
+      only need to carry chunk ids
+    - Only documents uploaded in that session resolve (404 otherwise)
+"""
+
+@api_view(["GET"])
+def get_citation(request):
+
+    document = request.GET.get("document", "")
+    chunk_id = request.GET.get("chunk_id", "")
+    session_id = clean_session_id(request.GET.get("session_id"))
+    if not _DOCUMENT_ID.match(document) or not _CHUNK_ID.match(chunk_id) or not session_id:
+        return JsonResponse(
+            {"status": "error", "message": "Expected 'document', 'chunk_id' and 'session_id'."},
+            status=400
+        )
+
+    chunk = engine_get_citation(document, chunk_id, session_id)
+    if chunk is None:
+        return JsonResponse(
+            {"status": "error", "message": "Citation not found."},
+            status=404
+        )
+
+    return JsonResponse({"status": "success", "document": document, "citation": chunk})
+
+
+
+"""
+    Corpus endpoints (uploads are added with CORPUS_AUTO_ADD=true):
+    - GET    /api/rag/corpus/?session_id=          this session's documents
+    - POST   /api/rag/corpus/query/                 { query, session_id, scope, documents? }
+             scope "session" (default) searches this session's uploads,
+             "all" the whole corpus (only with CORPUS_ALLOW_SCOPE_ALL=true);
+             documents narrows to those ids
+    - DELETE /api/rag/corpus/<document>/?session_id=
+"""
+
+@api_view(["GET"])
+def list_corpus(request):
+
+    session_id = clean_session_id(request.GET.get("session_id"))
+    if not session_id:
+        return JsonResponse(
+            {"status": "error", "message": "Missing 'session_id'."},
+            status=400
+        )
+
+    return JsonResponse({
+        "status": "success",
+        **engine_list_corpus(session_id)
+    })
+
+
+@api_view(["POST"])
+@parser_classes([JSONParser])
+def query_corpus(request):
+
+    query = request.data.get("query")
+    if not isinstance(query, str) or not query.strip():
+        return JsonResponse(
+            {"status": "error", "message": "Missing 'query'."},
+            status=400
+        )
+
+    scope = request.data.get("scope", "session")
+    session_id = clean_session_id(request.data.get("session_id"))
+    if scope not in ("session", "all") or (scope == "session" and not session_id):
+        return JsonResponse(
+            {"status": "error", "message": "Expected scope 'all', or 'session' with a 'session_id'."},
+            status=400
+        )
+    if scope not in engine_corpus_scopes():
+        return JsonResponse(
+            {"status": "error", "message": "Searching every session's documents is disabled."},
+            status=403
+        )
+
+    documents = request.data.get("documents")
+    if documents is not None and (
+        not isinstance(documents, list)
+        or not all(isinstance(d, str) and _DOCUMENT_ID.match(d) for d in documents)
+    ):
+        return JsonResponse(
+            {"status": "error", "message": "'documents' must be a list of document ids."},
+            status=400
+        )
+
+    try:
+        result = engine_run_rag_corpus(
+            query=query.strip(),
+            session_id=session_id,
+            documents=documents,
+            scope=scope
+        )
+    except Exception as e:
+        return JsonResponse(
+            {"status": "error", "message": str(e)}, status=500
+        )
+
+    return JsonResponse(result, status=200)
+
+
+@api_view(["DELETE"])
+def remove_corpus_document(request, document):
+
+    session_id = clean_session_id(request.GET.get("session_id"))
+    if not _DOCUMENT_ID.match(document) or not session_id:
+        return JsonResponse(
+            {"status": "error", "message": "Expected a document id and 'session_id'."},
+            status=400
+        )
+
+    if not engine_remove_from_corpus(document, session_id):
+        return JsonResponse(
+            {"status": "error", "message": "Document not found."},
+            status=404
+        )
+
+    return JsonResponse({"status": "success", "document": document})
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saras_backend.settings')
+# Long-lived event loop: native async HTTP client per loop (see services/http_client.py)
+os.environ.setdefault('HTTP_ASYNC_BACKEND', 'httpx')
 
 application = get_asgi_application()
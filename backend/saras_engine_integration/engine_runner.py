@@ -1,18 +1,26 @@
+import asyncio
 import hashlib
 import os
 import time
 import json
 import uuid
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 
  
 # IMPORT ENGINE LAYERS
 try:
-    from saras_engine.src.tools.pdf_extractor import extract_text_or_fail
-    from saras_engine.src.tools.embeddings import embeddings_for_document_bytes
-    from saras_engine.src.tools.vector_store import build_store, query_store
-    from saras_engine.src.agents.manager_agent import ManagerAgent
+    from saras_engine.src.tools.pdf_extractor import PDFExtractionError, iter_pages
+    from saras_engine.src.tools.chunker import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, iter_sentence_chunks
+    from saras_engine.src.tools.embeddings import embed_stream
+    from saras_engine.src.tools.vector_store import (
+        build_store, get_chunk, has_store, index_store, query_store, query_store_batch
+    )
+    from saras_engine.src.tools.corpus_index import get_corpus
+    from saras_engine.src.observability.metrics import metrics
+    from saras_engine.src.agents.runtime import get_runtime, new_session_id
+    from saras_engine.src.tools.json_stream import repair_json
+    from saras_engine.src.memory.response_cache import get_response_cache
 except Exception as e:
     raise ImportError(f"Engine imports failed: {e}")
 
@@ -28,12 +36,33 @@ UPLOADS_DIR = BASE_DIR / "uploads"
 TRACES_DIR.mkdir(parents=True, exist_ok=True)
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Recorded in each vector store; a store is only reused when these match
+RAG_CHUNK_PARAMS = {
+    "chunker": "sentence",
+    "max_tokens": CHUNK_MAX_TOKENS,
+    "overlap_tokens": CHUNK_OVERLAP_TOKENS,
+    "positions": True,
+}
+
+# Candidate chunks per query; the writer packs as many as fit its token budget
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+
+# Add every ingested upload to the cross-document corpus (tools/corpus_index.py).
+# Off by default: uploads stay private to the session that made them.
+CORPUS_AUTO_ADD = os.getenv("CORPUS_AUTO_ADD", "false").lower() in ("1", "true", "yes")
+# Let clients search every session's documents (corpus query scope="all")
+CORPUS_ALLOW_SCOPE_ALL = os.getenv("CORPUS_ALLOW_SCOPE_ALL", "false").lower() in ("1", "true", "yes")
+
  
 # UTILITY HELPERS
  
 def _make_task_id(prefix: str) -> str:
     return f"{prefix}-{uuid.uuid4().hex[:8]}"
 
+def _manager(session_id: str):
+    """ManagerAgent wired to the shared runtime (agents + memory built once per process)."""
+    return get_runtime(SARAS_API_KEY).manager(session_id)
+
 def _atomic_write_json(path: Path, data: Dict[str, Any]) -> None:
     tmp = path.with_suffix(".tmp")
     with tmp.open("w", "w", encoding="utf-8") as f:
@@ -75,7 +104,7 @@ def _clean_response(payload: Dict[str, Any]) -> Dict[str, Any]:
     # If final_answer is JSON (writer format), parse it
     try:
         if cleaned["answer"].strip().startswith("{"):
-            parsed = json.loads(cleaned["answer"])
+            parsed = repair_json(cleaned["answer"])
             cleaned["summary"] = parsed.get("summary", "")
             cleaned["sections"] = parsed.get("sections", [])
             cleaned["citations"] = parsed.get("citations", [])
@@ -85,124 +114,580 @@ def _clean_response(payload: Dict[str, Any]) -> Dict[str, Any]:
 
     return cleaned
 
+
+def _stream_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Agent stream event -> {"event": name, "data": payload} for SSE."""
+    return {"event": event["event"], "data": {k: v for k, v in event.items() if k != "event"}}
+
  
 # NON-RAG PIPELINE
  
-def run_non_rag(query: str) -> Dict[str, Any]:
+def _non_rag_error(task_id: str, error: str) -> Dict[str, Any]:
+    return {
+        "status": "error",
+        "task_id": task_id,
+        "mode": "Non-RAG",
+        "answer": "",
+        "summary": "",
+        "sections": [],
+        "sources": [],
+        "citations": [],
+        "error": error
+    }
+
+
+def _non_rag_result(task_id: str, engine_output: Dict[str, Any], start: float) -> Dict[str, Any]:
+    # Normalize internal engine output
+    internal = {
+        "status": "success",
+        "task_id": task_id,
+        "mode": "Non-RAG",
+        "final_answer": engine_output["writer_agent_output"].get("text", ""),
+        "sources": engine_output.get("research_agent_output", {}).get("results", []),
+    }
+
+    # CLEAN RESPONSE
+    final = _clean_response(internal)
+    final["timings"] = engine_output.get("stage_timings", {})
+    if engine_output["writer_agent_output"].get("degraded"):
+        final["degraded"] = True  # model unavailable, answer is the local stub
+
+    # Log time (for server debug)
+    final["server_time_ms"] = round((time.time() - start) * 1000, 2)
+
+    return final
+
+
+def _cache_lookup(query: str, session_id: str) -> Dict[str, Any]:
+    """
+    Response cache lookup; a disabled cache behaves like a permanent miss.
+    Sessions with earlier turns skip the cache: their prompt includes the
+    history, so a shared answer would ignore it.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return {"response": None, "match": "disabled", "similarity": None, "embedding": None}
+    if get_runtime(SARAS_API_KEY).session(session_id).get_history():
+        return {"response": None, "match": "skipped", "similarity": None, "embedding": None}
+    return cache.get(query)
+
+
+def _cache_info(lookup: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "hit": lookup["response"] is not None,
+        "match": lookup["match"],
+        "similarity": lookup["similarity"],
+    }
+
+
+def _cached_result(task_id: str, session_id: str, lookup: Dict[str, Any], start: float) -> Dict[str, Any]:
+    final = lookup["response"]
+    final["task_id"] = task_id
+    final["session_id"] = session_id
+    final["server_time_ms"] = round((time.time() - start) * 1000, 2)
+    final["cache"] = _cache_info(lookup)
+    return final
+
+
+def _cache_store(query: str, lookup: Dict[str, Any], final: Dict[str, Any],
+                 engine_output: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Cache a genuine model answer (minus per-request fields) and tag it as a
+    miss. Degraded responses (stub text while the model was unavailable) are
+    never cached, or a short outage would be served back for the whole TTL.
+    Neither are answers built on session history or memory facts: the cache
+    key is the query alone, and other sessions would get them.
+    """
+    cache = get_response_cache()
+    if cache is not None and final.get("status") == "success" and not final.get("degraded") \
+            and not engine_output.get("context_used"):
+        cache.put(query, {k: v for k, v in final.items()
+                          if k not in ("task_id", "session_id", "server_time_ms", "timings")},
+                  embedding=lookup["embedding"])
+    final["cache"] = _cache_info(lookup)
+    return final
+
+
+def run_non_rag(query: str, session_id: Optional[str] = None) -> Dict[str, Any]:
     task_id = _make_task_id("nonrag")
+    session_id = session_id or new_session_id()
     start = time.time()
 
+    lookup = _cache_lookup(query, session_id)
+    if lookup["response"] is not None:
+        return _cached_result(task_id, session_id, lookup, start)
+
     try:
-        mgr = ManagerAgent(api_key=SARAS_API_KEY)
+        mgr = _manager(session_id)
         engine_output = mgr.handle_request(task=query, rag_context=None)
+        final = _non_rag_result(task_id, engine_output, start)
+        final["session_id"] = session_id
+        return _cache_store(query, lookup, final, engine_output)
 
-        # Normalize internal engine output
-        internal = {
-            "status": "success",
-            "task_id": task_id,
-            "mode": "Non-RAG",
-            "final_answer": engine_output["writer_agent_output"].get("text", ""),
-            "sources": engine_output.get("research_agent_output", {}).get("results", []),
-        }
+    except Exception as e:
+        return _non_rag_error(task_id, str(e))
 
-        # CLEAN RESPONSE
-        final = _clean_response(internal)
 
-        # Log time (for server debug)
-        final["server_time_ms"] = round((time.time() - start) * 1000, 2)
+def stream_non_rag(query: str, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming run_non_rag. Yields {"event": ..., "data": {...}} dicts:
+    start -> delta* -> done (same payload as run_non_rag) | error
+    A cache hit goes straight from start to done.
+    """
+    task_id = _make_task_id("nonrag")
+    session_id = session_id or new_session_id()
+    start = time.time()
+    yield {"event": "start", "data": {"task_id": task_id, "session_id": session_id, "mode": "Non-RAG"}}
 
-        return final
+    try:
+        lookup = _cache_lookup(query, session_id)
+        if lookup["response"] is not None:
+            yield {"event": "done", "data": _cached_result(task_id, session_id, lookup, start)}
+            return
+
+        mgr = _manager(session_id)
+        for event in mgr.stream_request(task=query, rag_context=None):
+            if event["event"] == "done":
+                final = _non_rag_result(task_id, event["result"], start)
+                final["session_id"] = session_id
+                yield {"event": "done", "data": _cache_store(query, lookup, final, event["result"])}
+            else:
+                yield _stream_event(event)
 
     except Exception as e:
-        return {
-            "status": "error",
-            "task_id": task_id,
-            "mode": "Non-RAG",
-            "answer": "",
-            "summary": "",
-            "sections": [],
-            "sources": [],
-            "citations": [],
-            "error": str(e)
-        }
+        yield {"event": "error", "data": _non_rag_error(task_id, str(e))}
+
+
+async def arun_non_rag(query: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Async run_non_rag for async views; same response shape."""
+    task_id = _make_task_id("nonrag")
+    session_id = session_id or new_session_id()
+    start = time.time()
+
+    # the semantic tier embeds the query over HTTP
+    lookup = await asyncio.to_thread(_cache_lookup, query, session_id)
+    if lookup["response"] is not None:
+        return _cached_result(task_id, session_id, lookup, start)
+
+    try:
+        # first call builds the shared runtime (opens memory DBs): keep it off the loop
+        mgr = await asyncio.to_thread(_manager, session_id)
+        engine_output = await mgr.ahandle_request(task=query, rag_context=None)
+        final = _non_rag_result(task_id, engine_output, start)
+        final["session_id"] = session_id
+        return _cache_store(query, lookup, final, engine_output)
+
+    except Exception as e:
+        return _non_rag_error(task_id, str(e))
 
  
 # RAG PIPELINE
  
+def _rag_error(task_id: str, error: str) -> Dict[str, Any]:
+    return {
+        "status": "error",
+        "task_id": task_id,
+        "mode": "RAG",
+        "answer": "",
+        "summary": "",
+        "sections": [],
+        "sources": [],
+        "citations": [],
+        "error": error
+    }
+
+
+def _add_to_corpus(key: str, filename: str, owner: Optional[str]):
+    """
+    Record `owner` as an uploader of the document (citations are limited to
+    it) and, with CORPUS_AUTO_ADD, add the document to the corpus.
+    Best effort: a corpus failure never fails the upload itself.
+    """
+    try:
+        if CORPUS_AUTO_ADD:
+            get_corpus().add_document(key, filename, owner)
+        elif owner:
+            get_corpus().add_owner(key, owner)
+    except Exception:
+        metrics.inc("corpus_errors")
+
+
+def _ingest_document(file_bytes: bytes, filename: str, owner: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Save, extract, chunk, embed and index one uploaded document, and record
+    `owner` (the session id) as its uploader (see _add_to_corpus).
+
+    Stores are content-addressed: when a valid store already exists for this
+    file and chunking setup, extraction and embedding are skipped entirely.
+
+    Returns {"error": None, "key": <store key>, "reused": bool} or {"error": <code>}.
+    """
+    key = hashlib.sha256(file_bytes).hexdigest()
+    if has_store(key, RAG_CHUNK_PARAMS):
+        _add_to_corpus(key, filename, owner)
+        return {"error": None, "key": key, "reused": True}
+
+    # Save uploaded file
+    safe_name = f"{uuid.uuid4().hex[:8]}_{filename}"
+    saved_path = UPLOADS_DIR / safe_name
+    with saved_path.open("wb") as f:
+        f.write(file_bytes)
+
+    # Extract -> chunk -> embed as a pipeline: chunks of early pages are
+    # embedding while later pages are still being parsed
+    positions: List[Dict[str, int]] = []
+
+    def chunk_texts() -> Iterator[str]:
+        pages = iter_pages(file_bytes)
+        for chunk in iter_sentence_chunks(pages, RAG_CHUNK_PARAMS["max_tokens"],
+                                          RAG_CHUNK_PARAMS["overlap_tokens"]):
+            positions.append({k: v for k, v in chunk.items() if k != "text"})
+            yield chunk["text"]
+
+    try:
+        embedded = embed_stream(chunk_texts())
+    except PDFExtractionError as e:
+        return {"error": e.code}
+
+    chunks, embeddings = embedded["chunks"], embedded["vectors"]
+    if not any(c.strip() for c in chunks):
+        return {"error": "pdf_empty"}
+
+    #  Build vector store
+    build_store(key, chunks, embeddings, params=RAG_CHUNK_PARAMS, positions=positions)
+    index_store(key)  # ANN index for large documents (no-op below VECTOR_INDEX_MIN_ROWS)
+    _add_to_corpus(key, filename, owner)
+
+    return {"error": None, "key": key, "reused": False}
+
+
+def _rag_result(task_id: str, engine_out: Dict[str, Any], top_chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Prepare internal
+    internal = {
+        "status": "success",
+        "task_id": task_id,
+        "mode": "RAG",
+        "final_answer": engine_out["writer_agent_output"].get("text", ""),
+        "sources": _public_sources(top_chunks)
+    }
+
+    # CLEAN RESPONSE
+    final = _clean_response(internal)
+    final["timings"] = engine_out.get("stage_timings", {})
+    if engine_out["writer_agent_output"].get("degraded"):
+        final["degraded"] = True
+    return final
+
+
+def _public_sources(top_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Sources as returned to clients: chunk id, score and page/char position.
+    Chunk text stays server-side; clients fetch it on demand (get_citation).
+    """
+    return [{k: v for k, v in c.items() if k != "text"} for c in top_chunks]
+
+
+class _IngestError(Exception):
+    """Upload could not be ingested; args[0] is the error code for the client."""
+
+
+def _ingest_error(task_id: str, code: str) -> Dict[str, Any]:
+    return {
+        "status": "error",
+        "task_id": task_id,
+        "mode": "RAG",
+        "error": code
+    }
+
+
+def _rag_retriever(query: str, file_bytes: bytes, filename: str, ingested: Dict[str, Any],
+                   owner: Optional[str] = None):
+    """
+    Retrieval stage for ManagerAgent: ingest (or reuse) the document, embed
+    the query and search. Runs concurrently with research/memory recall.
+    Ingestion info is written into `ingested`.
+    """
+    def retrieve() -> List[Dict[str, Any]]:
+        result = _ingest_document(file_bytes, filename, owner)
+        if result.get("error"):
+            raise _IngestError(result["error"])
+        ingested.update(result)
+
+        #  Query vector store
+        from saras_engine.src.services.gemini_client import embed_texts
+        q_emb = embed_texts([query])[0]
+        return query_store(result["key"], q_emb, k=RAG_TOP_K, with_text=True, excerpt_chars=0)
+
+    return retrieve
+
+
+def _arag_retriever(query: str, file_bytes: bytes, filename: str, ingested: Dict[str, Any],
+                    owner: Optional[str] = None):
+    """Async _rag_retriever: ingestion and search in worker threads, query embedding awaited."""
+    async def retrieve() -> List[Dict[str, Any]]:
+        result = await asyncio.to_thread(_ingest_document, file_bytes, filename, owner)
+        if result.get("error"):
+            raise _IngestError(result["error"])
+        ingested.update(result)
+
+        from saras_engine.src.services.gemini_client import aembed_texts
+        q_emb = (await aembed_texts([query]))[0]
+        return await asyncio.to_thread(query_store, result["key"], q_emb, RAG_TOP_K, True, 0)
+
+    return retrieve
+
+
+def _answer_rag_query(task_id: str, session_id: str, query: str,
+                      top_chunks: Optional[List[Dict[str, Any]]] = None,
+                      retriever=None) -> Dict[str, Any]:
+    """
+    Hand one query to ManagerAgent and clean the output. Pass either chunks
+    that were already retrieved or a retriever to run inside the manager.
+    """
+    mgr = _manager(session_id)
+
+    engine_out = mgr.handle_request(
+        task=f"RAG Query: {query}",
+        rag_chunks=top_chunks,
+        retriever=retriever
+    )
+
+    return _rag_result(task_id, engine_out, engine_out["retrieved_chunks"])
+
+
+async def _aanswer_rag_query(task_id: str, session_id: str, query: str,
+                             top_chunks: Optional[List[Dict[str, Any]]] = None,
+                             retriever=None) -> Dict[str, Any]:
+    """Async _answer_rag_query."""
+    mgr = await asyncio.to_thread(_manager, session_id)
+
+    engine_out = await mgr.ahandle_request(
+        task=f"RAG Query: {query}",
+        rag_chunks=top_chunks,
+        retriever=retriever
+    )
+
+    return _rag_result(task_id, engine_out, engine_out["retrieved_chunks"])
+
+
 def run_rag(query: str, file_bytes: bytes, filename: str,
-            file_url: Optional[str] = None) -> Dict[str, Any]:
+            file_url: Optional[str] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+
+    task_id = _make_task_id("rag")
+    session_id = session_id or new_session_id()
+    start = time.time()
+
+    try:
+        # ingestion + retrieval run inside the manager, next to research
+        ingested: Dict[str, Any] = {}
+        retriever = _rag_retriever(query, file_bytes, filename, ingested, session_id)
+
+        final = _answer_rag_query(task_id, session_id, query, retriever=retriever)
+        final["session_id"] = session_id
+        final["store_reused"] = ingested["reused"]
+        final["document"] = ingested["key"]
+        final["server_time_ms"] = round((time.time() - start) * 1000, 2)
+
+        return final
+
+    except _IngestError as e:
+        return _ingest_error(task_id, e.args[0])
+    except Exception as e:
+        return _rag_error(task_id, str(e))
+
+
+async def arun_rag(query: str, file_bytes: bytes, filename: str,
+                   file_url: Optional[str] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Async run_rag for async views; same response shape.
+    Ingestion (PDF parsing, chunk embedding, disk writes) runs in a worker
+    thread; the query embedding and LLM call are awaited.
+    """
+    task_id = _make_task_id("rag")
+    session_id = session_id or new_session_id()
+    start = time.time()
+
+    try:
+        ingested: Dict[str, Any] = {}
+        retriever = _arag_retriever(query, file_bytes, filename, ingested, session_id)
+
+        final = await _aanswer_rag_query(task_id, session_id, query, retriever=retriever)
+        final["session_id"] = session_id
+        final["store_reused"] = ingested["reused"]
+        final["document"] = ingested["key"]
+        final["server_time_ms"] = round((time.time() - start) * 1000, 2)
+
+        return final
+
+    except _IngestError as e:
+        return _ingest_error(task_id, e.args[0])
+    except Exception as e:
+        return _rag_error(task_id, str(e))
+
+
+def stream_rag(query: str, file_bytes: bytes, filename: str,
+               session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming run_rag. Yields {"event": ..., "data": {...}} dicts:
+    start -> sources -> delta* -> done (same payload as run_rag) | error
+    """
+    task_id = _make_task_id("rag")
+    session_id = session_id or new_session_id()
+    start = time.time()
+    yield {"event": "start", "data": {"task_id": task_id, "session_id": session_id, "mode": "RAG"}}
+
+    try:
+        ingested: Dict[str, Any] = {}
+        retriever = _rag_retriever(query, file_bytes, filename, ingested, session_id)
+
+        mgr = _manager(session_id)
+        for event in mgr.stream_request(task=f"RAG Query: {query}", retriever=retriever):
+            if event["event"] == "retrieved":
+                yield {"event": "sources", "data": {"sources": _public_sources(event["chunks"]),
+                                                     "document": ingested.get("key")}}
+            elif event["event"] == "done":
+                final = _rag_result(task_id, event["result"], event["result"]["retrieved_chunks"])
+                final["session_id"] = session_id
+                final["store_reused"] = ingested["reused"]
+                final["document"] = ingested["key"]
+                final["server_time_ms"] = round((time.time() - start) * 1000, 2)
+                yield {"event": "done", "data": final}
+            else:
+                yield _stream_event(event)
+
+    except _IngestError as e:
+        yield {"event": "error", "data": _ingest_error(task_id, e.args[0])}
+    except Exception as e:
+        yield {"event": "error", "data": _rag_error(task_id, str(e))}
+
 
+def run_rag_batch(queries: List[str], file_bytes: bytes, filename: str,
+                  session_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Answer several queries against one document.
+
+    The document is extracted, embedded and indexed once, and all query
+    embeddings are scored against the store in a single batch search.
+    """
     task_id = _make_task_id("rag")
+    session_id = session_id or new_session_id()
     start = time.time()
 
     try:
-        # Save uploaded file
-        safe_name = f"{uuid.uuid4().hex[:8]}_{filename}"
-        saved_path = UPLOADS_DIR / safe_name
-        with saved_path.open("wb") as f:
-            f.write(file_bytes)
-
-        # Extract text
-        extraction = extract_text_or_fail(file_bytes)
-        if extraction.get("error"):
+        ingested = _ingest_document(file_bytes, filename, session_id)
+        if ingested.get("error"):
             return {
                 "status": "error",
                 "task_id": task_id,
                 "mode": "RAG",
-                "error": extraction["error"]
+                "error": ingested["error"]
             }
 
-        full_text = extraction["text"]
+        from saras_engine.src.services.gemini_client import embed_texts
+        q_embs = embed_texts(queries)
+        all_top_chunks = query_store_batch(ingested["key"], q_embs, k=RAG_TOP_K,
+                                           with_text=True, excerpt_chars=0)
 
-        #  Chunk
-        chunk_size = 3000
-        chunks = [full_text[i:i+chunk_size] for i in range(0, len(full_text), chunk_size)]
+        results = []
+        for i, (query, top_chunks) in enumerate(zip(queries, all_top_chunks)):
+            results.append(_answer_rag_query(f"{task_id}-{i}", session_id, query, top_chunks))
 
-        #  Embeddings
-        embeddings = embeddings_for_document_bytes(file_bytes, chunks)
+        return {
+            "status": "success",
+            "task_id": task_id,
+            "session_id": session_id,
+            "mode": "RAG",
+            "results": results,
+            "store_reused": ingested["reused"],
+            "document": ingested["key"],
+            "server_time_ms": round((time.time() - start) * 1000, 2)
+        }
 
-        #  Build vector store
-        key = hashlib.sha256(file_bytes).hexdigest()
-        build_store(key, chunks, embeddings)
+    except Exception as e:
+        err = _rag_error(task_id, str(e))
+        err["results"] = []
+        return err
 
-        #  Query vector store
+ 
+# CORPUS – RAG across many uploaded documents
+ 
+def _corpus_retriever(query: str, owner: Optional[str], documents: Optional[List[str]]):
+    """Retrieval stage searching the whole corpus (or owner's / listed documents)."""
+    def retrieve() -> List[Dict[str, Any]]:
         from saras_engine.src.services.gemini_client import embed_texts
         q_emb = embed_texts([query])[0]
-        top_chunks = query_store(key, q_emb, k=3)
+        hits = get_corpus().search([q_emb], k=RAG_TOP_K, documents=documents,
+                                   owner=owner, with_text=True)[0]
+        if not hits:
+            raise _IngestError("corpus_empty")
+        return hits
 
-        # Hand retrieved context to ManagerAgent
-        retrieved_context = "\n".join([c["text_excerpt"] for c in top_chunks])
-        mgr = ManagerAgent(api_key=SARAS_API_KEY)
+    return retrieve
 
-        engine_out = mgr.handle_request(
-            task=f"RAG Query: {query}",
-            rag_context=retrieved_context
-        )
 
-        # Prepare internal
-        internal = {
-            "status": "success",
-            "task_id": task_id,
-            "mode": "RAG",
-            "final_answer": engine_out["writer_agent_output"].get("text", ""),
-            "sources": top_chunks
-        }
+def run_rag_corpus(query: str, session_id: Optional[str] = None,
+                   documents: Optional[List[str]] = None, scope: str = "session") -> Dict[str, Any]:
+    """
+    RAG over previously uploaded documents, no upload needed.
+    scope="session": documents uploaded in this session; "all": every
+    document in the corpus (only with CORPUS_ALLOW_SCOPE_ALL). documents
+    narrows either scope to those hashes. Sources carry their "document"
+    hash (resolve text with get_citation).
+    """
+    task_id = _make_task_id("rag")
+    if scope not in corpus_scopes():
+        return _ingest_error(task_id, "corpus_scope_forbidden")
+    session_id = session_id or new_session_id()
+    start = time.time()
+    owner = session_id if scope == "session" else None
 
-        # CLEAN RESPONSE
-        final = _clean_response(internal)
+    try:
+        retriever = _corpus_retriever(query, owner, documents)
+        final = _answer_rag_query(task_id, session_id, query, retriever=retriever)
+        final["session_id"] = session_id
+        final["documents"] = sorted({s["document"] for s in final["sources"]})
         final["server_time_ms"] = round((time.time() - start) * 1000, 2)
-
         return final
 
+    except _IngestError as e:
+        return _ingest_error(task_id, e.args[0])
     except Exception as e:
-        return {
-            "status": "error",
-            "task_id": task_id,
-            "mode": "RAG",
-            "answer": "",
-            "summary": "",
-            "sections": [],
-            "sources": [],
-            "citations": [],
-            "error": str(e)
-        }
+        return _rag_error(task_id, str(e))
+
+
+def corpus_scopes() -> tuple:
+    """Corpus query scopes clients may use."""
+    return ("session", "all") if CORPUS_ALLOW_SCOPE_ALL else ("session",)
+
+
+def list_corpus(session_id: str) -> Dict[str, Any]:
+    """This session's documents in the corpus."""
+    corpus = get_corpus()
+    return {"documents": corpus.documents(owner=session_id), "stats": corpus.stats()}
+
+
+def remove_from_corpus(document: str, session_id: str) -> bool:
+    """Drop a session's document; its rows are removed once no session uses it."""
+    return get_corpus().remove_document(document, owner=session_id)
+
+
+ 
+# CITATIONS
+ 
+def get_citation(document: str, chunk_id: str, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a source lazily: full text and position of one chunk of an
+    ingested document (None when unknown, or not uploaded in session_id).
+    document is the store key returned with RAG results.
+    """
+    if not get_corpus().is_owner(document, session_id):
+        return None
+    return get_chunk(document, chunk_id)
+
+
+ 
+# SESSION MEMORY
+ 
+def get_session_memory(session_id: str) -> List[Dict[str, Any]]:
+    """Messages of one session, oldest first (empty when unknown or expired)."""
+    return get_runtime(SARAS_API_KEY).session(session_id).get_history()
@@ -40,11 +40,12 @@ function renderMarkdown(text) {
         return `❌ **Error:** ${data.error || data.metadata?.error}`;
     }
 
-    let answer = data.final_answer || "";
+    let answer = data.answer || data.final_answer || "";
     let summary = data.summary || data.writer_agent_output?.summary || "";
     let sections = data.sections || data.writer_agent_output?.sections || [];
     let citations = data.citations || data.writer_agent_output?.citations || [];
     let sources = data.sources || [];
+    const byChunk = Object.fromEntries(sources.map(s => [s.chunk_id, s]));
 
     let md = "";
 
@@ -70,15 +71,29 @@ function renderMarkdown(text) {
     if (citations.length) {
         md += `## 🔗 Citations\n`;
         citations.forEach(c => {
-            md += `- **${c.chunk_id}** — ${c.excerpt}\n`;
+            const pages = byChunk[c.chunk_id] ? ` (${pageLabel(byChunk[c.chunk_id])})` : "";
+            md += `- **${c.chunk_id}**${pages} — ${c.excerpt}\n`;
         });
     }
 
-    // Sources
+    // Sources: ids + pages only; the text is fetched when a source is opened
     if (sources.length) {
-        md += `## 📄 Sources\n`;
+        md += `## 📄 Sources\n\n`;
         sources.forEach(s => {
-            md += `- ${s.text_excerpt}\n`;
+            // Non-RAG: web search results {title, snippet, url}
+            if (s.url) {
+                md += `- [${s.title || s.url}](${s.url})${s.snippet ? ` — ${s.snippet}` : ""}\n`;
+                return;
+            }
+            const score = typeof s.score === "number" ? `score ${s.score.toFixed(2)}` : "";
+            const label = [s.chunk_id, pageLabel(s), score].filter(Boolean).join(" · ");
+            const documentId = s.document || data.document;
+            if (documentId) {
+                md += `<details class="source" data-document="${documentId}" data-chunk="${s.chunk_id}">` +
+                      `<summary>${label}</summary><div class="source-text">Loading…</div></details>\n`;
+            } else {
+                md += `- ${s.text_excerpt || label}\n`;
+            }
         });
     }
 
@@ -86,6 +101,82 @@ function renderMarkdown(text) {
 }
 
 
+ // SOURCES / CITATIONS
+function pageLabel(source) {
+    if (!source.page_start) return "";
+    return source.page_end && source.page_end !== source.page_start
+        ? `p. ${source.page_start}–${source.page_end}`
+        : `p. ${source.page_start}`;
+}
+
+const citationCache = {};
+
+async function loadCitation(el) {
+    const key = `${el.dataset.document}/${el.dataset.chunk}`;
+    const target = el.querySelector(".source-text");
+    try {
+        if (!citationCache[key]) {
+            const params = new URLSearchParams({
+                document: el.dataset.document, chunk_id: el.dataset.chunk, session_id: sessionId
+            });
+            const response = await fetch(`http://127.0.0.1:8000/api/rag/citation/?${params}`);
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.message || "Citation not found.");
+            citationCache[key] = data.citation.text;
+        }
+        target.textContent = citationCache[key];
+    } catch (err) {
+        target.textContent = `❌ ${err.message}`;
+    }
+}
+
+// toggle does not bubble: listen in the capture phase
+resultText.addEventListener("toggle", e => {
+    if (e.target.matches("details.source") && e.target.open) loadCitation(e.target);
+}, true);
+
+
+ // SSE READER
+// POST + streamed body (EventSource only supports GET), parsed frame by frame.
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let sep;
+        while ((sep = buffer.indexOf("\n\n")) !== -1) {
+            const frame = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+
+            let event = "message";
+            let data = "";
+            frame.split("\n").forEach(line => {
+                if (line.startsWith("event:")) event = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
+
+ // SESSION: the server issues a session id on the first answer; sending it
+ // back keeps this tab's conversation in the same server-side session.
+ let sessionId = sessionStorage.getItem("saras_session_id") || "";
+
+ function rememberSession(data) {
+    if (data && data.session_id && data.session_id !== sessionId) {
+        sessionId = data.session_id;
+        sessionStorage.setItem("saras_session_id", sessionId);
+    }
+ }
+
+
  // SUBMIT HANDLER
  submitBtn.onclick = async () => {
     const query = queryInput.value.trim();
@@ -101,10 +192,10 @@ function renderMarkdown(text) {
         let response;
 
         if (mode === "non-rag") {
-            response = await fetch("http://127.0.0.1:8000/api/non-rag/run/", {
+            response = await fetch("http://127.0.0.1:8000/api/non-rag/stream/", {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ query })
+                body: JSON.stringify({ query, session_id: sessionId || undefined })
             });
 
         } else {
@@ -118,18 +209,65 @@ function renderMarkdown(text) {
             const form = new FormData();
             form.append("file", file);
             form.append("query", query);
+            if (sessionId) form.append("session_id", sessionId);
 
-            response = await fetch("http://127.0.0.1:8000/api/rag/run/", {
+            response = await fetch("http://127.0.0.1:8000/api/rag/stream/", {
                 method: "POST",
                 body: form
             });
         }
 
-        const data = await response.json();
-        const md = formatResponse(data);
+        // Validation errors come back as plain JSON, not a stream
+        if (!response.ok) {
+            const data = await response.json();
+            resultText.innerHTML = renderMarkdown(`❌ **Error:** ${data.message || data.error}`);
+            resultBox.classList.remove("hidden");
+            return;
+        }
 
-        resultText.innerHTML = renderMarkdown(md);
-        resultBox.classList.remove("hidden");
+        // Render tokens as they arrive; once the incremental parser on the
+        // server emits structured fields, show summary/sections progressively.
+        let streamed = "";
+        const partial = { status: "success", summary: "", answer: "", sections: [], citations: [], sources: [] };
+        let structured = false;
+        resultText.textContent = "";
+
+        const show = () => {
+            resultBox.classList.remove("hidden");
+            loader.classList.add("hidden");
+        };
+
+        await readEventStream(response, (event, data) => {
+            if (event === "delta") {
+                streamed += data.text;
+                if (!structured) resultText.textContent = streamed;
+                show();
+                return;
+            }
+
+            if (event === "start") rememberSession(data);
+            else if (event === "sources") {
+                partial.sources = data.sources;
+                partial.document = data.document;
+            }
+            else if (event === "summary") partial.summary = data.text;
+            else if (event === "final_text") partial.answer = data.text;
+            else if (event === "section") partial.sections.push(data.section);
+            else if (event === "citation") partial.citations.push(data.citation);
+            else if (event === "done" || event === "error") {
+                resultText.innerHTML = renderMarkdown(formatResponse(data));
+                show();
+                return;
+            } else {
+                return;
+            }
+
+            if (event !== "sources") {
+                structured = true;
+                resultText.innerHTML = renderMarkdown(formatResponse(partial));
+                show();
+            }
+        });
 
     } catch (err) {
         resultText.innerHTML = `❌ Error: ${err.message}`;
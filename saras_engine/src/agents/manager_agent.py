@@ -1,55 +1,177 @@
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import os
 import time
 
 from saras_engine.src.memory.session_store import SessionStore
 from saras_engine.src.memory.long_term_memory import LongTermMemory
+from saras_engine.src.agents.researcher_agent import ResearcherAgent
+from saras_engine.src.agents.writer_agent import WriterAgent
+
+# Past facts injected into the writer context
+MEMORY_TOP_K = int(os.getenv("MEMORY_TOP_K", "3"))
+MEMORY_MIN_SCORE = float(os.getenv("MEMORY_MIN_SCORE", "0.75"))
+
+# Research, memory recall and retrieval run concurrently on this shared pool
+MANAGER_STAGE_WORKERS = int(os.getenv("MANAGER_STAGE_WORKERS", "16"))
+_STAGE_POOL = ThreadPoolExecutor(max_workers=MANAGER_STAGE_WORKERS, thread_name_prefix="saras-stage")
+
+# retriever() -> retrieved chunks [{"chunk_id", "score", "text", ...}]
+Retriever = Callable[[], List[Dict[str, Any]]]
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    value = fn()
+    return value, round((time.perf_counter() - t0) * 1000, 2)
 
 
 class ManagerAgent:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str,
+                 session: Optional[SessionStore] = None,
+                 long_memory: Optional[LongTermMemory] = None,
+                 researcher: Optional[ResearcherAgent] = None,
+                 writer: Optional[WriterAgent] = None):
+        """
+        Dependencies default to fresh instances; agents/runtime.py passes
+        shared ones so per-request construction is free.
+        """
         self.api_key = api_key
 
         # minimal required memory
-        self.session = SessionStore(max_messages=8)
-        self.long_memory = LongTermMemory()
+        self.session = session if session is not None else SessionStore(max_messages=8)
+        self.long_memory = long_memory if long_memory is not None else LongTermMemory()
 
-    def handle_request(self, task: str, rag_context: Optional[str] = None) -> Dict[str, Any]:
-        start = time.time()
+        self.researcher = researcher if researcher is not None else ResearcherAgent(api_key=api_key)
+        self.writer = writer if writer is not None else WriterAgent(api_key=api_key)
+
+    def _recall(self, task: str) -> List[Dict[str, Any]]:
+        """Top-k relevant past facts (semantic search over long-term memory)."""
+        return self.long_memory.search_facts(task, k=MEMORY_TOP_K, min_score=MEMORY_MIN_SCORE)
 
-        # store last message
+    def _writer_context(self, research_result: Dict[str, Any], rag_context: Optional[str],
+                        memory_facts: Optional[List[Dict[str, Any]]] = None,
+                        rag_chunks: Optional[List[Dict[str, Any]]] = None,
+                        history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        return {
+            "research_summary": research_result.get("summary", ""),
+            "keywords": research_result.get("keywords", []),
+            "final_answer_context": rag_context or "",
+            "retrieved_chunks": rag_chunks or [],
+            "memory_facts": memory_facts or [],
+            "history": history or []
+        }
+
+    def _result(self, task: str, mode: str, research_result: Dict[str, Any],
+                writer_output: Dict[str, Any], start: float,
+                gathered: Optional[Dict[str, Any]] = None,
+                writer_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        elapsed = round(time.time() - start, 3)
+        gathered = gathered or {}
+        writer_context = writer_context or {}
+
+        return {
+            "status": "success",
+            "task": task,
+            "mode": mode,
+            "research_agent_output": research_result,
+            "writer_agent_output": writer_output,
+            "retrieved_chunks": gathered.get("chunks", []),
+            # the answer depends on this session (history) or on stored facts
+            "context_used": bool(writer_context.get("history") or writer_context.get("memory_facts")),
+            "stage_timings": dict(gathered.get("timings", {}), total_ms=round(elapsed * 1000, 2)),
+            "time_taken": elapsed
+        }
+
+    def _stages(self, task: str, retriever: Optional[Retriever]) -> Dict[str, Callable[[], Any]]:
+        """Independent pre-writing stages; they only meet in the writer context."""
+        stages: Dict[str, Callable[[], Any]] = {
+            "research": lambda: self.researcher.run_research(task),
+            "memory": lambda: self._recall(task),
+        }
+        if retriever is not None:
+            stages["retrieval"] = retriever
+        return stages
+
+    def _gather(self, task: str, retriever: Optional[Retriever]) -> Dict[str, Any]:
+        """
+        Run research, memory lookup and (RAG) retrieval concurrently on the
+        shared stage pool and join them. Returns each stage's output plus
+        per-stage wall time in ms. A failing stage raises here.
+        """
+        futures = {name: _STAGE_POOL.submit(_timed, fn)
+                   for name, fn in self._stages(task, retriever).items()}
+
+        gathered: Dict[str, Any] = {"timings": {}}
+        for name, fut in futures.items():
+            value, ms = fut.result()
+            gathered[name] = value
+            gathered["timings"][f"{name}_ms"] = ms
+        return gathered
+
+    async def _agather(self, task: str, retriever: Optional[Retriever]) -> Dict[str, Any]:
+        """Async _gather: blocking stages run in worker threads, coroutine ones on the loop."""
+        async def timed(name: str, fn: Callable[[], Any]):
+            t0 = time.perf_counter()
+            if asyncio.iscoroutinefunction(fn):
+                value = await fn()
+            else:
+                value = await asyncio.to_thread(fn)
+            return name, value, round((time.perf_counter() - t0) * 1000, 2)
+
+        gathered: Dict[str, Any] = {"timings": {}}
+        done = await asyncio.gather(*(timed(n, fn) for n, fn in self._stages(task, retriever).items()))
+        for name, value, ms in done:
+            gathered[name] = value
+            gathered["timings"][f"{name}_ms"] = ms
+        return gathered
+
+    def _begin(self, task: str, rag_context: Optional[str], rag_chunks, retriever):
+        """Read history (earlier turns only), record the task, pick the mode."""
+        history = self.session.get_history()
         self.session.add_message("user", task)
+        mode = "RAG" if rag_context or rag_chunks or retriever else "Non-RAG"
+        return history, mode
 
-        # define mode
-        mode = "RAG" if rag_context else "Non-RAG"
+    def handle_request(self, task: str, rag_context: Optional[str] = None,
+                       rag_chunks: Optional[List[Dict[str, Any]]] = None,
+                       retriever: Optional[Retriever] = None) -> Dict[str, Any]:
+        """
+        rag_chunks: retrieved chunks with full "text" and "score"; the writer
+        packs them into its token budget. rag_context (plain text) still works.
+        retriever: callable returning such chunks; it runs concurrently with
+        research and memory lookup instead of before the manager starts.
+        """
+        start = time.time()
+
+        # store last message (history = earlier turns only) and define mode
+        history, mode = self._begin(task, rag_context, rag_chunks, retriever)
 
          
-        # ResearchAgent
+        # ResearchAgent + memory recall + retrieval (concurrent)
          
-        from saras_engine.src.agents.researcher_agent import ResearcherAgent
-        researcher = ResearcherAgent(api_key=self.api_key)
-
-        research_result = researcher.run_research(task)
+        gathered = self._gather(task, retriever)
+        research_result = gathered["research"]
+        rag_chunks = gathered.get("retrieval", rag_chunks)
+        gathered["chunks"] = rag_chunks or []
 
          
         # Prepare writer context
          
-        writer_context = {
-            "research_summary": research_result.get("summary", ""),
-            "keywords": research_result.get("keywords", []),
-            "final_answer_context": rag_context or ""
-        }
+        writer_context = self._writer_context(research_result, rag_context, gathered["memory"],
+                                              rag_chunks, history)
 
          
         # WriterAgent
          
-        from saras_engine.src.agents.writer_agent import WriterAgent
-        writer = WriterAgent(api_key=self.api_key)
-
-        writer_output = writer.write_article(
+        t0 = time.perf_counter()
+        writer_output = self.writer.write_article(
             task_prompt=task,
             context=writer_context,
             mode=mode
         )
+        gathered["timings"]["write_ms"] = round((time.perf_counter() - t0) * 1000, 2)
 
          
         # Store a simple fact
@@ -59,13 +181,72 @@ class ManagerAgent:
          
         # final structure (internal)
          
-        elapsed = round(time.time() - start, 3)
+        return self._result(task, mode, research_result, writer_output, start, gathered, writer_context)
 
-        return {
-            "status": "success",
-            "task": task,
-            "mode": mode,
-            "research_agent_output": research_result,
-            "writer_agent_output": writer_output,
-            "time_taken": elapsed
-        }
+    async def ahandle_request(self, task: str, rag_context: Optional[str] = None,
+                              rag_chunks: Optional[List[Dict[str, Any]]] = None,
+                              retriever: Optional[Retriever] = None) -> Dict[str, Any]:
+        """
+        Async handle_request: same steps and output, but the LLM call is awaited
+        and blocking tools/file writes run in worker threads. retriever may be
+        a coroutine function.
+        """
+        start = time.time()
+
+        history, mode = await asyncio.to_thread(self._begin, task, rag_context, rag_chunks, retriever)
+
+        gathered = await self._agather(task, retriever)
+        research_result = gathered["research"]
+        rag_chunks = gathered.get("retrieval", rag_chunks)
+        gathered["chunks"] = rag_chunks or []
+
+        writer_context = self._writer_context(research_result, rag_context, gathered["memory"],
+                                              rag_chunks, history)
+
+        t0 = time.perf_counter()
+        writer_output = await self.writer.awrite_article(
+            task_prompt=task,
+            context=writer_context,
+            mode=mode
+        )
+        gathered["timings"]["write_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+        await asyncio.to_thread(self.long_memory.store_fact, task, f"Solved: {task}")
+
+        return self._result(task, mode, research_result, writer_output, start, gathered, writer_context)
+
+    def stream_request(self, task: str, rag_context: Optional[str] = None,
+                       rag_chunks: Optional[List[Dict[str, Any]]] = None,
+                       retriever: Optional[Retriever] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming handle_request. Yields {"event": "retrieved", "chunks"} once
+        a retriever finishes, the writer's events, then
+        {"event": "done", "result": <handle_request() output>}.
+        """
+        start = time.time()
+
+        history, mode = self._begin(task, rag_context, rag_chunks, retriever)
+
+        gathered = self._gather(task, retriever)
+        research_result = gathered["research"]
+        rag_chunks = gathered.get("retrieval", rag_chunks)
+        gathered["chunks"] = rag_chunks or []
+        if retriever is not None:
+            yield {"event": "retrieved", "chunks": gathered["chunks"]}
+
+        writer_context = self._writer_context(research_result, rag_context, gathered["memory"],
+                                              rag_chunks, history)
+
+        t0 = time.perf_counter()
+        writer_output: Dict[str, Any] = {}
+        for event in self.writer.stream_article(task_prompt=task, context=writer_context, mode=mode):
+            if event["event"] == "done":
+                writer_output = event["result"]
+            else:
+                yield event
+        gathered["timings"]["write_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+        self.long_memory.store_fact(task, f"Solved: {task}")
+
+        yield {"event": "done", "result": self._result(task, mode, research_result, writer_output,
+                                                       start, gathered, writer_context)}
@@ -1,16 +1,38 @@
-from typing import Dict, Any
+import asyncio
+import os
+import re
+from typing import Dict, Any, List
 
-from saras_engine.src.tools.google_search import search as google_search
+from saras_engine.src.tools.google_search import search_many
 from saras_engine.src.tools.extract_keywords import extract_keywords
 
+RESEARCH_MAX_SUBQUERIES = int(os.getenv("RESEARCH_MAX_SUBQUERIES", "3"))
+RESEARCH_RESULTS_PER_QUERY = int(os.getenv("RESEARCH_RESULTS_PER_QUERY", "5"))
+
+_COMPARE_RE = re.compile(r"\s+(?:vs\.?|versus|compared to)\s+", re.IGNORECASE)
+
 
 class ResearcherAgent:
     def __init__(self, api_key: str = ""):
         self.api_key = api_key
 
+    def _sub_queries(self, query: str) -> List[str]:
+        """
+        The query itself, each side of a comparison ("A vs B") and a
+        keyword-only form of long queries; searched in parallel.
+        """
+        subs = [query]
+        sides = _COMPARE_RE.split(query)
+        if len(sides) > 1:
+            subs.extend(s.strip() for s in sides if s.strip())
+        keywords = extract_keywords(query, top_k=6)
+        if len(query.split()) > 8 and keywords:
+            subs.append(" ".join(keywords))
+        return list(dict.fromkeys(subs))[:RESEARCH_MAX_SUBQUERIES]
+
     def run_research(self, query: str) -> Dict[str, Any]:
-        # mock search results
-        results = google_search(query=query)
+        # fan out sub-queries in parallel (provider: tools/google_search.py)
+        results = search_many(self._sub_queries(query), num=RESEARCH_RESULTS_PER_QUERY)
 
         # keyword extraction
         summary_text = results.get("top_snippet", "")
@@ -19,5 +41,11 @@ class ResearcherAgent:
         return {
             "summary": summary_text,
             "keywords": keywords,
-            "results": results.get("results", [])
+            "results": results.get("results", []),
+            "queries": results.get("queries", []),
+            "errors": results.get("errors", [])
         }
+
+    async def arun_research(self, query: str) -> Dict[str, Any]:
+        # search tools are blocking; keep them off the event loop
+        return await asyncio.to_thread(self.run_research, query)
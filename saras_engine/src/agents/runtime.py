@@ -0,0 +1,66 @@
+import os
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+from saras_engine.src.agents.manager_agent import ManagerAgent
+from saras_engine.src.agents.researcher_agent import ResearcherAgent
+from saras_engine.src.agents.writer_agent import WriterAgent
+from saras_engine.src.memory.long_term_memory import LongTermMemory
+from saras_engine.src.memory.session_store import SessionStore, get_session_backend
+
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "8"))
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+class AgentRuntime:
+    """
+    Process-level agent runtime.
+
+    Important:
+    - Researcher/Writer agents and LongTermMemory are built once and shared
+      (they hold no per-request state; memory backends are thread-safe).
+    - manager() is cheap: it only wires the shared parts to a session.
+    - Session messages live in the shared session backend (see
+      memory/session_store.py), so any worker can serve any session.
+    """
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.long_memory = LongTermMemory()
+        self.researcher = ResearcherAgent(api_key=api_key)
+        self.writer = WriterAgent(api_key=api_key)
+        self.session_backend = get_session_backend()
+
+    def session(self, session_id: Optional[str]) -> SessionStore:
+        """SessionStore handle for session_id; None -> throwaway local store."""
+        return SessionStore(max_messages=SESSION_MAX_MESSAGES, session_id=session_id,
+                            backend=self.session_backend)
+
+    def manager(self, session_id: Optional[str] = None) -> ManagerAgent:
+        return ManagerAgent(
+            api_key=self.api_key,
+            session=self.session(session_id),
+            long_memory=self.long_memory,
+            researcher=self.researcher,
+            writer=self.writer,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": self.session_backend.stats(), "long_term_memory": self.long_memory.stats()}
+
+
+_runtime: Optional[AgentRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime(api_key: str) -> AgentRuntime:
+    """Process-wide runtime (rebuilt only if the API key changes)."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None or _runtime.api_key != api_key:
+            _runtime = AgentRuntime(api_key)
+        return _runtime
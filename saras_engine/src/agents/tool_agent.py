@@ -1,7 +1,8 @@
 import os
-import requests
 from typing import Any, Dict, Callable, Optional
 
+from saras_engine.src.services import http_client
+
 # Important operation: choose mode (MCP vs local) via environment variable for dev/prod flexibility
 USE_MCP = os.getenv("USE_MCP", "false").lower() in ("1", "true", "yes")
 MCP_BASE = os.getenv("MCP_BASE", "http://127.0.0.1:9000")  # change if your MCP server runs elsewhere
@@ -25,7 +26,7 @@ def call_mcp(tool_name: str, payload: Dict[str, Any], timeout: int = DEFAULT_TIM
     """Important operation: call remote MCP endpoint and return JSON or structured error."""
     url = f"{MCP_BASE.rstrip('/')}/tools/{tool_name}"
     try:
-        resp = requests.post(url, json=payload, timeout=timeout)
+        resp = http_client.post(url, json=payload, timeout=timeout)
         resp.raise_for_status()
         # Try to parse JSON safely
         try:
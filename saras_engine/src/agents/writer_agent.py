@@ -1,9 +1,15 @@
-from typing import Dict, Any
-import json
+from typing import Dict, Any, Iterator, Optional
+
+from saras_engine.src.tools.context_builder import build_context
+from saras_engine.src.tools.json_stream import IncrementalJSONParser, repair_json
 
 from saras_engine.src.services.gemini_client import (
     generate_text_flash,
     generate_text_pro,
+    agenerate_text_flash,
+    agenerate_text_pro,
+    stream_text_flash,
+    stream_text_pro,
     local_stub_summary
 )
 
@@ -12,7 +18,8 @@ class WriterAgent:
     def __init__(self, api_key: str = ""):
         self.api_key = api_key
 
-    def _build_prompt(self, task_prompt: str, retrieved_context: str, guidelines: str) -> str:
+    def _build_prompt(self, task_prompt: str, retrieved_context: str, guidelines: str,
+                      memory_context: str = "", history_context: str = "") -> str:
         return f"""
 You are S.A.R.A.S WriterAgent. Respond ONLY in valid JSON.
 JSON format:
@@ -29,31 +36,45 @@ Task:
 Retrieved Context:
 \"\"\"{retrieved_context}\"\"\"
 
+Relevant Memory (facts from earlier tasks, use only if helpful):
+\"\"\"{memory_context}\"\"\"
+
+Conversation So Far:
+\"\"\"{history_context}\"\"\"
+
 Guidelines:
 {guidelines}
 
 STRICT: Return ONLY JSON.
 """
 
-    def write_article(self, task_prompt: str, context: Dict[str, Any], mode: str) -> Dict[str, Any]:
-        retrieved_context = context.get("final_answer_context", "")
-
+    def _guidelines(self, mode: str) -> str:
         if mode == "RAG":
-            model_fn = generate_text_pro
-            guidelines = (
+            return (
                 "Use retrieved context for evidence. "
                 "Cite chunk_id when possible."
             )
-        else:
-            model_fn = generate_text_flash
-            guidelines = "Answer shortly & clearly."
-
-        prompt = self._build_prompt(task_prompt, retrieved_context, guidelines)
-
-        # call model
-        res = model_fn(prompt)
-
-        # fallback
+        return "Answer shortly & clearly."
+
+    def _prepare(self, task_prompt: str, context: Dict[str, Any], mode: str):
+        """Build the prompt with chunks, memory and history packed into the token budget."""
+        chunks = context.get("retrieved_chunks") or []
+        if not chunks and context.get("final_answer_context"):
+            chunks = [{"text": context["final_answer_context"]}]
+
+        packed = build_context(chunks, context.get("history"), context.get("memory_facts"))
+        prompt = self._build_prompt(task_prompt, packed["retrieved"], self._guidelines(mode),
+                                    packed["memory"], packed["history"])
+        return prompt, packed["tokens"]
+
+    def _finish(self, res: Dict[str, Any], prompt: str, mode: str,
+                context_tokens: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        out = self._parse(res, prompt, mode)
+        out["context_tokens"] = context_tokens or {}
+        return out
+
+    def _parse(self, res: Dict[str, Any], prompt: str, mode: str) -> Dict[str, Any]:
+        # fallback (flagged so callers never cache or reuse it as an answer)
         if res.get("error") or not res.get("output_text"):
             fb = local_stub_summary(prompt, role="pro" if mode == "RAG" else "flash")
             return {
@@ -61,14 +82,15 @@ STRICT: Return ONLY JSON.
                 "summary": fb["output_text"],
                 "sections": [],
                 "citations": [],
+                "degraded": True,
+                "error": fb["error"],
             }
 
         raw_text = res["output_text"].strip()
 
-        # parse JSON
-        try:
-            parsed = json.loads(raw_text)
-        except Exception:
+        # parse JSON (tolerates code fences and output truncated at maxOutputTokens)
+        parsed = repair_json(raw_text)
+        if not isinstance(parsed, dict):
             parsed = {
                 "summary": raw_text[:200],
                 "final_text": raw_text,
@@ -82,3 +104,48 @@ STRICT: Return ONLY JSON.
             "sections": parsed.get("sections", []),
             "citations": parsed.get("citations", [])
         }
+
+    def write_article(self, task_prompt: str, context: Dict[str, Any], mode: str) -> Dict[str, Any]:
+        prompt, context_tokens = self._prepare(task_prompt, context, mode)
+
+        # call model
+        model_fn = generate_text_pro if mode == "RAG" else generate_text_flash
+        res = model_fn(prompt)
+
+        return self._finish(res, prompt, mode, context_tokens)
+
+    async def awrite_article(self, task_prompt: str, context: Dict[str, Any], mode: str) -> Dict[str, Any]:
+        """Async write_article; the model call does not block the event loop."""
+        prompt, context_tokens = self._prepare(task_prompt, context, mode)
+
+        model_fn = agenerate_text_pro if mode == "RAG" else agenerate_text_flash
+        res = await model_fn(prompt)
+
+        return self._finish(res, prompt, mode, context_tokens)
+
+    def stream_article(self, task_prompt: str, context: Dict[str, Any], mode: str) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming write_article. Yields:
+        - {"event": "delta", "text": "..."} for each chunk of model output
+        - {"event": "summary" | "final_text", "text": "..."} when that field completes
+        - {"event": "section", "index": i, "section": {...}} per completed section
+        - {"event": "citation", "index": i, "citation": {...}} per completed citation
+        - {"event": "done", "result": {...}} once, same shape as write_article()
+        """
+        prompt, context_tokens = self._prepare(task_prompt, context, mode)
+        stream_fn = stream_text_pro if mode == "RAG" else stream_text_flash
+        parser = IncrementalJSONParser()
+
+        parts = []
+        error = None
+        try:
+            for delta in stream_fn(prompt):
+                parts.append(delta)
+                yield {"event": "delta", "text": delta}
+                yield from parser.feed(delta)
+        except Exception as e:
+            error = str(e)
+
+        # a broken stream still keeps whatever text already arrived
+        res = {"error": error if not parts else None, "output_text": "".join(parts)}
+        yield {"event": "done", "result": self._finish(res, prompt, mode, context_tokens)}
@@ -1,35 +1,294 @@
+import hashlib
 import json
 import os
-from typing import Dict, Any
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from saras_engine.src.tools.vector_store import (
+    VECTOR_INDEX_MIN_ROWS, append_store, attach_store_index, indexed_count,
+    search_store, store_count, train_store_index
+)
+
+# Semantic fact retrieval (facts are indexed by the embedding of their topic)
+LONG_TERM_MEMORY_SEMANTIC = os.getenv("LONG_TERM_MEMORY_SEMANTIC", "true").lower() in ("1", "true", "yes")
+INDEX_BATCH = 256  # facts embedded/indexed per search call
+# From VECTOR_INDEX_MIN_ROWS facts the vector store gets an ANN index; it is
+# retrained in the background once the facts added since exceed this
+# fraction of the indexed ones (until then they are searched exactly)
+MEMORY_REINDEX_RATIO = float(os.getenv("MEMORY_REINDEX_RATIO", "0.1"))
 
 
 class LongTermMemory:
-    def __init__(self, file_path: str = "memory_store.json"):
+    """
+    Topic -> facts store backed by SQLite (WAL mode).
+
+    Important:
+    - store_fact is a single-row INSERT, so cost does not grow with history.
+    - get_facts uses the topic index instead of loading the whole store.
+    - WAL + busy timeout make it safe for several worker processes.
+    - An existing JSON store (the old format) is imported once on first open.
+    - search_facts() finds relevant facts by embedding similarity. New facts
+      are indexed lazily into a vector store (facts.vec_row = row index), so
+      store_fact never waits on the embedding API.
+    - Appends extend the in-process copy of the vector store instead of
+      invalidating it, and large stores are searched through an IVF index
+      trained off the request path.
+    """
+
+    def __init__(self, file_path: str = "memory_store.json", db_path: Optional[str] = None,
+                 embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 semantic: bool = LONG_TERM_MEMORY_SEMANTIC):
         self.file_path = file_path
-        self.memory = self._load()
+        self.db_path = db_path or os.getenv("LONG_TERM_MEMORY_DB") or str(Path(file_path).with_suffix(".sqlite3"))
+        self.semantic = semantic
+        self._embed_fn = embed_fn
+        self._lock = threading.Lock()
+        self._reindexing = False
+
+        # one vector store per database file
+        digest = hashlib.sha256(os.path.abspath(self.db_path).encode("utf-8")).hexdigest()[:16]
+        self.index_key = f"memory-{digest}"
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS facts ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL,"
+            " fact TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(facts)")}
+        if "vec_row" not in columns:
+            self._conn.execute("ALTER TABLE facts ADD COLUMN vec_row INTEGER")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_topic ON facts(topic)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_vec_row ON facts(vec_row)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        self._migrate_json()
+
+    def _migrate_json(self):
+        """Import the legacy JSON file once; the file itself is left untouched."""
+        if not os.path.exists(self.file_path):
+            return
+
+        source = os.path.abspath(self.file_path)
+        with self._lock:
+            # IMMEDIATE takes the write lock, so concurrent workers import only once
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                done = self._conn.execute(
+                    "SELECT 1 FROM meta WHERE key = ?", (f"migrated:{source}",)
+                ).fetchone()
+                if done is None:
+                    rows = self._legacy_rows()
+                    self._conn.executemany(
+                        "INSERT INTO facts (topic, fact, created) VALUES (?, ?, ?)", rows
+                    )
+                    self._conn.execute(
+                        "INSERT INTO meta (key, value) VALUES (?, ?)",
+                        (f"migrated:{source}", str(len(rows))),
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
 
-    def _load(self) -> Dict[str, Any]:
-        if os.path.exists(self.file_path):
+    def _legacy_rows(self) -> List[tuple]:
+        try:
             with open(self.file_path, "r") as f:
-                return json.load(f)
-        return {}
+                memory = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if not isinstance(memory, dict):
+            return []
+
+        now = time.time()
+        return [
+            (str(topic), str(fact), now)
+            for topic, facts in memory.items()
+            for fact in (facts if isinstance(facts, list) else [facts])
+        ]
 
     def save(self):
-        with open(self.file_path, "w") as f:
-            json.dump(self.memory, f, indent=2)
+        """
+        Kept for compatibility: every write is already committed.
+        """
+        with self._lock:
+            self._conn.commit()
 
     def store_fact(self, topic: str, fact: str):
         """
         Store a fact under a topic.
         """
-        if topic not in self.memory:
-            self.memory[topic] = []
-        self.memory[topic].append(fact)
-        self.save()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO facts (topic, fact, created) VALUES (?, ?, ?)",
+                (topic, fact, time.time()),
+            )
+            self._conn.commit()
 
-    def get_facts(self, topic: str):
+    def get_facts(self, topic: str) -> List[str]:
         """
         Fetch facts for a given topic.
         """
-        return self.memory.get(topic, [])
-    
\ No newline at end of file
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fact FROM facts WHERE topic = ? ORDER BY id", (topic,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    # semantic retrieval
+
+    def _embed(self, text_list: List[str]) -> List[List[float]]:
+        if self._embed_fn is None:
+            from saras_engine.src.tools.embeddings import embed_texts
+            self._embed_fn = embed_texts
+        return self._embed_fn(text_list)
+
+    def index_pending(self, limit: int = INDEX_BATCH) -> int:
+        """
+        Embed and index up to `limit` facts not yet in the vector store.
+        Returns how many were indexed.
+
+        Topics are usually already in the embedding cache (a fact's topic is
+        the task that was just searched for), so this rarely calls the API.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, topic FROM facts WHERE vec_row IS NULL ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        if not rows:
+            return 0
+
+        vectors = self._embed([topic for _, topic in rows])
+        ready = {fid: (topic, vec) for (fid, topic), vec in zip(rows, vectors) if any(vec)}
+        if not ready:
+            return 0  # embedding failed; retried on the next call
+
+        with self._lock:
+            # the SQLite write lock also serializes vector-store appends across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                count = store_count(self.index_key)
+                max_row = self._conn.execute("SELECT MAX(vec_row) FROM facts").fetchone()[0]
+                if max_row is not None and max_row >= count:
+                    # vector store was deleted or truncated: re-index everything
+                    self._conn.execute("UPDATE facts SET vec_row = NULL")
+
+                marks = ",".join("?" * len(ready))
+                pending = [r[0] for r in self._conn.execute(
+                    f"SELECT id FROM facts WHERE vec_row IS NULL AND id IN ({marks}) ORDER BY id",
+                    list(ready),
+                )]
+                if pending:
+                    total = append_store(self.index_key,
+                                         [ready[fid][0] for fid in pending],
+                                         [ready[fid][1] for fid in pending])
+                    first = total - len(pending)
+                    self._conn.executemany(
+                        "UPDATE facts SET vec_row = ? WHERE id = ?",
+                        [(first + i, fid) for i, fid in enumerate(pending)],
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        if pending:
+            self._maybe_reindex(total)
+        return len(pending)
+
+    def _maybe_reindex(self, count: int):
+        """Retrain the ANN index in a background thread when enough facts are unindexed."""
+        if count < VECTOR_INDEX_MIN_ROWS:
+            return
+        indexed = indexed_count(self.index_key)
+        if indexed and count - indexed <= indexed * MEMORY_REINDEX_RATIO:
+            return
+        with self._lock:
+            if self._reindexing:
+                return
+            self._reindexing = True
+        threading.Thread(target=self._reindex, name="saras-memory-index", daemon=True).start()
+
+    def _reindex(self):
+        try:
+            built = train_store_index(self.index_key, min_rows=VECTOR_INDEX_MIN_ROWS)
+            if built is None:
+                return
+            with self._lock:
+                # attaching rewrites the store's meta file: serialize with appends
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    attach_store_index(self.index_key, *built)
+                    self._conn.commit()
+                except Exception:
+                    self._conn.rollback()
+                    raise
+        except Exception:
+            pass  # searches stay exact; retried after the next append
+        finally:
+            self._reindexing = False
+
+    def search_facts(self, query: str, k: int = 3, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Top-k facts whose topic is most similar to query:
+        [{"topic", "fact", "score"}, ...]. Never raises; [] when unavailable.
+        """
+        if not self.semantic or k <= 0:
+            return []
+        try:
+            self.index_pending()
+            if store_count(self.index_key) == 0:
+                return []
+
+            query_vec = self._embed([query])[0]
+            if not any(query_vec):
+                return []
+
+            # oversample: repeated topics share a vector, results are de-duplicated
+            hits = search_store(self.index_key, [query_vec], k=k * 4)[0]
+            hits = [(row, score) for row, score in hits if score >= min_score]
+            if not hits:
+                return []
+
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT vec_row, topic, fact FROM facts WHERE vec_row IN ({','.join('?' * len(hits))})",
+                    [row for row, _ in hits],
+                ).fetchall()
+        except Exception:
+            return []
+
+        by_row = {r[0]: (r[1], r[2]) for r in rows}
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        for row, score in hits:
+            if row not in by_row or by_row[row] in seen:
+                continue  # orphaned row or duplicate fact
+            seen.add(by_row[row])
+            topic, fact = by_row[row]
+            results.append({"topic": topic, "fact": fact, "score": round(score, 4)})
+            if len(results) == k:
+                break
+        return results
+
+    def topics(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT topic FROM facts ORDER BY topic").fetchall()
+        return [r[0] for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            facts, topics = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT topic) FROM facts"
+            ).fetchone()
+        return {"facts": facts, "topics": topics, "db_path": self.db_path}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
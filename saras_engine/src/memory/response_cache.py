@@ -0,0 +1,191 @@
+import copy
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from saras_engine.src.observability.metrics import metrics
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))  # seconds; <= 0 disables expiry
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Semantic tier: reuse an answer when the query embeddings are this similar
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+
+_WS = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s?!.;:,]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive cache key."""
+    text = unicodedata.normalize("NFKC", query or "").lower()
+    text = _WS.sub(" ", text).strip()
+    return _TRAILING_PUNCT.sub("", text)
+
+
+class ResponseCache:
+    """
+    In-process cache of finished responses, keyed by normalized query.
+
+    Important:
+    - Entries expire after `ttl` seconds; least-recently-used entries are
+      evicted beyond `max_entries`.
+    - With `embed_fn` set, a miss on the exact key falls back to the closest
+      cached query by cosine similarity (>= `threshold`).
+    - Responses are deep-copied in and out, so callers may mutate them.
+    - The key is the query alone: only put answers that do not depend on a
+      session's history or memory (engine_runner checks "context_used").
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl: float = RESPONSE_CACHE_TTL,
+                 threshold: float = RESPONSE_CACHE_SIMILARITY,
+                 embed_fn: Optional[Callable[[str], List[float]]] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.threshold = threshold
+        self._embed_fn = embed_fn
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # stacked embeddings, rebuilt lazily
+        self._matrix_keys: List[str] = []
+        self._lock = threading.Lock()
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        if self._embed_fn is None:
+            return None
+        try:
+            vec = np.asarray(self._embed_fn(query), dtype=np.float32)
+        except Exception:
+            return None  # semantic tier is best-effort
+        norm = np.linalg.norm(vec)
+        if vec.ndim != 1 or norm == 0:
+            return None
+        return vec / norm
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl > 0 and now - entry["created"] > self.ttl
+
+    def _drop(self, key: str):
+        """Remove one entry (caller holds lock)."""
+        if self._entries.pop(key, None) is not None:
+            self._matrix = None
+
+    def _nearest(self, vec: np.ndarray, now: float):
+        """Closest live entry by cosine similarity (caller holds lock)."""
+        if self._matrix is None:
+            keys = [k for k, e in self._entries.items()
+                    if e["embedding"] is not None and e["embedding"].shape == vec.shape]
+            self._matrix_keys = keys
+            self._matrix = (np.vstack([self._entries[k]["embedding"] for k in keys])
+                            if keys else np.zeros((0, vec.shape[0]), dtype=np.float32))
+        if not self._matrix_keys or self._matrix.shape[1] != vec.shape[0]:
+            return None, 0.0
+
+        scores = self._matrix @ vec
+        for idx in np.argsort(-scores):
+            if scores[idx] < self.threshold:
+                break
+            key = self._matrix_keys[idx]
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry, now):
+                return key, float(scores[idx])
+        return None, 0.0
+
+    def get(self, query: str) -> Dict[str, Any]:
+        """
+        Look up a query. Returns
+        {"response": <dict> | None, "match": "exact"|"semantic"|"miss",
+         "similarity": float | None, "embedding": <query vector> | None}.
+        Pass the returned embedding to put() to avoid embedding twice.
+        """
+        key = normalize_query(query)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                metrics.inc("response_cache_hits")
+                return {"response": copy.deepcopy(entry["response"]), "match": "exact",
+                        "similarity": 1.0, "embedding": entry["embedding"]}
+
+        # embedding is an HTTP call: keep it outside the lock
+        vec = self._embed(query)
+        if vec is not None:
+            with self._lock:
+                match, score = self._nearest(vec, now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    metrics.inc("response_cache_hits")
+                    metrics.inc("response_cache_semantic_hits")
+                    return {"response": copy.deepcopy(self._entries[match]["response"]),
+                            "match": "semantic", "similarity": round(score, 4), "embedding": vec}
+
+        metrics.inc("response_cache_misses")
+        return {"response": None, "match": "miss", "similarity": None, "embedding": vec}
+
+    def put(self, query: str, response: Dict[str, Any], embedding: Optional[np.ndarray] = None):
+        key = normalize_query(query)
+        if not key:
+            return
+        entry = {"response": copy.deepcopy(response), "created": time.time(), "embedding": embedding}
+
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry
+            self._matrix = None
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.inc("response_cache_evictions")
+            metrics.set("response_cache_entries", len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            metrics.set("response_cache_entries", 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        data = metrics.get()
+        hits, misses = data["response_cache_hits"], data["response_cache_misses"]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "semantic": self._embed_fn is not None,
+            "threshold": self.threshold,
+            "hits": hits,
+            "semantic_hits": data["response_cache_semantic_hits"],
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide Non-RAG response cache, or None when disabled."""
+    global _response_cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            embed_fn = None
+            if RESPONSE_CACHE_SEMANTIC:
+                from saras_engine.src.tools.embeddings import embed_one
+                embed_fn = embed_one
+            _response_cache = ResponseCache(embed_fn=embed_fn)
+        return _response_cache
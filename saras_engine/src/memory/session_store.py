@@ -1,33 +1,276 @@
-from typing import List, Dict
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+try:
+    import redis  # optional: shared sessions across hosts
+except ImportError:
+    redis = None
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+
+# Backend selection: "sqlite" (shared by all workers on this host, default),
+# "redis" (shared across hosts) or "memory" (single process only)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite").lower()
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(24 * 3600)))  # idle seconds before a session expires
+SESSION_DB_PATH = Path(os.getenv("SESSION_DB_PATH", str(BASE_DIR / "vector_stores" / "sessions.sqlite3")))
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_MAX_LOCAL = int(os.getenv("SESSION_MAX_LOCAL", "10000"))  # sessions kept by the memory backend
+
+
+
+# BACKENDS
+# Every backend keeps at most max_messages per session (oldest dropped) and
+# expires a session ttl seconds after its last message.
+
+class MemorySessionBackend:
+    """
+    In-process ring buffers: one deque(maxlen) per session, so append and
+    trim are O(1). Least-recently-used sessions are dropped beyond max_sessions.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX_LOCAL):
+        self.ttl = ttl
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Session entry unless missing/expired (caller holds lock)."""
+        entry = self._sessions.get(session_id)
+        if entry is not None and self.ttl > 0 and time.time() > entry["expires"]:
+            del self._sessions[session_id]
+            return None
+        return entry
+
+    def append(self, session_id: str, message: Dict[str, Any], max_messages: int):
+        with self._lock:
+            entry = self._live(session_id)
+            if entry is None or entry["messages"].maxlen != max_messages:
+                old = entry["messages"] if entry else ()
+                entry = {"messages": deque(old, maxlen=max_messages)}
+                self._sessions[session_id] = entry
+            entry["messages"].append(message)
+            entry["expires"] = time.time() + self.ttl
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def history(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            entry = self._live(session_id)
+            return list(entry["messages"]) if entry else []
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": "memory", "sessions": len(self._sessions), "ttl": self.ttl}
+
+
+class SQLiteSessionBackend:
+    """
+    Sessions in a local SQLite file (WAL), shared by every worker process on
+    the host. Trimming deletes by (session_id, id) index range.
+    """
+
+    PURGE_EVERY = 500  # appends between sweeps of expired sessions
+
+    def __init__(self, path: Path = SESSION_DB_PATH, ttl: float = SESSION_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._appends = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL,"
+            " message TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_session_messages ON session_messages(session_id, id)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, expires REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires)")
+        self._conn.commit()
+
+    def append(self, session_id: str, message: Dict[str, Any], max_messages: int):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO session_messages (session_id, message) VALUES (?, ?)",
+                    (session_id, json.dumps(message, ensure_ascii=False)),
+                )
+                self._conn.execute(
+                    "INSERT INTO sessions (session_id, expires) VALUES (?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET expires = excluded.expires",
+                    (session_id, time.time() + self.ttl),
+                )
+                # keep the newest max_messages rows
+                self._conn.execute(
+                    "DELETE FROM session_messages WHERE session_id = ? AND id <= ("
+                    " SELECT id FROM session_messages WHERE session_id = ?"
+                    " ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (session_id, session_id, max_messages),
+                )
+                self._appends += 1
+                if self.ttl > 0 and self._appends % self.PURGE_EVERY == 0:
+                    self._purge_expired()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def _purge_expired(self):
+        """Drop expired sessions (caller holds lock and an open transaction)."""
+        now = time.time()
+        self._conn.execute(
+            "DELETE FROM session_messages WHERE session_id IN "
+            "(SELECT session_id FROM sessions WHERE expires < ?)", (now,)
+        )
+        self._conn.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+
+    def history(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None or (self.ttl > 0 and row[0] < time.time()):
+                return []
+            rows = self._conn.execute(
+                "SELECT message FROM session_messages WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires >= ?", (time.time(),)
+            ).fetchone()[0]
+        return {"backend": "sqlite", "sessions": sessions, "ttl": self.ttl}
+
+
+class RedisSessionBackend:
+    """
+    Sessions in Redis (or any Redis-compatible server): one list per session,
+    RPUSH + LTRIM + EXPIRE in a single pipeline.
+    """
+
+    def __init__(self, url: str = SESSION_REDIS_URL, ttl: float = SESSION_TTL,
+                 prefix: str = "saras:session:"):
+        if redis is None:
+            raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package.")
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def append(self, session_id: str, message: Dict[str, Any], max_messages: int):
+        key = self.prefix + session_id
+        pipe = self._client.pipeline()
+        pipe.rpush(key, json.dumps(message, ensure_ascii=False))
+        pipe.ltrim(key, -max_messages, -1)
+        if self.ttl > 0:
+            pipe.expire(key, int(self.ttl))
+        pipe.execute()
+
+    def history(self, session_id: str) -> List[Dict[str, Any]]:
+        return [json.loads(m) for m in self._client.lrange(self.prefix + session_id, 0, -1)]
+
+    def clear(self, session_id: str):
+        self._client.delete(self.prefix + session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "ttl": self.ttl}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_session_backend():
+    """Process-wide backend chosen by SESSION_BACKEND (falls back to memory)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            try:
+                if SESSION_BACKEND == "redis":
+                    _backend = RedisSessionBackend()
+                elif SESSION_BACKEND == "sqlite":
+                    _backend = SQLiteSessionBackend()
+            except (RuntimeError, sqlite3.Error):
+                _backend = None
+            if _backend is None:
+                _backend = MemorySessionBackend()
+        return _backend
+
+
+
+# SESSION HANDLE
 
 class SessionStore:
-    def __init__(self, max_messages: int = 8):
+    def __init__(self, max_messages: int = 8, session_id: Optional[str] = None, backend=None):
         """
         Important:
         - Only keep last N messages for context engineering.
         - Avoid unlimited memory growth.
+        - Thread-safe: one store may be shared by concurrent requests of a session.
+        - With session_id + backend, messages live in the shared backend, so
+          every worker sees the same session; otherwise a local ring buffer.
         """
         self.max_messages = max_messages
-        self._messages: List[Dict] = []
+        self.session_id = session_id
+        self.backend = backend if session_id else None
+        self._messages: Deque[Dict] = deque(maxlen=max_messages)
+        self._lock = threading.Lock()
 
     def add_message(self, role: str, content: str):
         """
         Store a new message.
         """
-        self._messages.append({"role": role, "content": content})
+        message = {"role": role, "content": content, "ts": round(time.time(), 3)}
+        if self.backend is not None:
+            self.backend.append(self.session_id, message, self.max_messages)
+            return
 
-        # Compact memory if limit exceeded
-        if len(self._messages) > self.max_messages:
-            self._messages = self._messages[-self.max_messages:]
+        # deque(maxlen) drops the oldest message itself
+        with self._lock:
+            self._messages.append(message)
 
     def get_history(self) -> List[Dict]:
         """
         Return the full history for building context.
         """
-        return self._messages
+        if self.backend is not None:
+            return self.backend.history(self.session_id)
+        with self._lock:
+            return list(self._messages)
 
     def clear(self):
         """
         Clear session memory.
         """
-        self._messages = []
+        if self.backend is not None:
+            self.backend.clear(self.session_id)
+            return
+        with self._lock:
+            self._messages.clear()
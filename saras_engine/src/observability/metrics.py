@@ -1,20 +1,69 @@
+import threading
+
+
 class Metrics:
     def __init__(self):
+        self._lock = threading.Lock()
         self.data = {
             "tool_calls": 0,
             "agent_calls": 0,
-            "errors": 0
+            "errors": 0,
+            # vector store LRU cache (tools/vector_store.py)
+            "vector_cache_hits": 0,
+            "vector_cache_misses": 0,
+            "vector_cache_evictions": 0,
+            "vector_cache_bytes": 0,
+            # embedding HTTP calls (services/gemini_client.py)
+            "embed_requests": 0,
+            "embed_texts": 0,
+            "embed_latency_ms": 0,
+            "embed_retries": 0,
+            # persistent embedding cache (services/embedding_cache.py)
+            "embed_cache_hits": 0,
+            "embed_cache_misses": 0,
+            "embed_cache_evictions": 0,
+            # Non-RAG response cache (memory/response_cache.py)
+            "response_cache_hits": 0,
+            "response_cache_semantic_hits": 0,
+            "response_cache_misses": 0,
+            "response_cache_evictions": 0,
+            "response_cache_entries": 0,
+            # web search (tools/google_search.py)
+            "search_requests": 0,
+            "search_retries": 0,
+            "search_cache_hits": 0,
+            "search_cache_misses": 0,
+            # cross-document corpus index (tools/corpus_index.py)
+            "corpus_documents_added": 0,
+            "corpus_documents_removed": 0,
+            "corpus_compactions": 0,
+            "corpus_searches": 0,
+            "corpus_errors": 0
         }
 
-    def inc(self, key: str):
+    def inc(self, key: str, amount=1):
         """
         Increase a counter.
         """
-        if key in self.data:
-            self.data[key] += 1
+        with self._lock:
+            if key in self.data:
+                self.data[key] += amount
+
+    def set(self, key: str, value):
+        """
+        Set a gauge value (e.g. current cache size).
+        """
+        with self._lock:
+            if key in self.data:
+                self.data[key] = value
 
     def get(self):
         """
         Return metrics snapshot.
         """
-        return self.data
+        with self._lock:
+            return dict(self.data)
+
+
+# Process-wide metrics shared by engine components
+metrics = Metrics()
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from saras_engine.src.observability.metrics import metrics
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+CACHE_PATH = Path(os.getenv("EMBED_CACHE_PATH", str(BASE_DIR / "vector_stores" / "embedding_cache.sqlite3")))
+CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "100000"))  # ~300 MB at 768 dims
+CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# LRU bookkeeping: hits only rewrite last_used when it is older than this,
+# and an exact row count is taken every CACHE_COUNT_EVERY puts
+CACHE_TOUCH_SECONDS = float(os.getenv("EMBED_CACHE_TOUCH_SECONDS", "600"))
+CACHE_COUNT_EVERY = int(os.getenv("EMBED_CACHE_COUNT_EVERY", "100"))
+
+
+def cache_key(model: str, text: str) -> bytes:
+    """sha256(model + text); model is included so switching models never mixes vectors."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding cache (SQLite, WAL mode).
+
+    Important:
+    - Vectors are stored as raw float32 blobs (3 KB for 768 dims).
+    - Bounded by entry count; least-recently-used rows are evicted.
+    - Reads stay read-only unless an entry's last_used is more than
+      CACHE_TOUCH_SECONDS old, so LRU order is approximate to that grain.
+    - The row count is tracked per process and re-read from the table every
+      CACHE_COUNT_EVERY puts, which also picks up other workers' inserts.
+    - Safe to share between threads and worker processes.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY, dim INTEGER NOT NULL, vec BLOB NOT NULL,"
+            " last_used REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._count = self._exact_count()
+        self._puts_since_count = 0
+
+    def _exact_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, text_list: List[str]) -> List[Optional[List[float]]]:
+        """Cached vector per text, None on miss."""
+        keys = [cache_key(model, t) for t in text_list]
+        found: Dict[bytes, List[float]] = {}
+        stale: List[bytes] = []
+        now = time.time()
+
+        with self._lock:
+            # chunk the IN (...) list to stay under SQLite's variable limit
+            for i in range(0, len(keys), 500):
+                part = list(set(keys[i:i + 500]))
+                rows = self._conn.execute(
+                    f"SELECT key, vec, last_used FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part,
+                ).fetchall()
+                for key, vec, last_used in rows:
+                    found[key] = np.frombuffer(vec, dtype=np.float32).tolist()
+                    if last_used < now - CACHE_TOUCH_SECONDS:
+                        stale.append(key)
+
+            if stale:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in stale],
+                )
+                self._conn.commit()
+
+        hits = sum(1 for k in keys if k in found)
+        metrics.inc("embed_cache_hits", hits)
+        metrics.inc("embed_cache_misses", len(keys) - hits)
+        return [found.get(k) for k in keys]
+
+    def put_many(self, model: str, text_list: List[str], vectors: List[List[float]]):
+        """Store vectors; empty vectors (failed calls) are skipped."""
+        now = time.time()
+        rows = [
+            (cache_key(model, t), len(v), np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(text_list, vectors) if v
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vec, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._count += len(rows)  # upper bound: replaced keys are counted again
+            self._puts_since_count += 1
+            self._evict()
+
+    def _evict(self):
+        """Trim to 90% of max_entries once the bound is exceeded (caller holds lock)."""
+        if self._count <= self.max_entries and self._puts_since_count < CACHE_COUNT_EVERY:
+            return
+        count = self._count = self._exact_count()
+        self._puts_since_count = 0
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._conn.commit()
+        self._count = count - excess
+        metrics.inc("embed_cache_evictions", excess)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._exact_count()
+        data = metrics.get()
+        hits, misses = data["embed_cache_hits"], data["embed_cache_misses"]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._count = 0
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache, or None when disabled or the DB cannot be opened."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = EmbeddingCache()
+            except sqlite3.Error:
+                return None
+        return _cache
+
+
+def _lookup(cache: EmbeddingCache, model: str, text_list: List[str]):
+    """Cached vectors (None on miss) plus the distinct texts still to embed."""
+    vectors = cache.get_many(model, text_list)
+    missing = list(dict.fromkeys(t for t, v in zip(text_list, vectors) if v is None))
+    return vectors, missing
+
+
+def _merge(cache: EmbeddingCache, model: str, text_list: List[str], vectors, missing,
+           result: Dict[str, Any]) -> Dict[str, Any]:
+    """Store freshly embedded vectors and fill the gaps in input order."""
+    fresh = dict(zip(missing, result["vectors"]))
+    try:
+        cache.put_many(model, missing, result["vectors"])
+    except sqlite3.Error:
+        pass
+    vectors = [v if v is not None else fresh[t] for t, v in zip(text_list, vectors)]
+    return {"vectors": vectors, "batches": result["batches"]}
+
+
+def cached_embed(model: str, text_list: List[str],
+                 embed_fn: Callable[[List[str]], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Serve what we can from the cache and embed only the misses.
+
+    embed_fn follows the embed_texts_batched contract
+    ({"vectors": [...], "batches": [...]}); so does the return value.
+    Duplicate texts within one call are embedded once.
+    """
+    cache = get_cache()
+    if cache is None or not text_list:
+        return embed_fn(text_list)
+
+    try:
+        vectors, missing = _lookup(cache, model, text_list)
+    except sqlite3.Error:
+        return embed_fn(text_list)
+    if not missing:
+        return {"vectors": vectors, "batches": []}
+
+    return _merge(cache, model, text_list, vectors, missing, embed_fn(missing))
+
+
+async def acached_embed(model: str, text_list: List[str],
+                        aembed_fn: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Async cached_embed; SQLite work runs in a worker thread."""
+    cache = get_cache()
+    if cache is None or not text_list:
+        return await aembed_fn(text_list)
+
+    try:
+        vectors, missing = await asyncio.to_thread(_lookup, cache, model, text_list)
+    except sqlite3.Error:
+        return await aembed_fn(text_list)
+    if not missing:
+        return {"vectors": vectors, "batches": []}
+
+    result = await aembed_fn(missing)
+    return await asyncio.to_thread(_merge, cache, model, text_list, vectors, missing, result)
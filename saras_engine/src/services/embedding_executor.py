@@ -0,0 +1,171 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from saras_engine.src.observability.metrics import metrics
+from saras_engine.src.services.gemini_client import EMBED_BATCH_LIMIT, _aembed_batch, _embed_batch
+from saras_engine.src.services.http_client import acall_with_retry, call_with_retry
+
+# Tunables (per process)
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_RATE_PER_SEC = float(os.getenv("EMBED_RATE_PER_SEC", "10"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "3"))
+
+
+class TokenBucket:
+    """
+    Blocking token-bucket rate limiter.
+
+    Important:
+    - rate tokens are added per second, up to capacity (burst size).
+    - acquire() sleeps outside the lock so waiting threads don't serialize;
+      aacquire() is the same for coroutines and shares the same budget.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float) -> float:
+        """Take tokens and return 0, or return the seconds to wait first."""
+        if self.rate <= 0:
+            return 0.0  # unlimited
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            wait = self._take(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: float = 1.0):
+        while True:
+            wait = self._take(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class EmbeddingExecutor:
+    """
+    Runs embedding batches concurrently with bounded parallelism.
+
+    - at most `concurrency` HTTP calls in flight
+    - calls are paced by a shared token bucket (`rate_per_sec`)
+    - 429/5xx responses are retried with jittered backoff
+    - results come back in input order
+    - aembed() applies the same limits to async callers: a per-event-loop
+      semaphore of `concurrency`, the same token bucket and retry policy
+    """
+
+    def __init__(self, concurrency: int = EMBED_CONCURRENCY,
+                 rate_per_sec: float = EMBED_RATE_PER_SEC,
+                 max_retries: int = EMBED_MAX_RETRIES,
+                 batch_size: int = EMBED_BATCH_LIMIT,
+                 embed_fn: Callable[[List[str]], List[List[float]]] = _embed_batch,
+                 aembed_fn: Callable[[List[str]], Awaitable[List[List[float]]]] = _aembed_batch):
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.batch_size = max(1, min(batch_size, EMBED_BATCH_LIMIT))
+        self.bucket = TokenBucket(rate_per_sec)
+        self._embed_fn = embed_fn
+        self._aembed_fn = aembed_fn
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency,
+                                        thread_name_prefix="saras-embed")
+        # asyncio primitives are bound to one loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _result(batch: List[str], t0: float, vectors, error) -> Dict[str, Any]:
+        if error is not None:
+            vectors = [[] for _ in batch]
+            metrics.inc("errors")
+        latency_ms = round((time.time() - t0) * 1000, 2)
+        metrics.inc("embed_requests")
+        metrics.inc("embed_texts", len(batch))
+        metrics.inc("embed_latency_ms", latency_ms)
+        return {"vectors": vectors,
+                "stats": {"size": len(batch), "latency_ms": latency_ms, "error": error}}
+
+    def _run_batch(self, batch: List[str]) -> Dict[str, Any]:
+        def attempt():
+            self.bucket.acquire()
+            return self._embed_fn(batch)
+
+        t0 = time.time()
+        try:
+            return self._result(batch, t0, call_with_retry(attempt, self.max_retries, "embed_retries"), None)
+        except Exception as e:
+            return self._result(batch, t0, None, str(e))
+
+    async def _arun_batch(self, batch: List[str]) -> Dict[str, Any]:
+        async def attempt():
+            await self.bucket.aacquire()
+            return await self._aembed_fn(batch)
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+
+        async with semaphore:
+            t0 = time.time()
+            try:
+                return self._result(batch, t0, await acall_with_retry(attempt, self.max_retries, "embed_retries"), None)
+            except Exception as e:
+                return self._result(batch, t0, None, str(e))
+
+    def embed(self, text_list: List[str]) -> Dict[str, Any]:
+        """
+        Same contract as gemini_client.embed_texts_batched:
+        {"vectors": [...], "batches": [{"size", "latency_ms", "error"}, ...]}
+        """
+        futures = [self._pool.submit(self._run_batch, b) for b in self._batches(text_list, None)]
+
+        vectors: List[List[float]] = []
+        stats: List[Dict[str, Any]] = []
+        for fut in futures:  # submission order == input order
+            result = fut.result()
+            vectors.extend(result["vectors"])
+            stats.append(result["stats"])
+
+        return {"vectors": vectors, "batches": stats}
+
+    def _batches(self, text_list: List[str], batch_size: Optional[int]) -> List[List[str]]:
+        size = max(1, min(batch_size or self.batch_size, EMBED_BATCH_LIMIT))
+        return [text_list[i:i + size] for i in range(0, len(text_list), size)]
+
+    async def aembed(self, text_list: List[str], batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Async embed(): same contract, batches run as bounded concurrent tasks."""
+        results = await asyncio.gather(*(self._arun_batch(b) for b in self._batches(text_list, batch_size)))
+        return {"vectors": [v for r in results for v in r["vectors"]],
+                "batches": [r["stats"] for r in results]}
+
+
+_default_executor: Optional[EmbeddingExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_executor() -> EmbeddingExecutor:
+    """Process-wide executor, so the rate limit applies across all requests."""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = EmbeddingExecutor()
+        return _default_executor
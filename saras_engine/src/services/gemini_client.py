@@ -1,54 +1,107 @@
+import json
 import os
-import requests
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterator
+
+from saras_engine.src.observability.metrics import metrics
+from saras_engine.src.services import http_client
+from saras_engine.src.services.embedding_cache import cached_embed, acached_embed
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
-BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+# Base URLs are overridable so a local stand-in server can be used in development
+BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/models")
+EMBED_BASE_URL = os.getenv("GEMINI_EMBED_BASE_URL", "https://generativelanguage.googleapis.com/v1/models")
+
+FLASH_MODEL = "gemini-2.0-flash"
+# Adjust this if you have a specific pro model (e.g. gemini-2.0-flash-lite, or future pro IDs)
+PRO_MODEL = "gemini-2.0-flash"
+EMBED_MODEL = "text-embedding-004"
+EMBED_BATCH_LIMIT = 100  # max requests per batchEmbedContents call
 
 if not GOOGLE_API_KEY:
     print("WARNING: GOOGLE_API_KEY is not set.")
 
 
+def _generate_body(prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+    return {
+        "contents": [
+            {"parts": [{"text": prompt}]}
+        ],
+        "generationConfig": {
+            "temperature": temperature,
+            "maxOutputTokens": max_tokens,
+        },
+    }
+
+
+def _extract_text(data: Dict[str, Any]) -> str:
+    try:
+        return data["candidates"][0]["content"]["parts"][0]["text"]
+    except Exception:
+        return ""
+
+
 def _call_gemini(model: str, prompt: str, max_tokens: int = 512, temperature: float = 0.2) -> Dict[str, Any]:
     """
     Generic Gemini text call using generateContent.
     """
     try:
         url = f"{BASE_URL}/{model}:generateContent?key={GOOGLE_API_KEY}"
+        body = _generate_body(prompt, max_tokens, temperature)
 
-        body = {
-            "contents": [
-                {"parts": [{"text": prompt}]}
-            ],
-            "generationConfig": {
-                "temperature": temperature,
-                "maxOutputTokens": max_tokens,
-            },
-        }
-
-        r = requests.post(url, json=body, timeout=30)
+        r = http_client.post(url, json=body, timeout=30)
         r.raise_for_status()
         data = r.json()
 
-        text = ""
-        try:
-            text = data["candidates"][0]["content"]["parts"][0]["text"]
-        except Exception:
-            text = ""
+        return {"error": None, "output_text": _extract_text(data), "raw": data}
+
+    except Exception as e:
+        return {"error": str(e), "output_text": "", "raw": {"error": str(e)}}
 
-        return {"error": None, "output_text": text, "raw": data}
+
+async def _acall_gemini(model: str, prompt: str, max_tokens: int = 512, temperature: float = 0.2) -> Dict[str, Any]:
+    """
+    Async generateContent call; same result shape as _call_gemini.
+    """
+    try:
+        url = f"{BASE_URL}/{model}:generateContent?key={GOOGLE_API_KEY}"
+        body = _generate_body(prompt, max_tokens, temperature)
+
+        data = await http_client.apost_json(url, body, timeout=30)
+
+        return {"error": None, "output_text": _extract_text(data), "raw": data}
 
     except Exception as e:
         return {"error": str(e), "output_text": "", "raw": {"error": str(e)}}
 
 
+def stream_gemini(model: str, prompt: str, max_tokens: int = 1024, temperature: float = 0.0) -> Iterator[str]:
+    """
+    Stream a generation with streamGenerateContent (SSE). Yields text deltas
+    as they arrive; raises on HTTP errors so callers can fall back.
+    """
+    url = f"{BASE_URL}/{model}:streamGenerateContent?alt=sse&key={GOOGLE_API_KEY}"
+    body = _generate_body(prompt, max_tokens, temperature)
+
+    with http_client.post(url, json=body, timeout=60, stream=True) as r:
+        r.raise_for_status()
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if not payload or payload == "[DONE]":
+                continue
+            text = _extract_text(json.loads(payload))
+            if text:
+                yield text
+
+
 def generate_text_flash(prompt: str, temperature: float = 0.0, max_tokens: int = 512) -> Dict[str, Any]:
     """
     Wrapper for a fast, cheaper Gemini model.
     Use any current flash model, e.g. gemini-2.0-flash or gemini-2.5-flash.
     """
-    model = "gemini-2.0-flash"
-    return _call_gemini(model, prompt, max_tokens=max_tokens, temperature=temperature)
+    return _call_gemini(FLASH_MODEL, prompt, max_tokens=max_tokens, temperature=temperature)
 
 
 def generate_text_pro(prompt: str, temperature: float = 0.0, max_tokens: int = 1024) -> Dict[str, Any]:
@@ -56,34 +109,121 @@ def generate_text_pro(prompt: str, temperature: float = 0.0, max_tokens: int = 1
     Wrapper for a higher-quality Gemini model.
     Use a current pro-style model if available in your project.
     """
-    # Adjust this if you have a specific pro model (e.g. gemini-2.0-flash-lite, or future pro IDs)
-    model = "gemini-2.0-flash"
-    return _call_gemini(model, prompt, max_tokens=max_tokens, temperature=temperature)
+    return _call_gemini(PRO_MODEL, prompt, max_tokens=max_tokens, temperature=temperature)
+
+
+def stream_text_flash(prompt: str, temperature: float = 0.0, max_tokens: int = 512) -> Iterator[str]:
+    """Streaming generate_text_flash (yields text deltas)."""
+    return stream_gemini(FLASH_MODEL, prompt, max_tokens=max_tokens, temperature=temperature)
+
+
+def stream_text_pro(prompt: str, temperature: float = 0.0, max_tokens: int = 1024) -> Iterator[str]:
+    """Streaming generate_text_pro (yields text deltas)."""
+    return stream_gemini(PRO_MODEL, prompt, max_tokens=max_tokens, temperature=temperature)
+
+
+async def agenerate_text_flash(prompt: str, temperature: float = 0.0, max_tokens: int = 512) -> Dict[str, Any]:
+    """Async generate_text_flash."""
+    return await _acall_gemini(FLASH_MODEL, prompt, max_tokens=max_tokens, temperature=temperature)
+
+
+async def agenerate_text_pro(prompt: str, temperature: float = 0.0, max_tokens: int = 1024) -> Dict[str, Any]:
+    """Async generate_text_pro."""
+    return await _acall_gemini(PRO_MODEL, prompt, max_tokens=max_tokens, temperature=temperature)
+
+
+def _embed_body(text_list: List[str]) -> Dict[str, Any]:
+    return {
+        "requests": [
+            {"model": f"models/{EMBED_MODEL}", "content": {"parts": [{"text": text}]}}
+            for text in text_list
+        ]
+    }
+
+
+def _embed_values(data: Dict[str, Any], expected: int) -> List[List[float]]:
+    embeddings = data["embeddings"]
+    if len(embeddings) != expected:
+        raise ValueError(f"Expected {expected} embeddings, got {len(embeddings)}")
+    return [e["values"] for e in embeddings]
+
+
+def _embed_batch(text_list: List[str]) -> List[List[float]]:
+    """
+    One batchEmbedContents call for up to EMBED_BATCH_LIMIT texts.
+    Raises on HTTP or shape errors.
+    """
+    url = f"{EMBED_BASE_URL}/{EMBED_MODEL}:batchEmbedContents?key={GOOGLE_API_KEY}"
+
+    r = http_client.post(url, json=_embed_body(text_list), timeout=60)
+    r.raise_for_status()
+    return _embed_values(r.json(), len(text_list))
+
+
+def embed_texts_batched(text_list: List[str], batch_size: int = EMBED_BATCH_LIMIT) -> Dict[str, Any]:
+    """
+    Embed texts with as few HTTP calls as possible.
+
+    Returns:
+    {
+        "vectors": [[...], ...],   # same order as text_list, [] where a batch failed
+        "batches": [{"size": 100, "latency_ms": 412.3, "error": None}, ...]
+    }
+    """
+    batch_size = max(1, min(batch_size, EMBED_BATCH_LIMIT))
+    vectors: List[List[float]] = []
+    batches: List[Dict[str, Any]] = []
+
+    for start in range(0, len(text_list), batch_size):
+        batch = text_list[start:start + batch_size]
+        t0 = time.time()
+        try:
+            vectors.extend(_embed_batch(batch))
+            error = None
+        except Exception as e:
+            vectors.extend([] for _ in batch)
+            error = str(e)
+            metrics.inc("errors")
+
+        latency_ms = round((time.time() - t0) * 1000, 2)
+        batches.append({"size": len(batch), "latency_ms": latency_ms, "error": error})
+        metrics.inc("embed_requests")
+        metrics.inc("embed_texts", len(batch))
+        metrics.inc("embed_latency_ms", latency_ms)
+
+    return {"vectors": vectors, "batches": batches}
 
 
 def embed_texts(text_list: List[str]) -> List[List[float]]:
     """
     Embeddings API using text-embedding-004, which is still supported.
+    Texts are sent in batches; a failed batch yields [] for each of its texts.
+    Previously seen texts are served from the persistent embedding cache.
     """
-    url = f"https://generativelanguage.googleapis.com/v1/models/text-embedding-004:embedContent?key={GOOGLE_API_KEY}"
-    vectors: List[List[float]] = []
+    return cached_embed(EMBED_MODEL, text_list, embed_texts_batched)["vectors"]
 
-    for text in text_list:
-        body = {
-            "model": "text-embedding-004",
-            "content": {"parts": [{"text": text}]},
-        }
 
-        try:
-            r = requests.post(url, json=body, timeout=20)
-            r.raise_for_status()
-            res = r.json()
-            vec = res["embedding"]["values"]
-            vectors.append(vec)
-        except Exception:
-            vectors.append([])
-
-    return vectors
+async def _aembed_batch(text_list: List[str]) -> List[List[float]]:
+    """Async _embed_batch."""
+    url = f"{EMBED_BASE_URL}/{EMBED_MODEL}:batchEmbedContents?key={GOOGLE_API_KEY}"
+
+    data = await http_client.apost_json(url, _embed_body(text_list), timeout=60)
+    return _embed_values(data, len(text_list))
+
+
+async def aembed_texts_batched(text_list: List[str], batch_size: int = EMBED_BATCH_LIMIT) -> Dict[str, Any]:
+    """
+    Async embed_texts_batched. Batches run concurrently under the shared
+    embedding executor's limits (EMBED_CONCURRENCY, EMBED_RATE_PER_SEC,
+    retries on 429/5xx), like the sync path. Same result shape.
+    """
+    from saras_engine.src.services.embedding_executor import get_executor  # imports this module
+    return await get_executor().aembed(text_list, batch_size)
+
+
+async def aembed_texts(text_list: List[str]) -> List[List[float]]:
+    """Async embed_texts (uses the same persistent embedding cache)."""
+    return (await acached_embed(EMBED_MODEL, text_list, aembed_texts_batched))["vectors"]
 
 
 def local_stub_summary(prompt: str, role: str = "pro") -> Dict[str, Any]:
@@ -0,0 +1,212 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx  # optional: native asyncio client
+except ImportError:
+    httpx = None
+
+from saras_engine.src.observability.metrics import metrics
+
+# Connection pool settings (shared by every agent/tool in the process)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # hosts kept in the pool
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))          # connections per host
+HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() in ("1", "true", "yes")
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+# How async callers reach the network:
+# - "thread": the pooled sync session in a worker thread. Keep-alive
+#   connections are shared across event loops, which is what WSGI needs
+#   (every async view there runs in a fresh, short-lived loop).
+# - "httpx": one native AsyncClient per event loop, for ASGI servers with a
+#   long-lived loop (saras_backend/asgi.py selects it).
+HTTP_ASYNC_BACKEND = os.getenv("HTTP_ASYNC_BACKEND", "thread").lower()
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# One AsyncClient per event loop (clients cannot be shared across loops)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def _build_session() -> requests.Session:
+    """
+    Important:
+    - One keep-alive pool per host, so repeated Gemini/MCP calls skip TCP+TLS setup.
+    - pool_maxsize caps connections per host; with HTTP_POOL_BLOCK=true callers
+      wait for a free connection instead of opening throwaway ones.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=HTTP_POOL_BLOCK,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def _timeout(read_timeout: Optional[float]):
+    return (HTTP_CONNECT_TIMEOUT, read_timeout if read_timeout is not None else HTTP_READ_TIMEOUT)
+
+
+def post(url: str, timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+    """requests.post over the shared pool; timeout is the read timeout in seconds."""
+    return get_session().post(url, timeout=_timeout(timeout), **kwargs)
+
+
+def get(url: str, timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+    """requests.get over the shared pool; timeout is the read timeout in seconds."""
+    return get_session().get(url, timeout=_timeout(timeout), **kwargs)
+
+
+def close():
+    """Drop pooled connections (e.g. after fork or in shutdown hooks)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+
+# RETRY
+
+def _retry_delay(error: Exception, attempt: int, base: float = 0.5, cap: float = 20.0) -> Optional[float]:
+    """
+    Seconds to wait before retrying, or None if the error is not retryable.
+    Uses Retry-After when the server sends it, otherwise full-jitter backoff.
+    """
+    if isinstance(error, requests.HTTPError) or (httpx is not None and isinstance(error, httpx.HTTPStatusError)):
+        resp = error.response
+        if resp is None or resp.status_code not in RETRYABLE_STATUS:
+            return None
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(cap, float(retry_after))
+    elif not isinstance(error, (requests.ConnectionError, requests.Timeout)) and \
+            not (httpx is not None and isinstance(error, httpx.TransportError)):
+        return None
+
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def call_with_retry(fn: Callable[[], Any], max_retries: int = 3, metric: Optional[str] = None) -> Any:
+    """
+    Call fn, retrying 429/5xx and network errors with jittered backoff.
+    metric names the counter bumped per retry (e.g. "embed_retries").
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt >= max_retries:
+                raise
+            if metric:
+                metrics.inc(metric)
+            time.sleep(delay)
+            attempt += 1
+
+
+async def acall_with_retry(fn: Callable[[], Awaitable[Any]], max_retries: int = 3,
+                           metric: Optional[str] = None) -> Any:
+    """Async call_with_retry (same retry policy, sleeps without blocking the loop)."""
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt >= max_retries:
+                raise
+            if metric:
+                metrics.inc(metric)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+
+# ASYNC
+
+def _use_httpx() -> bool:
+    return httpx is not None and HTTP_ASYNC_BACKEND == "httpx"
+
+
+async def _close_with_loop(client):
+    """
+    Async generator parked on the client's loop: loop.shutdown_asyncgens()
+    (run by asyncio.run and asgiref before closing a loop) finalizes it,
+    which closes the client and its sockets together with the loop.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+async def _get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=HTTP_POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+        _async_clients[loop] = client
+        closer = _close_with_loop(client)
+        await closer.asend(None)
+        client._saras_closer = closer  # keep the generator alive as long as the client
+    return client
+
+
+async def aclose():
+    """Close this loop's AsyncClient now (e.g. from an ASGI shutdown hook)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def apost_json(url: str, json: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    POST a JSON body and return the decoded JSON response. Raises on HTTP errors.
+
+    With HTTP_ASYNC_BACKEND=httpx uses the loop's AsyncClient; otherwise runs
+    the pooled sync session in a worker thread so the event loop is never blocked.
+    """
+    if not _use_httpx():
+        def _sync():
+            r = post(url, json=json, timeout=timeout)
+            r.raise_for_status()
+            return r.json()
+        return await asyncio.to_thread(_sync)
+
+    client = await _get_async_client()
+    r = await client.post(url, json=json, timeout=httpx.Timeout(
+        timeout if timeout is not None else HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT))
+    r.raise_for_status()
+    return r.json()
@@ -1,5 +1,22 @@
-from typing import List, Dict
-import uuid
+import os
+import re
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from saras_engine.src.tools.context_builder import count_tokens
+
+# Sentence chunker defaults (tokens as counted by context_builder.count_tokens)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+
+# sentence end (+ closing quotes/brackets) or paragraph break, with trailing
+# whitespace; CJK full stops (。！？) end a sentence without a following space
+_BOUNDARY_RE = re.compile(
+    r"[.!?]+[\"'\u201d\u2019)\]]*\s+"
+    r"|[\u3002\uff01\uff1f]+[\u300d\u300f\u201d\u2019\uff09)\]]*\s*"
+    r"|\n[ \t]*\n\s*"
+)
+_WORD_RE = re.compile(r"\S+\s*")
 
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[Dict]:
     if not text:
@@ -22,3 +39,233 @@ def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[Di
         # advance start with overlap
         start = end - overlap if (end - overlap) > start else end
     return chunks
+
+
+
+# STREAMING CHUNKERS
+# Both take pages [{"page", "text"}, ...] as produced by
+# pdf_extractor.iter_pages, treat the document as the concatenation of
+# "text\n" per page, and yield {"text", "page_start", "page_end",
+# "start_char", "end_char"} (pages 1-based, offsets into the document text,
+# end exclusive) as soon as a chunk is complete.
+
+class _PageIndex:
+    """Document offset -> page number for the pages still being chunked."""
+
+    def __init__(self):
+        self._starts: Deque[Tuple[int, int]] = deque()  # (document offset, page number)
+
+    def add(self, offset: int, page: int):
+        self._starts.append((offset, page))
+
+    def page_at(self, offset: int) -> int:
+        page = self._starts[0][1]
+        for start, number in self._starts:
+            if start > offset:
+                break
+            page = number
+        return page
+
+    def forget_before(self, offset: int):
+        while len(self._starts) > 1 and self._starts[1][0] <= offset:
+            self._starts.popleft()
+
+
+def _chunk(text: str, start: int, pages: _PageIndex) -> Dict:
+    return {
+        "text": text,
+        "page_start": pages.page_at(start),
+        "page_end": pages.page_at(start + max(len(text) - 1, 0)),
+        "start_char": start,
+        "end_char": start + len(text),
+    }
+
+
+def iter_fixed_chunks(pages: Iterable[Dict], chunk_size: int) -> Iterator[Dict]:
+    """
+    Fixed-size chunks of chunk_size characters. Same chunk texts as slicing
+    the full document text every chunk_size characters.
+    """
+    buffer = ""
+    consumed = 0  # document offset of buffer[0]
+    index = _PageIndex()
+
+    for number, page in enumerate(pages, start=1):
+        index.add(consumed + len(buffer), page.get("page", number))
+        buffer += page["text"] + "\n"
+        while len(buffer) >= chunk_size:
+            yield _chunk(buffer[:chunk_size], consumed, index)
+            buffer = buffer[chunk_size:]
+            consumed += chunk_size
+            index.forget_before(consumed)
+    if buffer:
+        yield _chunk(buffer, consumed, index)
+
+
+class _Unit(NamedTuple):
+    """A sentence (or a piece of an oversized one) in document offsets."""
+    start: int
+    end: int        # end of the text, trailing whitespace excluded
+    tokens: int
+    paragraph: bool  # ends a paragraph
+
+
+def _hard_split(word: str, max_tokens: int) -> List[Tuple[int, int, int]]:
+    """
+    (start, end, tokens) slices of a run without whitespace (CJK text, long
+    identifiers) so that each fits max_tokens: the longest prefix that fits,
+    found by binary search over its length.
+    """
+    pieces, pos = [], 0
+    while pos < len(word):
+        lo, hi = 1, min(len(word) - pos, max_tokens * 4)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if count_tokens(word[pos:pos + mid]) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        pieces.append((pos, pos + lo, count_tokens(word[pos:pos + lo])))
+        pos += lo
+    return pieces
+
+
+def _split_long(text: str, start: int, max_tokens: int, paragraph: bool) -> List[_Unit]:
+    """
+    Split a sentence longer than max_tokens at word boundaries; a single
+    word longer than max_tokens is cut inside the word (_hard_split).
+    """
+    units, piece_start, piece_end, used = [], start, start, 0
+    for m in _WORD_RE.finditer(text):
+        word_start, word = start + m.start(), m.group().rstrip()
+        cost = count_tokens(word)
+        if used and used + cost > max_tokens:
+            units.append(_Unit(piece_start, piece_end, used, False))
+            used = 0
+        if cost > max_tokens:
+            units.extend(_Unit(word_start + a, word_start + b, tokens, False)
+                         for a, b, tokens in _hard_split(word, max_tokens))
+            continue
+        if not used:
+            piece_start = word_start
+        used += cost
+        piece_end = word_start + len(word)
+    if used:
+        units.append(_Unit(piece_start, piece_end, used, paragraph))
+    elif units:
+        units[-1] = units[-1]._replace(paragraph=paragraph)
+    return units
+
+
+def iter_sentence_chunks(pages: Iterable[Dict], max_tokens: int = CHUNK_MAX_TOKENS,
+                         overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Iterator[Dict]:
+    """
+    Chunks of whole sentences, at most max_tokens each.
+
+    Important:
+    - A chunk is cut at the last paragraph break when that keeps it at least
+      half full, otherwise at the last sentence that fits.
+    - Consecutive chunks share up to overlap_tokens of whole sentences.
+    - Sentences longer than max_tokens are split at word boundaries, and
+      words longer than max_tokens inside the word, so max_tokens is a
+      hard cap.
+    - Single pass: each sentence is tokenized once and text is only kept
+      for the chunk being built, so memory stays bounded on large documents.
+    """
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+    max_pending = max_tokens * 16  # chars; force a split inside run-on text
+    index = _PageIndex()
+
+    text = ""         # document text from offset `base`
+    base = 0
+    scanned = 0       # document offset up to which text is split into units
+    window: List[_Unit] = []
+    window_tokens = 0
+    carried = 0       # leading window units already emitted (overlap)
+
+    def span(units: List[_Unit]) -> Dict:
+        start = units[0].start
+        return _chunk(text[start - base:units[-1].end - base], start, index)
+
+    def flush() -> Dict:
+        """Emit a chunk from the window; keep the overlap + unemitted rest."""
+        nonlocal window, window_tokens, carried
+        cut, used = len(window), 0
+        for i, unit in enumerate(window):
+            used += unit.tokens
+            if i >= carried and i + 1 < len(window) and unit.paragraph and used * 2 >= max_tokens:
+                cut = i + 1
+        emitted, rest = window[:cut], window[cut:]
+        chunk = span(emitted)
+
+        tail, tail_tokens = [], 0
+        for unit in reversed(emitted[1:]):
+            if tail_tokens + unit.tokens > overlap_tokens:
+                break
+            tail.insert(0, unit)
+            tail_tokens += unit.tokens
+
+        window = tail + rest
+        window_tokens = sum(u.tokens for u in window)
+        carried = len(tail)
+        return chunk
+
+    def add(unit: _Unit) -> Iterator[Dict]:
+        nonlocal window_tokens, carried
+        while window and window_tokens + unit.tokens > max_tokens:
+            if carried == len(window):
+                window_tokens -= window.pop(0).tokens  # only overlap left: shrink it
+                carried -= 1
+            else:
+                yield flush()
+        window.append(unit)
+        window_tokens += unit.tokens
+
+    def units_until(limit: int, final: bool) -> Iterator[_Unit]:
+        """Split text[scanned:limit] into sentence units."""
+        nonlocal scanned
+        chunk_text = text[scanned - base:limit - base]
+        pos = 0
+        for m in _BOUNDARY_RE.finditer(chunk_text):
+            end = m.start() + len(m.group().rstrip())
+            yield from make_units(chunk_text, pos, end, m.group().count("\n") >= 2)
+            pos = m.end()
+        if final or len(chunk_text) - pos > max_pending:
+            yield from make_units(chunk_text, pos, len(chunk_text), final)
+            pos = len(chunk_text)
+        scanned += pos
+
+    def make_units(chunk_text: str, pos: int, end: int, paragraph: bool) -> List[_Unit]:
+        piece = chunk_text[pos:end]
+        lead = len(piece) - len(piece.lstrip())
+        piece = piece.strip()
+        if not piece:
+            return []
+        start = scanned + pos + lead
+        tokens = count_tokens(piece)
+        if tokens > max_tokens:
+            return _split_long(piece, start, max_tokens, paragraph)
+        return [_Unit(start, start + len(piece), tokens, paragraph)]
+
+    def trim():
+        """Drop text no longer needed by the window."""
+        nonlocal text, base
+        keep = window[0].start if window else scanned
+        if keep - base > len(text) // 2:
+            text = text[keep - base:]
+            base = keep
+            index.forget_before(keep)
+
+    document_end = 0
+    for number, page in enumerate(pages, start=1):
+        index.add(document_end, page.get("page", number))
+        text += page["text"] + "\n"
+        document_end += len(page["text"]) + 1
+        for unit in units_until(document_end, final=False):
+            yield from add(unit)
+        trim()
+
+    for unit in units_until(document_end, final=True):
+        yield from add(unit)
+    if len(window) > carried:
+        yield span(window)
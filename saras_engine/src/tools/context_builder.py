@@ -0,0 +1,170 @@
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+# Prompt context budget (approximate tokens) and the shares reserved for
+# conversation history and memory facts; whatever they leave unused goes to
+# retrieved chunks.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+HISTORY_SHARE = float(os.getenv("CONTEXT_HISTORY_SHARE", "0.15"))
+MEMORY_SHARE = float(os.getenv("CONTEXT_MEMORY_SHARE", "0.10"))
+MIN_PARTIAL_TOKENS = 64  # don't add a truncated chunk smaller than this
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_RE = re.compile(r"[^.!?\n]+(?:[.!?]+|\n|$)")
+_NORM_RE = re.compile(r"\W+")
+
+
+
+# TOKEN COUNTING
+# Approximation of a BPE tokenizer: punctuation is one token, words are
+# ~4 characters per token. Close enough for budgeting, no model download.
+
+def _piece_tokens(piece: str) -> int:
+    return max(1, math.ceil(len(piece) / 4)) if piece[0].isalnum() or piece[0] == "_" else 1
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return sum(_piece_tokens(m.group()) for m in _TOKEN_RE.finditer(text))
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Longest prefix of text within budget tokens (cut at a token boundary)."""
+    if budget <= 0:
+        return ""
+    used = 0
+    for m in _TOKEN_RE.finditer(text):
+        used += _piece_tokens(m.group())
+        if used > budget:
+            return text[:m.start()].rstrip()
+    return text
+
+
+
+# DEDUPLICATION
+
+def _sentences(text: str) -> List[str]:
+    return [s for s in (m.group().strip() for m in _SENTENCE_RE.finditer(text)) if s]
+
+
+def _sentence_key(sentence: str) -> str:
+    return _NORM_RE.sub(" ", sentence.lower()).strip()
+
+
+def _dedup(text: str, seen: set) -> str:
+    """
+    Drop sentences already included elsewhere (overlapping chunks, repeated
+    boilerplate). Short sentences are always kept; they carry little and
+    often repeat legitimately.
+    """
+    kept = []
+    for sentence in _sentences(text):
+        key = _sentence_key(sentence)
+        if len(key) >= 20:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(sentence)
+    return " ".join(kept)
+
+
+
+# PACKING
+
+def _label(chunk: Dict[str, Any]) -> str:
+    """Label like "[chunk-3, p. 2-3] ", so the writer can cite ids and pages."""
+    if not chunk.get("chunk_id"):
+        return ""
+    pages = ""
+    if chunk.get("page_start"):
+        end = chunk.get("page_end", chunk["page_start"])
+        pages = f", p. {chunk['page_start']}" + (f"-{end}" if end != chunk["page_start"] else "")
+    return f"[{chunk['chunk_id']}{pages}] "
+
+
+def _pack_chunks(chunks: List[Dict[str, Any]], budget: int, seen: set) -> Dict[str, Any]:
+    """Highest score first; the last chunk that doesn't fit is truncated."""
+    ordered = sorted(chunks, key=lambda c: c.get("score", 0.0), reverse=True)
+    parts, used = [], 0
+
+    for chunk in ordered:
+        text = _dedup(chunk.get("text") or chunk.get("text_excerpt", ""), seen)
+        if not text:
+            continue  # fully covered by earlier chunks
+        label = _label(chunk)
+        piece = label + text
+        cost = count_tokens(piece)
+        if used + cost > budget:
+            remaining = budget - used
+            if remaining >= MIN_PARTIAL_TOKENS:
+                piece = truncate_to_tokens(piece, remaining)
+                parts.append(piece)
+                used += count_tokens(piece)
+            break
+        parts.append(piece)
+        used += cost
+
+    return {"text": "\n\n".join(parts), "tokens": used,
+            "included": len(parts), "dropped": len(ordered) - len(parts)}
+
+
+def _pack_lines(lines: List[str], budget: int) -> Dict[str, Any]:
+    """Pack whole lines in order until the budget is reached."""
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return {"lines": kept, "tokens": used}
+
+
+def build_context(
+    chunks: Optional[List[Dict[str, Any]]] = None,
+    history: Optional[List[Dict[str, Any]]] = None,
+    facts: Optional[List[Dict[str, Any]]] = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Dict[str, Any]:
+    """
+    Assemble the writer's context within a token budget.
+
+    chunks:  [{"chunk_id", "score", "text" | "text_excerpt", "page_start"?, "page_end"?}, ...]
+    history: session messages [{"role", "content"}, ...], oldest first
+    facts:   memory facts [{"fact", "score"}, ...], best first
+
+    Returns {"retrieved", "history", "memory", "tokens": {...}}. Memory and
+    history are packed first within their shares, most relevant / most
+    recent first; retrieved chunks get the rest of the budget.
+    """
+    seen: set = set()
+
+    memory = _pack_lines([f"- {f['fact']}" for f in (facts or []) if f.get("fact")],
+                         int(budget * MEMORY_SHARE))
+
+    recent = [f"{m.get('role', 'user')}: {m.get('content', '')}" for m in reversed(history or [])]
+    past = _pack_lines(recent, int(budget * HISTORY_SHARE))
+    past["lines"].reverse()  # back to chronological order
+
+    for line in memory["lines"] + past["lines"]:
+        _dedup(line, seen)
+
+    retrieved = _pack_chunks(chunks or [], budget - memory["tokens"] - past["tokens"], seen)
+
+    return {
+        "retrieved": retrieved["text"],
+        "history": "\n".join(past["lines"]),
+        "memory": "\n".join(memory["lines"]),
+        "tokens": {
+            "retrieved": retrieved["tokens"],
+            "history": past["tokens"],
+            "memory": memory["tokens"],
+            "total": retrieved["tokens"] + past["tokens"] + memory["tokens"],
+            "budget": budget,
+        },
+        "chunks_included": retrieved["included"],
+        "chunks_dropped": retrieved["dropped"],
+    }
@@ -0,0 +1,452 @@
+import heapq
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from saras_engine.src.observability.metrics import metrics
+from saras_engine.src.tools.vector_store import (
+    POSITION_FIELDS, append_store, attach_store_index, build_store, delete_store,
+    get_chunk, index_store, read_rows, search_store, train_store_index
+)
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+
+CORPUS_DB_PATH = Path(os.getenv("CORPUS_DB_PATH", str(BASE_DIR / "vector_stores" / "corpus.sqlite3")))
+CORPUS_SHARD_ROWS = int(os.getenv("CORPUS_SHARD_ROWS", "50000"))        # rows per shard store
+CORPUS_COMPACT_RATIO = float(os.getenv("CORPUS_COMPACT_RATIO", "0.3"))  # tombstoned share that triggers compaction
+CORPUS_SEARCH_WORKERS = int(os.getenv("CORPUS_SEARCH_WORKERS", "4"))
+
+_search_pool = ThreadPoolExecutor(max_workers=max(1, CORPUS_SEARCH_WORKERS), thread_name_prefix="saras-corpus")
+# shard indexing and compaction: slow, so never on the request path
+_maintenance_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="saras-corpus-maintenance")
+
+
+class CorpusIndex:
+    """
+    One searchable index over many uploaded documents.
+
+    Important:
+    - Rows live in shard vector stores of at most shard_rows rows, so no
+      single file has to fit in memory; full shards are sealed and get an
+      ANN index (vector_store.index_store).
+    - The manifest (which document owns which shard rows, and who uploaded
+      it) is a SQLite table; its write lock also serializes shard appends
+      across worker processes.
+    - remove_document only tombstones rows. A shard is rewritten without
+      its dead rows once they exceed CORPUS_COMPACT_RATIO of it.
+    - Indexing sealed shards and compaction run on a background worker and
+      train/copy outside the write lock; the lock is only taken to attach
+      the result. Until then the shard is searched exactly as before.
+    - Results carry the document hash and the chunk id within that
+      document, so they resolve with get_citation like single-document results.
+    """
+
+    def __init__(self, name: str = "default", db_path: Path = CORPUS_DB_PATH,
+                 shard_rows: int = CORPUS_SHARD_ROWS):
+        self.name = name
+        self.shard_rows = max(1, shard_rows)
+        self._lock = threading.Lock()
+        self._jobs: Set[tuple] = set()        # queued maintenance jobs
+        self._futures: Set[Future] = set()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS corpus_shards ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, corpus TEXT NOT NULL, key TEXT NOT NULL,"
+            " rows INTEGER NOT NULL, deleted INTEGER NOT NULL DEFAULT 0, sealed INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS corpus_documents ("
+            " corpus TEXT NOT NULL, doc TEXT NOT NULL, filename TEXT, shard INTEGER,"
+            " row_start INTEGER, row_end INTEGER, added REAL, removed INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (corpus, doc))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_corpus_documents_shard ON corpus_documents(shard)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS corpus_owners ("
+            " corpus TEXT NOT NULL, doc TEXT NOT NULL, owner TEXT NOT NULL,"
+            " PRIMARY KEY (corpus, doc, owner))"
+        )
+        self._conn.commit()
+
+    def _write(self, fn):
+        """Run fn() inside a write transaction (serialized across processes)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+                self._conn.commit()
+                return result
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    # add / remove
+
+    def add_document(self, doc: str, filename: str = "", owner: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Copy the rows of the vector store `doc` (a document hash from RAG
+        ingestion) into the corpus. Re-adding a live document only records
+        the owner. Returns {"document", "added", "rows"}. Indexing a shard
+        this fills up happens later, on the maintenance worker.
+        """
+        to_index: List[str] = []
+
+        def live_row():
+            return self._conn.execute(
+                "SELECT row_start, row_end, removed FROM corpus_documents WHERE corpus = ? AND doc = ?",
+                (self.name, doc),
+            ).fetchone()
+
+        with self._lock:
+            row = live_row()
+        # read the document before taking the write lock
+        rows = read_rows(doc) if row is None or row[2] else None
+
+        def add():
+            row = live_row()
+            if owner:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO corpus_owners (corpus, doc, owner) VALUES (?, ?, ?)",
+                    (self.name, doc, owner),
+                )
+            if row is not None and not row[2]:
+                return {"document": doc, "added": False, "rows": row[1] - row[0]}
+
+            doc_rows = rows if rows is not None else read_rows(doc)  # removed meanwhile
+            n = len(doc_rows["chunks"])
+            if n == 0:
+                return {"document": doc, "added": False, "rows": 0}
+            shard_id, key = self._open_shard(n, to_index)
+            positions = doc_rows["positions"] or [{} for _ in range(n)]
+            total = append_store(key, doc_rows["chunks"], doc_rows["embeddings"], positions)
+
+            self._conn.execute(
+                "INSERT INTO corpus_documents (corpus, doc, filename, shard, row_start, row_end, added, removed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 0) ON CONFLICT(corpus, doc) DO UPDATE SET"
+                " filename = excluded.filename, shard = excluded.shard, row_start = excluded.row_start,"
+                " row_end = excluded.row_end, added = excluded.added, removed = 0",
+                (self.name, doc, filename, shard_id, total - n, total, time.time()),
+            )
+            sealed = total >= self.shard_rows
+            self._conn.execute("UPDATE corpus_shards SET rows = ?, sealed = ? WHERE id = ?",
+                               (total, int(sealed), shard_id))
+            if sealed:
+                to_index.append(key)  # no more appends: worth an ANN index
+            metrics.inc("corpus_documents_added")
+            return {"document": doc, "added": True, "rows": n}
+
+        result = self._write(add)
+        for key in to_index:  # after commit, so the worker sees the sealed shard
+            self._schedule(("index", key), self._index_shard, key)
+        return result
+
+    def _open_shard(self, n: int, to_index: List[str]) -> tuple:
+        """
+        (id, key) of a shard with room for n rows; new shard when none has
+        (caller holds write lock). Keys of shards sealed here go to to_index.
+        """
+        row = self._conn.execute(
+            "SELECT id, key FROM corpus_shards WHERE corpus = ? AND sealed = 0 AND rows + ? <= ?"
+            " ORDER BY id LIMIT 1", (self.name, n, self.shard_rows),
+        ).fetchone()
+        if row is not None:
+            return row
+        # open shards that are nearly full will not fit many more documents: seal them
+        for shard_id, full_key in self._conn.execute(
+            "SELECT id, key FROM corpus_shards WHERE corpus = ? AND sealed = 0 AND rows * 10 >= ? * 9",
+            (self.name, self.shard_rows),
+        ).fetchall():
+            self._conn.execute("UPDATE corpus_shards SET sealed = 1 WHERE id = ?", (shard_id,))
+            to_index.append(full_key)
+        key = f"corpus-{self.name}-{uuid.uuid4().hex[:12]}"
+        cur = self._conn.execute(
+            "INSERT INTO corpus_shards (corpus, key, rows) VALUES (?, ?, 0)", (self.name, key)
+        )
+        return cur.lastrowid, key
+
+    def remove_document(self, doc: str, owner: Optional[str] = None) -> bool:
+        """
+        Tombstone a document's rows (compacting its shard in the background
+        if needed). With owner, only that owner's claim is dropped; rows go
+        once no owner is left. False if the document (or owner's claim) is
+        not in the corpus.
+        """
+        to_compact: List[int] = []
+
+        def remove():
+            row = self._conn.execute(
+                "SELECT shard, row_start, row_end FROM corpus_documents"
+                " WHERE corpus = ? AND doc = ? AND removed = 0", (self.name, doc),
+            ).fetchone()
+            if row is None:
+                return False
+            if owner is not None:
+                cur = self._conn.execute(
+                    "DELETE FROM corpus_owners WHERE corpus = ? AND doc = ? AND owner = ?",
+                    (self.name, doc, owner),
+                )
+                if cur.rowcount == 0:
+                    return False
+                if self._conn.execute("SELECT 1 FROM corpus_owners WHERE corpus = ? AND doc = ? LIMIT 1",
+                                      (self.name, doc)).fetchone():
+                    return True  # still used by other owners
+            shard_id, start, end = row
+            self._conn.execute("UPDATE corpus_documents SET removed = 1 WHERE corpus = ? AND doc = ?",
+                               (self.name, doc))
+            self._conn.execute("DELETE FROM corpus_owners WHERE corpus = ? AND doc = ?", (self.name, doc))
+            self._conn.execute("UPDATE corpus_shards SET deleted = deleted + ? WHERE id = ?",
+                               (end - start, shard_id))
+            rows, deleted = self._conn.execute(
+                "SELECT rows, deleted FROM corpus_shards WHERE id = ?", (shard_id,)
+            ).fetchone()
+            if deleted >= rows * CORPUS_COMPACT_RATIO:
+                to_compact.append(shard_id)
+            metrics.inc("corpus_documents_removed")
+            return True
+
+        removed = self._write(remove)
+        for shard_id in to_compact:
+            self._schedule(("compact", shard_id), self._compact, shard_id)
+        return removed
+
+    # background maintenance
+
+    def _schedule(self, job: tuple, fn, *args):
+        """Queue fn(*args) on the maintenance worker unless the same job is already queued."""
+        with self._lock:
+            if job in self._jobs:
+                return
+            self._jobs.add(job)
+
+        def run():
+            with self._lock:
+                self._jobs.discard(job)  # changes from here on queue a fresh run
+            try:
+                fn(*args)
+            except Exception:
+                metrics.inc("corpus_errors")  # shard stays exact / uncompacted until next time
+
+        future = _maintenance_pool.submit(run)
+        with self._lock:
+            self._futures = {f for f in self._futures if not f.done()} | {future}
+
+    def wait_maintenance(self, timeout: Optional[float] = None) -> bool:
+        """Block until queued indexing/compaction jobs are done (tests, shutdown hooks)."""
+        while True:
+            with self._lock:
+                pending = {f for f in self._futures if not f.done()}
+            if not pending:
+                return True
+            if wait(pending, timeout=timeout).not_done:
+                return False
+
+    def _index_shard(self, key: str):
+        """Train a sealed shard's ANN index outside the write lock, then attach it under it."""
+        built = train_store_index(key)  # no-op below VECTOR_INDEX_MIN_ROWS
+        if built is None:
+            return
+
+        def attach():
+            if self._conn.execute("SELECT 1 FROM corpus_shards WHERE key = ?", (key,)).fetchone():
+                attach_store_index(key, *built)  # else compacted away meanwhile
+
+        self._write(attach)
+
+    def _compact(self, shard_id: int):
+        """
+        Rewrite a shard with only its live rows. The copy (and index of a
+        sealed shard) is built outside the write lock from a snapshot of the
+        manifest; it is swapped in only if the shard did not change since,
+        otherwise thrown away and retried.
+        """
+        def snapshot():
+            shard = self._conn.execute(
+                "SELECT key, rows, deleted, sealed FROM corpus_shards WHERE id = ?", (shard_id,)
+            ).fetchone()
+            live = self._conn.execute(
+                "SELECT doc, row_start, row_end FROM corpus_documents"
+                " WHERE shard = ? AND removed = 0 ORDER BY row_start", (shard_id,),
+            ).fetchall()
+            return shard, live
+
+        with self._lock:
+            shard, live = snapshot()
+        if shard is None or shard[2] < shard[1] * CORPUS_COMPACT_RATIO:
+            return  # gone, or already compacted by another worker
+        key, _, _, sealed = shard
+
+        new_key = None
+        if live:
+            chunks, embeddings, positions = [], [], []
+            for doc, start, end in live:
+                rows = read_rows(key, start, end)
+                chunks.extend(rows["chunks"])
+                embeddings.extend(rows["embeddings"])
+                positions.extend(rows["positions"] or [{} for _ in rows["chunks"]])
+            new_key = f"corpus-{self.name}-{uuid.uuid4().hex[:12]}"
+            build_store(new_key, chunks, embeddings, positions=positions)
+            if sealed:
+                index_store(new_key)  # nobody else sees new_key yet: no lock needed
+
+        def swap():
+            if snapshot() != (shard, live):
+                return False  # appended to or removed from meanwhile
+            self._conn.execute("UPDATE corpus_documents SET shard = NULL WHERE shard = ? AND removed = 1",
+                               (shard_id,))
+            if new_key is None:
+                self._conn.execute("DELETE FROM corpus_shards WHERE id = ?", (shard_id,))
+                return True
+            offset = 0
+            for doc, start, end in live:
+                self._conn.execute(
+                    "UPDATE corpus_documents SET row_start = ?, row_end = ? WHERE corpus = ? AND doc = ?",
+                    (offset, offset + end - start, self.name, doc),
+                )
+                offset += end - start
+            self._conn.execute("UPDATE corpus_shards SET key = ?, rows = ?, deleted = 0 WHERE id = ?",
+                               (new_key, offset, shard_id))
+            return True
+
+        if self._write(swap):
+            delete_store(key)  # after commit: other processes now read the new shard
+            metrics.inc("corpus_compactions")
+            return
+        if new_key is not None:
+            delete_store(new_key)
+        self._schedule(("compact", shard_id), self._compact, shard_id)
+
+    # search
+
+    def _live_documents(self, documents: Optional[List[str]], owner: Optional[str]) -> List[tuple]:
+        sql = ("SELECT d.doc, d.filename, s.key, s.deleted, d.row_start, d.row_end"
+               " FROM corpus_documents d JOIN corpus_shards s ON s.id = d.shard"
+               " WHERE d.corpus = ? AND d.removed = 0")
+        args: List[Any] = [self.name]
+        if owner is not None:
+            sql += " AND d.doc IN (SELECT doc FROM corpus_owners WHERE corpus = ? AND owner = ?)"
+            args += [self.name, owner]
+        if documents is not None:
+            sql += f" AND d.doc IN ({','.join('?' * len(documents))})"
+            args += list(documents)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY s.id, d.row_start", args).fetchall()
+
+    def search(self, query_embeddings: List[List[float]], k: int = 5,
+               documents: Optional[List[str]] = None, owner: Optional[str] = None,
+               with_text: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Top-k chunks across the corpus, one list per query embedding:
+        [{"document", "filename", "chunk_id", "score", page/char fields, "text"?}, ...]
+
+        documents / owner restrict the search to those documents (exact
+        search over their rows); otherwise whole shards are searched, via
+        their ANN index when they have one and no tombstones.
+        """
+        if documents is not None and not documents:
+            return [[] for _ in query_embeddings]
+        rows = self._live_documents(documents, owner)
+        if not rows:
+            return [[] for _ in query_embeddings]
+
+        shards: Dict[str, Dict[str, Any]] = {}
+        for doc, filename, key, deleted, start, end in rows:
+            shard = shards.setdefault(key, {"starts": [], "docs": [], "ranges": [], "deleted": deleted})
+            shard["starts"].append(start)
+            shard["docs"].append((doc, filename, start))
+            shard["ranges"].append((start, end))
+
+        restricted = documents is not None or owner is not None
+
+        def search_shard(key: str) -> List[List[tuple]]:
+            shard = shards[key]
+            ranges = shard["ranges"] if restricted or shard["deleted"] else None
+            try:
+                return search_store(key, query_embeddings, k=k, row_ranges=ranges)
+            except (OSError, ValueError):
+                return [[] for _ in query_embeddings]  # shard compacted away mid-query
+
+        per_shard = dict(zip(shards, _search_pool.map(search_shard, list(shards))))
+        metrics.inc("corpus_searches")
+
+        results = []
+        for qi in range(len(query_embeddings)):
+            candidates = [(score, key, row) for key, hits in per_shard.items() for row, score in hits[qi]]
+            merged = []
+            for score, key, row in heapq.nlargest(k, candidates, key=lambda c: c[0]):
+                shard = shards[key]
+                i = bisect_right(shard["starts"], row) - 1
+                if i < 0 or row >= shard["ranges"][i][1]:
+                    continue  # row of no live document
+                doc, filename, start = shard["docs"][i]
+                hit = get_chunk(key, f"chunk-{row}") or {}
+                result = {"document": doc, "filename": filename,
+                          "chunk_id": f"chunk-{row - start}", "score": score}
+                result.update({f: hit[f] for f in POSITION_FIELDS if f in hit})
+                if with_text:
+                    result["text"] = hit.get("text", "")
+                merged.append(result)
+            results.append(merged)
+        return results
+
+    # inspection
+
+    def add_owner(self, doc: str, owner: str):
+        """
+        Record that owner uploaded doc without adding its rows to the corpus
+        (used when uploads are not shared through the corpus).
+        """
+        def add():
+            self._conn.execute(
+                "INSERT OR IGNORE INTO corpus_owners (corpus, doc, owner) VALUES (?, ?, ?)",
+                (self.name, doc, owner),
+            )
+
+        self._write(add)
+
+    def is_owner(self, doc: str, owner: Optional[str]) -> bool:
+        """True if owner uploaded doc (in this corpus or via add_owner)."""
+        if not owner:
+            return False
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM corpus_owners WHERE corpus = ? AND doc = ? AND owner = ?",
+                (self.name, doc, owner),
+            ).fetchone() is not None
+
+    def documents(self, owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = self._live_documents(None, owner)
+        return [{"document": doc, "filename": filename, "chunks": end - start}
+                for doc, filename, _, _, start, end in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            shards, rows, deleted = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(rows), 0), COALESCE(SUM(deleted), 0)"
+                " FROM corpus_shards WHERE corpus = ?", (self.name,),
+            ).fetchone()
+            documents = self._conn.execute(
+                "SELECT COUNT(*) FROM corpus_documents WHERE corpus = ? AND removed = 0", (self.name,)
+            ).fetchone()[0]
+        return {"corpus": self.name, "documents": documents, "shards": shards,
+                "rows": rows, "tombstoned_rows": deleted, "shard_rows": self.shard_rows}
+
+
+_corpora: Dict[str, CorpusIndex] = {}
+_corpora_lock = threading.Lock()
+
+
+def get_corpus(name: str = "default") -> CorpusIndex:
+    """Process-wide CorpusIndex per corpus name."""
+    with _corpora_lock:
+        if name not in _corpora:
+            _corpora[name] = CorpusIndex(name)
+        return _corpora[name]
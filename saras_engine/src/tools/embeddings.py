@@ -1,40 +1,33 @@
-import requests
-import os
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Dict
+
+from saras_engine.src.services.gemini_client import EMBED_BATCH_LIMIT, EMBED_MODEL
+from saras_engine.src.services.embedding_cache import cached_embed
+from saras_engine.src.services.embedding_executor import EMBED_CONCURRENCY, get_executor
+
+EMBED_DIM = 768  # text-embedding-004
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-EMBED_URL = (
-    "https://generativelanguage.googleapis.com/v1/models/"
-    "text-embedding-004:embedContent?key=" + GOOGLE_API_KEY
-)
 
     
 # 1) Embed a single text
     
 def embed_one(text: str) -> List[float]:
-    body = {
-        "model": "text-embedding-004",
-        "content": {"parts": [{"text": text}]}
-    }
+    vectors = cached_embed(EMBED_MODEL, [text], get_executor().embed)["vectors"]
+    if not vectors[0]:
+        raise RuntimeError("Embedding request failed.")
 
-    r = requests.post(EMBED_URL, json=body, timeout=20)
-    r.raise_for_status()
-    data = r.json()
-
-    return data["embedding"]["values"]  # ALWAYS 768 dims
+    return vectors[0]  # ALWAYS 768 dims
 
 
     
 # 2) Embed a list of texts
+#    batched (one HTTP call per 100 texts), batches run concurrently
+#    through the shared rate-limited executor; cached texts skip the API
     
 def embed_texts(text_list: List[str]) -> List[List[float]]:
-    vectors = []
-    for text in text_list:
-        try:
-            vectors.append(embed_one(text))
-        except Exception:
-            vectors.append([0.0] * 768)  # SAFE fallback
-    return vectors
+    vectors = cached_embed(EMBED_MODEL, text_list, get_executor().embed)["vectors"]
+    # SAFE fallback for texts whose batch failed
+    return [vec if vec else [0.0] * EMBED_DIM for vec in vectors]
 
 
     
@@ -42,3 +35,51 @@ def embed_texts(text_list: List[str]) -> List[List[float]]:
     
 def embeddings_for_document_bytes(doc_bytes: bytes, chunks: List[str]):
     return embed_texts(chunks)
+
+
+    
+# 4) Embed chunks while they are still being produced
+#    (e.g. chunks of a PDF that is still being parsed)
+
+_stream_pool = ThreadPoolExecutor(max_workers=max(1, EMBED_CONCURRENCY), thread_name_prefix="saras-embed-stream")
+
+
+def embed_stream(chunks: Iterable[str], batch_size: int = EMBED_BATCH_LIMIT) -> Dict[str, Any]:
+    """
+    Consume `chunks` and embed them in batches as they arrive, so embedding
+    overlaps with whatever produces the chunks.
+
+    Returns {"chunks": [...], "vectors": [...]} in input order. Leading
+    blank chunks are held back until real text shows up, so a blank
+    document never reaches the API.
+    """
+    collected: List[str] = []
+    futures = []
+    submitted = 0
+    has_text = False
+
+    def flush(upto: int):
+        nonlocal submitted
+        while submitted < upto:
+            batch = collected[submitted:min(submitted + batch_size, upto)]
+            futures.append(_stream_pool.submit(embed_texts, batch))
+            submitted += len(batch)
+
+    try:
+        for chunk in chunks:
+            collected.append(chunk)
+            has_text = has_text or bool(chunk.strip())
+            if has_text and len(collected) - submitted >= batch_size:
+                flush(len(collected))
+        if has_text:
+            flush(len(collected))
+    except BaseException:
+        for fut in futures:
+            fut.cancel()
+        raise
+
+    vectors: List[List[float]] = []
+    for fut in futures:
+        vectors.extend(fut.result())
+    return {"chunks": collected, "vectors": vectors}
+
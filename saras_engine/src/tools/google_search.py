@@ -1,24 +1,208 @@
-from typing import Dict
-
-def search(query: str, api_key: str = None, use_real: bool = False) -> Dict:
-    if not use_real:
-        # Mocked deterministic response useful for Kaggle demo and offline testing
-        return {
-            "query": query,
-            "results": [
-                {"title": "AI agents revolutionize enterprises",
-                 "snippet": "AI agents improve automation, reduce costs, and boost efficiency.",
-                 "url": "https://example.com/ai-agents"},
-                {"title": "Enterprise automation using AI",
-                 "snippet": "Companies use agent-based systems for dynamic problem solving.",
-                 "url": "https://example.com/enterprise-ai"}
-            ],
-            "top_snippet": "AI agents improve automation, reduce costs, and boost efficiency."
-        }
-
-    # Important operation:
-    # Placeholder for a real search call. Implementers must:
-    # 1) Use requests or official SDK,
-    # 2) Pass api_key via secure method (do NOT hardcode),
-    # 3) Handle rate limits, retries, and errors.
-    raise NotImplementedError("Real search not implemented. Set use_real=False for mock.")
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from saras_engine.src.observability.metrics import metrics
+from saras_engine.src.services import http_client
+from saras_engine.src.services.http_client import call_with_retry
+
+# Provider selection: "mock" (deterministic, offline) or "google" (Custom Search JSON API)
+SEARCH_PROVIDER = os.getenv("SEARCH_PROVIDER", "mock").lower()
+GOOGLE_SEARCH_API_KEY = os.getenv("GOOGLE_SEARCH_API_KEY")
+GOOGLE_SEARCH_CX = os.getenv("GOOGLE_SEARCH_CX")
+# Override to point at a local stand-in server in tests
+GOOGLE_SEARCH_BASE_URL = os.getenv("GOOGLE_SEARCH_BASE_URL", "https://www.googleapis.com/customsearch/v1")
+
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "4"))
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", "2"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "900"))  # seconds
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+_MOCK_RESULTS = [
+    {"title": "AI agents revolutionize enterprises",
+     "snippet": "AI agents improve automation, reduce costs, and boost efficiency.",
+     "url": "https://example.com/ai-agents"},
+    {"title": "Enterprise automation using AI",
+     "snippet": "Companies use agent-based systems for dynamic problem solving.",
+     "url": "https://example.com/enterprise-ai"}
+]
+
+
+
+# PROVIDERS
+# A provider returns [{"title", "snippet", "url"}, ...] for one query and
+# raises on transport/HTTP errors.
+
+class SearchProvider(ABC):
+    name = "base"
+
+    @abstractmethod
+    def search(self, query: str, num: int = 5) -> List[Dict[str, str]]:
+        """Up to num results for query."""
+
+
+class MockSearchProvider(SearchProvider):
+    """Mocked deterministic response useful for Kaggle demo and offline testing."""
+    name = "mock"
+
+    def search(self, query: str, num: int = 5) -> List[Dict[str, str]]:
+        return [dict(r) for r in _MOCK_RESULTS[:num]]
+
+
+class GoogleSearchProvider(SearchProvider):
+    """
+    Google Custom Search JSON API over the shared keep-alive pool.
+
+    Important:
+    - api_key / cx come from the environment, never from code.
+    - 429/5xx and network errors are retried with jittered backoff.
+    """
+    name = "google"
+
+    def __init__(self, api_key: Optional[str] = None, cx: Optional[str] = None,
+                 base_url: str = GOOGLE_SEARCH_BASE_URL):
+        self.api_key = api_key or GOOGLE_SEARCH_API_KEY
+        self.cx = cx or GOOGLE_SEARCH_CX
+        self.base_url = base_url
+        if not self.api_key or not self.cx:
+            raise ValueError("Real search needs GOOGLE_SEARCH_API_KEY and GOOGLE_SEARCH_CX.")
+
+    def search(self, query: str, num: int = 5) -> List[Dict[str, str]]:
+        params = {"key": self.api_key, "cx": self.cx, "q": query, "num": max(1, min(num, 10))}
+
+        def call():
+            r = http_client.get(self.base_url, params=params, timeout=SEARCH_TIMEOUT)
+            r.raise_for_status()
+            return r.json()
+
+        metrics.inc("search_requests")
+        data = call_with_retry(call, SEARCH_MAX_RETRIES, metric="search_retries")
+        return [
+            {"title": item.get("title", ""), "snippet": item.get("snippet", ""), "url": item.get("link", "")}
+            for item in data.get("items", [])
+        ]
+
+
+def get_provider(use_real: Optional[bool] = None, api_key: Optional[str] = None) -> SearchProvider:
+    """use_real=None follows SEARCH_PROVIDER; True/False force google/mock."""
+    real = SEARCH_PROVIDER == "google" if use_real is None else use_real
+    return GoogleSearchProvider(api_key=api_key) if real else MockSearchProvider()
+
+
+
+# RESULT CACHE
+
+class _SearchCache:
+    """Per-query TTL cache with LRU eviction (thread-safe)."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str, int], Tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, int]) -> Optional[List[Dict[str, str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                metrics.inc("search_cache_misses")
+                return None
+            self._entries.move_to_end(key)
+            metrics.inc("search_cache_hits")
+            return [dict(r) for r in entry[1]]
+
+    def put(self, key: Tuple[str, str, int], results: List[Dict[str, str]]):
+        with self._lock:
+            self._entries[key] = (time.time(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = _SearchCache(SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES)
+_pool = ThreadPoolExecutor(max_workers=max(1, SEARCH_CONCURRENCY), thread_name_prefix="saras-search")
+
+
+def clear_cache():
+    _cache.clear()
+
+
+
+# FAN-OUT SEARCH
+
+def _normalize_url(url: str) -> str:
+    """Dedup key: lowercase scheme/host, no fragment, no trailing slash."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def _search_one(provider: SearchProvider, query: str, num: int) -> Dict[str, Any]:
+    key = (provider.name, " ".join(query.lower().split()), num)
+    cached = _cache.get(key)
+    if cached is not None:
+        return {"results": cached, "error": None}
+    try:
+        results = provider.search(query, num)
+    except Exception as e:
+        metrics.inc("errors")
+        return {"results": [], "error": f"{query}: {e}"}
+    _cache.put(key, results)
+    return {"results": results, "error": None}
+
+
+def search_many(queries: List[str], num: int = 5, provider: Optional[SearchProvider] = None) -> Dict[str, Any]:
+    """
+    Run several sub-queries in parallel and merge their results.
+
+    Results are interleaved by rank (1st of each query, then 2nd, ...) and
+    de-duplicated by URL. A failing sub-query only adds to "errors".
+    """
+    provider = provider or get_provider()
+    queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+
+    if len(queries) == 1:
+        outcomes = [_search_one(provider, queries[0], num)]
+    else:
+        outcomes = list(_pool.map(lambda q: _search_one(provider, q, num), queries))
+
+    merged: List[Dict[str, str]] = []
+    seen = set()
+    for rank in range(max((len(o["results"]) for o in outcomes), default=0)):
+        for outcome in outcomes:
+            if rank >= len(outcome["results"]):
+                continue
+            result = outcome["results"][rank]
+            url_key = _normalize_url(result.get("url", "")) or result.get("title", "")
+            if url_key in seen:
+                continue
+            seen.add(url_key)
+            merged.append(result)
+
+    return {
+        "query": queries[0] if queries else "",
+        "queries": queries,
+        "provider": provider.name,
+        "results": merged,
+        "top_snippet": merged[0]["snippet"] if merged else "",
+        "errors": [o["error"] for o in outcomes if o["error"]],
+    }
+
+
+def search(query: str, api_key: str = None, use_real: Optional[bool] = None) -> Dict:
+    """
+    Single-query search (same response shape as search_many).
+    use_real=None follows SEARCH_PROVIDER; False is always the offline mock.
+    """
+    return search_many([query], provider=get_provider(use_real, api_key))
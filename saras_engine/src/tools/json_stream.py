@@ -0,0 +1,216 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Top-level array fields of the WriterAgent JSON whose items are emitted one by one
+STREAMED_ARRAYS = ("sections", "citations")
+# Top-level string fields emitted once their closing quote arrives
+STREAMED_FIELDS = ("summary", "final_text")
+
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERAL_CHARS = set("-+.0123456789eEtrufalsn")
+
+
+class IncrementalJSONParser:
+    """
+    Single-pass, incremental scanner for the WriterAgent JSON object.
+
+    Important:
+    - feed() only scans the newly arrived text, so total work is linear.
+    - Each item of "sections"/"citations" is emitted as soon as its closing
+      brace arrives; "summary"/"final_text" as soon as their string closes.
+    - result() returns the full object, repairing truncated output (e.g. the
+      model hit maxOutputTokens) instead of discarding the structure.
+    - Text before the first "{" (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+
+        # stack of [bracket, expect]; expect is key/colon/value/comma
+        self._stack: List[List[Optional[str]]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._literal_start: Optional[int] = None
+
+        self._root_key: Optional[str] = None       # last key seen at depth 1
+        self._array_key: Optional[str] = None      # streamed array being scanned
+        self._item_start: Optional[int] = None
+        self._item_index = {k: 0 for k in STREAMED_ARRAYS}
+
+        # last position where the prefix can be closed into valid JSON
+        self._checkpoint: Optional[Tuple[int, List[str]]] = None
+
+    # scanning
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add streamed text; return the events completed by it."""
+        self._buf += text
+        events: List[Dict[str, Any]] = []
+        buf = self._buf
+
+        while self._pos < len(buf) and self._root_end is None:
+            i = self._pos
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(i, events)
+                self._pos += 1
+                continue
+
+            if self._literal_start is not None:
+                if ch in _LITERAL_CHARS:
+                    self._pos += 1
+                    continue
+                self._literal_start = None
+                self._value_done(i)
+
+            if self._root_start is None:
+                if ch == "{":
+                    self._root_start = i
+                    self._open("{", i)
+                self._pos += 1
+                continue
+
+            if ch in "{[":
+                self._open(ch, i)
+            elif ch in "}]":
+                self._close(i, events)
+            elif ch == '"':
+                top = self._stack[-1]
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = top[0] == "{" and top[1] == "key"
+            elif ch == ":":
+                self._stack[-1][1] = "value"
+            elif ch == ",":
+                top = self._stack[-1]
+                top[1] = "key" if top[0] == "{" else "value"
+            elif ch in _LITERAL_CHARS:
+                self._literal_start = i
+
+            self._pos += 1
+
+        return events
+
+    def _open(self, bracket: str, i: int):
+        depth = len(self._stack)
+        if depth == 1 and bracket == "[" and self._root_key in STREAMED_ARRAYS:
+            self._array_key = self._root_key
+        elif depth == 2 and bracket == "{" and self._array_key:
+            self._item_start = i
+
+        self._stack.append([bracket, "key" if bracket == "{" else "value"])
+        self._checkpoint = (i + 1, [b for b, _ in self._stack])
+
+    def _close(self, i: int, events: List[Dict[str, Any]]):
+        self._stack.pop()
+        depth = len(self._stack)
+
+        if depth == 0:
+            self._root_end = i + 1
+            return
+        if depth == 2 and self._array_key and self._item_start is not None:
+            item = _loads(self._buf[self._item_start:i + 1])
+            if item is not None:
+                kind = self._array_key[:-1]  # sections -> section
+                events.append({"event": kind, "index": self._item_index[self._array_key], kind: item})
+                self._item_index[self._array_key] += 1
+            self._item_start = None
+        elif depth == 1:
+            self._array_key = None
+
+        self._value_done(i + 1)
+
+    def _end_string(self, i: int, events: List[Dict[str, Any]]):
+        depth = len(self._stack)
+        if self._string_is_key:
+            if depth == 1:
+                self._root_key = _loads(self._buf[self._string_start:i + 1])
+            self._stack[-1][1] = "colon"
+            return
+
+        if depth == 1 and self._root_key in STREAMED_FIELDS:
+            value = _loads(self._buf[self._string_start:i + 1])
+            if value is not None:
+                events.append({"event": self._root_key, "text": value})
+        self._value_done(i + 1)
+
+    def _value_done(self, end: int):
+        self._stack[-1][1] = "comma"
+        self._checkpoint = (end, [b for b, _ in self._stack])
+
+    # results
+
+    @property
+    def complete(self) -> bool:
+        return self._root_end is not None
+
+    def result(self) -> Optional[Any]:
+        """
+        Parsed object: exact when the JSON is complete, otherwise the
+        best-effort repair of the truncated prefix. None if nothing usable.
+        """
+        if self._root_start is None:
+            return None
+        if self._root_end is not None:
+            return _loads(self._buf[self._root_start:self._root_end])
+
+        text = self._buf[self._root_start:]
+        closers = "".join(_CLOSERS[b] for b, _ in reversed(self._stack))
+
+        # 1) cut inside a string value: keep the partial text and close it
+        if self._in_string and not self._string_is_key:
+            partial = self._buf[self._root_start:]
+            if self._escape:
+                partial = partial[:-1]
+            partial = _drop_partial_unicode_escape(partial)
+            repaired = _loads(partial + '"' + closers)
+            if repaired is not None:
+                return repaired
+
+        # 2) cut right after a literal (number/true/false/null)
+        if self._literal_start is not None:
+            repaired = _loads(text + closers)
+            if repaired is not None:
+                return repaired
+
+        # 3) fall back to the last point where the prefix was a valid value
+        if self._checkpoint is not None:
+            end, stack = self._checkpoint
+            prefix = self._buf[self._root_start:end]
+            return _loads(prefix + "".join(_CLOSERS[b] for b in reversed(stack)))
+
+        return None
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _drop_partial_unicode_escape(text: str) -> str:
+    """Remove a trailing, incomplete \\uXXXX escape."""
+    cut = text.rfind("\\u")
+    if cut != -1 and len(text) - cut < 6:
+        return text[:cut]
+    return text
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """Parse possibly truncated or fenced JSON text (see IncrementalJSONParser)."""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.result()
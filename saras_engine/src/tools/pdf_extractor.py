@@ -1,36 +1,137 @@
-from typing import Dict, Any
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
 
-def extract_text_or_fail(file_bytes: bytes) -> Dict[str, Any]:
+# Documents with at least this many pages are split into page ranges and
+# decoded in a process pool (PDF_WORKERS processes; 0/1 disables it)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "32"))
+
+
+class PDFExtractionError(Exception):
+    """Raised by iter_pages; code is the error string returned to clients."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+    def __reduce__(self):
+        # raised inside pool workers: must survive pickling back to the parent
+        return type(self), (self.code, self.message)
+
+
+
+# PAGE DECODING
+
+def _open(file_bytes: bytes):
     try:
         import fitz  # PyMuPDF
     except Exception:
-        return {
-            "error": "pymupdf_missing",
-            "message": "PyMuPDF (fitz) is not installed. Install: pip install pymupdf"
-        }
+        raise PDFExtractionError(
+            "pymupdf_missing", "PyMuPDF (fitz) is not installed. Install: pip install pymupdf"
+        )
+    try:
+        return fitz.open(stream=file_bytes, filetype="pdf")
+    except Exception as e:
+        raise PDFExtractionError("pdf_open_failed", f"Failed to open PDF: {str(e)}")
+
 
+def _extract_range(file_bytes: bytes, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) (runs inside pool workers)."""
+    doc = _open(file_bytes)
     try:
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
+        return [doc[i].get_text() for i in range(start, stop)]
     except Exception as e:
-        return {
-            "error": "pdf_open_failed",
-            "message": f"Failed to open PDF: {str(e)}"
-        }
+        raise PDFExtractionError("pdf_read_failed", f"Error reading PDF: {str(e)}")
+    finally:
+        doc.close()
 
-    full_text = ""
-    pages = []
 
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Shared process pool, created on first large document.
+    spawn, not fork: the server process has live threads and sockets.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def iter_pages(file_bytes: bytes, workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield {"page", "text"} in page order as pages are decoded.
+
+    Important:
+    - Small documents are decoded in-process, one page at a time, so the
+      caller can chunk/embed early pages while later ones are parsed.
+    - Large documents (>= PDF_PARALLEL_MIN_PAGES) are split into ranges
+      decoded in a process pool; each range is yielded as soon as it and
+      all earlier ranges are done.
+    - Raises PDFExtractionError (pymupdf_missing / pdf_open_failed / pdf_read_failed).
+    """
+    workers = PDF_WORKERS if workers is None else workers
+    doc = _open(file_bytes)
+
+    try:
+        page_count = doc.page_count
+        if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+            for i in range(page_count):
+                yield {"page": i + 1, "text": doc[i].get_text()}
+            return
+    except PDFExtractionError:
+        raise
+    except Exception as e:
+        raise PDFExtractionError("pdf_read_failed", f"Error reading PDF: {str(e)}")
+    finally:
+        doc.close()
+
+    pool = _get_pool() if workers == PDF_WORKERS else ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    step = max(1, PDF_PAGES_PER_TASK)
+    futures = [pool.submit(_extract_range, file_bytes, start, min(start + step, page_count))
+               for start in range(0, page_count, step)]
     try:
-        for i, page in enumerate(doc):
-            text = page.get_text()
-            pages.append({"page": i + 1, "text": text})
-            full_text += text + "\n"
+        page = 0
+        for future in futures:
+            for text in future.result():
+                page += 1
+                yield {"page": page, "text": text}
+    except PDFExtractionError:
+        raise
     except Exception as e:
+        raise PDFExtractionError("pdf_read_failed", f"Error reading PDF: {str(e)}")
+    finally:
+        for future in futures:
+            future.cancel()  # consumer stopped early or a range failed
+        if pool is not _pool:
+            pool.shutdown(wait=False)
+
+
+
+# WHOLE-DOCUMENT EXTRACTION
+
+def extract_text_or_fail(file_bytes: bytes) -> Dict[str, Any]:
+    try:
+        pages = list(iter_pages(file_bytes))
+    except PDFExtractionError as e:
         return {
-            "error": "pdf_read_failed",
-            "message": f"Error reading PDF: {str(e)}"
+            "error": e.code,
+            "message": e.message
         }
 
+    full_text = "".join(p["text"] + "\n" for p in pages)
+
     if not full_text.strip():
         return {
             "error": "pdf_empty",
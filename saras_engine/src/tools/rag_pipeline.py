@@ -2,8 +2,8 @@ from typing import Dict, Any, List
 import uuid
 import numpy as np
 
-from saras_engine.src.tools.pdf_extractor import extract_text
-from saras_engine.src.tools.chunker import chunk_text
+from saras_engine.src.tools.pdf_extractor import PDFExtractionError, iter_pages
+from saras_engine.src.tools.chunker import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, iter_sentence_chunks
 from saras_engine.src.tools.embeddings import embed_texts
 from saras_engine.src.tools.vector_store import build_index, persist_index, search_index, load_index
 
@@ -14,31 +14,33 @@ def run_rag_pipeline(file_bytes: bytes, filename: str, query: str, top_k: int =
     {
       "final_answer_context": str,         # concatenated retrieved passages
       "sources": [ {chunk metadata...} ],
-      "store_name": str                   # name used for persisted index (optional)
+      "store_name": str,                  # name used for persisted index (optional)
+      "error": str | None                 # extraction error code
     }
     Important operation: store_name uses a uuid so multiple uploads don't conflict.
+    Reload a persisted index with load_index(store_name).
     """
-    # 1) Extract text from file
-    text = extract_text(file_bytes, filename)
-
-    # 2) Chunk text
-    chunks = chunk_text(text, chunk_size=1000, overlap=200)  # tunable
+    # 1) Extract + 2) chunk (sentence-aware, token-bounded, streamed page by page)
+    try:
+        chunks = list(iter_sentence_chunks(iter_pages(file_bytes), CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS))
+    except PDFExtractionError as e:
+        return {"final_answer_context": "", "sources": [], "store_name": None, "error": e.code}
     chunk_texts = [c["text"] for c in chunks]
 
     # When no text produced, return empty result gracefully
     if not chunk_texts:
-        return {"final_answer_context": "", "sources": [], "store_name": None}
+        return {"final_answer_context": "", "sources": [], "store_name": None, "error": None}
 
     # 3) Embed chunks
-    embeddings = embed_texts(chunk_texts)  # numpy (n,d) float32
+    embeddings = np.asarray(embed_texts(chunk_texts), dtype=np.float32)  # (n, d)
 
-    # 4) Build FAISS index
+    # 4) Build ANN index (FAISS when installed, NumPy IVF otherwise)
     index = build_index(embeddings)
 
     # 5) Persist index & metadatas to disk for debugging / retrieval
     store_name = f"store_{uuid.uuid4().hex[:8]}"
-    # store metadata per vector (chunk_id, text, extra)
-    metadatas = [{"chunk_id": c["chunk_id"], "text_excerpt": c["text"][:500], "start": c["start_char"], "end": c["end_char"]} for c in chunks]
+    # store metadata per vector (chunk_id, text, position)
+    metadatas = [dict(c, chunk_id=f"chunk-{i}") for i, c in enumerate(chunks)]
     persist_index(index, metadatas, store_name)
 
     # 6) Embed query and search
@@ -55,10 +57,12 @@ def run_rag_pipeline(file_bytes: bytes, filename: str, query: str, top_k: int =
             sources.append({
                 "chunk_id": meta["chunk_id"],
                 "score": float(dist_list[i]),
-                "text_excerpt": meta["text_excerpt"]
+                "page_start": meta["page_start"],
+                "page_end": meta["page_end"],
+                "text_excerpt": meta["text"][:500]
             })
 
-    # 8) Build final_answer_context (concatenate top-k excerpts)
-    final_context = "\n\n".join([s["text_excerpt"] for s in sources[:top_k]])
+    # 8) Build final_answer_context (concatenate top-k chunks)
+    final_context = "\n\n".join([metadatas[int(i)]["text"] for i in indices[0] if i >= 0][:top_k])
 
-    return {"final_answer_context": final_context, "sources": sources, "store_name": store_name}
+    return {"final_answer_context": final_context, "sources": sources, "store_name": store_name, "error": None}
@@ -1,7 +1,8 @@
-import requests
 import os
 from typing import Any, Dict, Callable
 
+from saras_engine.src.services import http_client
+
 # Important operation: decide default mode using environment variable (MCP usage)
 USE_MCP = os.getenv("USE_MCP", "false").lower() in ("1", "true", "yes")
 MCP_BASE = os.getenv("MCP_BASE", "http://127.0.0.1:8000")  # default MCP local dev server
@@ -18,7 +19,7 @@ def call_mcp(tool_name: str, payload: Dict, timeout: int = 15) -> Dict:
     """Important operation: call MCP server endpoint for the given tool name."""
     url = f"{MCP_BASE}/tools/{tool_name}"
     try:
-        resp = requests.post(url, json=payload, timeout=timeout)
+        resp = http_client.post(url, json=payload, timeout=timeout)
         return resp.json()
     except Exception as e:
         # Important operation: convert network error into structured dict for agent handling
@@ -0,0 +1,275 @@
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    import faiss  # optional: faster IVF training/search
+except ImportError:
+    faiss = None
+
+# "auto" uses FAISS when installed, "numpy" / "faiss" force a backend
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "auto").lower()
+VECTOR_INDEX_NLIST = int(os.getenv("VECTOR_INDEX_NLIST", "0"))    # 0 = ~sqrt(rows)
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "0"))  # 0 = ~nlist / 4, at least 16
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64  # training rows per centroid
+ASSIGN_BATCH = 8192          # rows per assignment matmul
+
+# Inverted-file (IVF) index over L2-normalized vectors: rows are clustered
+# by spherical k-means and a query only scores the rows of its nprobe
+# closest clusters. Scores are exact inner products (= cosine) for those
+# rows, so results only differ from brute force when a true neighbour sits
+# in a cluster that was not probed.
+
+
+def default_nlist(rows: int) -> int:
+    return VECTOR_INDEX_NLIST or max(1, int(np.sqrt(rows)))
+
+
+def default_nprobe(nlist: int) -> int:
+    # embeddings that do not cluster well need many lists for good recall
+    return min(nlist, VECTOR_INDEX_NPROBE or max(16, nlist // 4))
+
+
+def _use_faiss() -> bool:
+    if VECTOR_INDEX_BACKEND == "faiss" and faiss is None:
+        raise RuntimeError("VECTOR_INDEX_BACKEND=faiss requires the 'faiss' package.")
+    return faiss is not None and VECTOR_INDEX_BACKEND in ("auto", "faiss")
+
+
+def _pad(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """FAISS convention: missing results have id -1 and score -inf."""
+    out_scores = np.full(k, -np.inf, dtype=np.float32)
+    out_ids = np.full(k, -1, dtype=np.int64)
+    out_scores[:len(scores)] = scores
+    out_ids[:len(ids)] = ids
+    return out_scores, out_ids
+
+
+
+# EXACT (FLAT) INDEX
+
+class FlatIndex:
+    """
+    Exact inner-product search behind the IVF interface, for collections
+    too small for IVF to pay off (and where probing loses recall).
+    Keeps a reference to the vectors; nothing is persisted.
+    """
+
+    kind = "flat"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @property
+    def nlist(self) -> int:
+        return 1
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+    def all_vectors(self) -> np.ndarray:
+        return np.asarray(self.vectors)
+
+    def rebind(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def search(self, queries: np.ndarray, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        scores = queries @ np.asarray(self.vectors).T
+        all_scores = np.empty((len(queries), k), dtype=np.float32)
+        all_ids = np.empty((len(queries), k), dtype=np.int64)
+        for qi, row in enumerate(scores):
+            top = np.argpartition(-row, k - 1)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(-row[top])]
+            all_scores[qi], all_ids[qi] = _pad(row[top], top, k)
+        return all_scores, all_ids
+
+
+
+# NUMPY BACKEND
+
+class IVFIndex:
+    """
+    Pure-NumPy IVF index.
+
+    Important:
+    - Does not copy the vectors: it keeps a reference to the (normalized)
+      matrix it was built on, which may be a memmap of a vector store.
+    - Only centroids and the row -> list layout are persisted.
+    """
+
+    kind = "ivf-numpy"
+
+    def __init__(self, vectors: np.ndarray, centroids: np.ndarray,
+                 list_ids: np.ndarray, list_offsets: np.ndarray):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_ids = list_ids          # row ids grouped by list
+        self.list_offsets = list_offsets  # list i = list_ids[offsets[i]:offsets[i + 1]]
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.list_ids.shape[0])
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.centroids.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        return self.centroids.nbytes + self.list_ids.nbytes + self.list_offsets.nbytes
+
+    def all_vectors(self) -> np.ndarray:
+        return np.asarray(self.vectors)
+
+    def rebind(self, vectors: np.ndarray):
+        """Point at a copy of the same rows (e.g. a cached store that grew)."""
+        self.vectors = vectors
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: Optional[int] = None, seed: int = 0) -> "IVFIndex":
+        n = vectors.shape[0]
+        nlist = max(1, min(nlist or default_nlist(n), n))
+        rng = np.random.default_rng(seed)
+
+        # spherical k-means on a sample
+        sample_size = min(n, nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]  # reseed empty lists
+            centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True).clip(min=1e-12)
+
+        assign = np.concatenate([
+            np.argmax(np.asarray(vectors[i:i + ASSIGN_BATCH]) @ centroids.T, axis=1)
+            for i in range(0, n, ASSIGN_BATCH)
+        ])
+        list_ids = np.argsort(assign, kind="stable").astype(np.int64)
+        list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        list_offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+        return cls(vectors, centroids.astype(np.float32), list_ids, list_offsets)
+
+    def search(self, queries: np.ndarray, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """queries (q, dim), normalized -> (scores (q, k), ids (q, k)), best first."""
+        nprobe = min(self.nlist, nprobe or default_nprobe(self.nlist))
+        probe = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :nprobe]
+
+        all_scores = np.empty((len(queries), k), dtype=np.float32)
+        all_ids = np.empty((len(queries), k), dtype=np.int64)
+        for qi, lists in enumerate(probe):
+            rows = np.concatenate([self.list_ids[self.list_offsets[l]:self.list_offsets[l + 1]] for l in lists])
+            rows.sort()  # sequential reads from a memmap
+            scores = np.asarray(self.vectors[rows]) @ queries[qi]
+            top = np.argsort(-scores, kind="stable")[:k] if len(scores) <= k else \
+                np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            all_scores[qi], all_ids[qi] = _pad(scores[top], rows[top], k)
+        return all_scores, all_ids
+
+    def save(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(f, centroids=self.centroids, list_ids=self.list_ids, list_offsets=self.list_offsets)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, vectors: np.ndarray) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(vectors, data["centroids"], data["list_ids"], data["list_offsets"])
+
+
+
+# FAISS BACKEND
+
+class FaissIVFIndex:
+    """faiss.IndexIVFFlat (inner product) behind the IVFIndex interface; holds its own vector copy."""
+
+    kind = "ivf-faiss"
+
+    def __init__(self, index):
+        self.index = index
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal)
+
+    @property
+    def nlist(self) -> int:
+        return int(self.index.nlist)
+
+    @property
+    def dim(self) -> int:
+        return int(self.index.d)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ntotal * self.index.d * 4
+
+    def rebind(self, vectors: np.ndarray):
+        pass  # FAISS keeps its own copy
+
+    def all_vectors(self) -> np.ndarray:
+        self.index.make_direct_map()  # IVF lists are not addressable by id otherwise
+        return self.index.reconstruct_n(0, self.ntotal)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: Optional[int] = None, seed: int = 0) -> "FaissIVFIndex":
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        n, dim = matrix.shape
+        nlist = max(1, min(nlist or default_nlist(n), n))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.cp.seed = seed
+        index.train(matrix)
+        index.add(matrix)
+        return cls(index)
+
+    def search(self, queries: np.ndarray, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        self.index.nprobe = min(self.nlist, nprobe or default_nprobe(self.nlist))
+        scores, ids = self.index.search(np.ascontiguousarray(queries, dtype=np.float32), k)
+        scores[ids < 0] = -np.inf
+        return scores, ids.astype(np.int64)
+
+    def save(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        faiss.write_index(self.index, str(tmp))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, vectors: np.ndarray = None) -> "FaissIVFIndex":
+        return cls(faiss.read_index(str(path)))
+
+
+
+# FACTORY
+
+INDEX_TYPES = {IVFIndex.kind: IVFIndex, FaissIVFIndex.kind: FaissIVFIndex}
+
+
+def build_ivf(vectors: np.ndarray, nlist: Optional[int] = None):
+    """IVF index over normalized vectors, FAISS-backed when available."""
+    return (FaissIVFIndex if _use_faiss() else IVFIndex).build(vectors, nlist)
+
+
+def load_ivf(kind: str, path: Path, vectors: np.ndarray):
+    if kind == FaissIVFIndex.kind and faiss is None:
+        raise RuntimeError("Index was built with FAISS, which is not installed.")
+    return INDEX_TYPES[kind].load(path, vectors)
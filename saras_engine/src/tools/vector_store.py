@@ -1,24 +1,66 @@
 import os
 import json
+import threading
 import numpy as np
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any
-from scipy.spatial.distance import cosine
+from typing import List, Dict, Any, Optional
+
+from saras_engine.src.observability.metrics import metrics
+from saras_engine.src.tools.vector_index import FlatIndex, build_ivf, load_ivf
 
 # Root directory for persistent vector stores
 BASE_DIR = Path(__file__).resolve().parents[3]  # backend/saras_engine_integration/...
 STORE_DIR = BASE_DIR / "vector_stores"
 STORE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Binary store layout (one set of files per key):
+#   <key>.vec        raw float32 matrix, row-major, shape (count, dim)
+#   <key>.txt        concatenated UTF-8 chunk texts
+#   <key>.off        raw int64 byte offsets into .txt, length count + 1
+#   <key>.pos        optional raw int64 (count, 4): page_start, page_end,
+#                    start_char, end_char of each chunk in the source document
+#   <key>.ivf        optional ANN index (see vector_index.py), used by queries
+#                    once the meta file names it ("index": kind)
+#   <key>.meta.json  {"format": 2, "dim": ..., "count": ..., "normalized": true,
+#                     "positions": bool, "index": kind | absent,
+#                     "index_rows": rows covered by the index (later rows
+#                     are appended ones, searched exactly)}
+# Rows are L2-normalized at build time, so cosine similarity is a dot product.
+# The meta file is written last, so a store only becomes visible once complete.
+# Format 1 is the old single-file JSON store (<key>.json), still readable.
+STORE_FORMAT = 2
+
+# Upper bound for stores held in RAM by the LRU cache (bytes, not entries)
+CACHE_MAX_BYTES = int(os.getenv("VECTOR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_GROWTH = 1.25  # spare capacity factor when an append grows a cached store
+
+# Collections with at least this many rows get an ANN index (index_store,
+# build_index, load_index); smaller ones are searched exactly: fast enough,
+# and IVF probing would cost recall there
+VECTOR_INDEX_MIN_ROWS = int(os.getenv("VECTOR_INDEX_MIN_ROWS", "20000"))
+
+
 
-  
 # INTERNAL UTILITIES
-  
+
 def _store_path(key: str) -> Path:
-    """Return full json filepath for a vector store keyed by hash."""
+    """Return full json filepath for a legacy (format 1) vector store."""
     return STORE_DIR / f"{key}.json"
 
 
+def _store_paths(key: str) -> Dict[str, Path]:
+    """Return the file paths making up a binary (format 2) vector store."""
+    return {
+        "vec": STORE_DIR / f"{key}.vec",
+        "txt": STORE_DIR / f"{key}.txt",
+        "off": STORE_DIR / f"{key}.off",
+        "pos": STORE_DIR / f"{key}.pos",
+        "ivf": STORE_DIR / f"{key}.ivf",
+        "meta": STORE_DIR / f"{key}.meta.json",
+    }
+
+
 def _save_json(path: Path, data: Dict[str, Any]):
     """Atomic JSON write (safe)."""
     tmp = path.with_suffix(".tmp")
@@ -32,36 +74,576 @@ def _load_json(path: Path) -> Dict[str, Any]:
         return json.load(f)
 
 
-  
+def _save_array(path: Path, arr: np.ndarray):
+    """Atomic raw array write (no header, dtype/shape live in the meta file)."""
+    tmp = path.with_name(path.name + ".tmp")
+    np.ascontiguousarray(arr).tofile(tmp)
+    tmp.replace(path)
+
+
+def _save_bytes(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+    tmp.replace(path)
+
+
+def _open_store(key: str) -> Dict[str, Any]:
+    """
+    Memory-map a binary store. Nothing is read until rows/bytes are touched.
+
+    Legacy JSON stores are migrated on first access.
+    """
+    paths = _store_paths(key)
+    if not paths["meta"].exists():
+        if not _store_path(key).exists():
+            raise FileNotFoundError(f"Vector store not found for key: {key}")
+        migrate_json_store(key)
+
+    meta = _load_json(paths["meta"])
+    count, dim = meta["count"], meta["dim"]
+
+    return {
+        "meta": meta,
+        "embeddings": np.memmap(paths["vec"], dtype=np.float32, mode="r", shape=(count, dim)),
+        "offsets": np.memmap(paths["off"], dtype=np.int64, mode="r", shape=(count + 1,)),
+        "text": np.memmap(paths["txt"], dtype=np.uint8, mode="r")
+        if meta["text_bytes"] else np.zeros(0, dtype=np.uint8),
+        "positions": np.memmap(paths["pos"], dtype=np.int64, mode="r", shape=(count, 4))
+        if meta.get("positions") and count else None,
+    }
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows; all-zero rows (failed embeddings) stay zero."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def _searchable(store: Dict[str, Any]) -> np.ndarray:
+    """Return the (normalized) embedding matrix of an opened store."""
+    if not store["meta"].get("normalized"):
+        return _normalize_rows(np.asarray(store["embeddings"]))
+    return store["embeddings"]
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without a full sort."""
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def _chunk_text(store: Dict[str, Any], idx: int) -> str:
+    """Decode a single chunk from the text sidecar."""
+    offsets = store["offsets"]
+    start, end = int(offsets[idx]), int(offsets[idx + 1])
+    return bytes(store["text"][start:end]).decode("utf-8")
+
+
+POSITION_FIELDS = ("page_start", "page_end", "start_char", "end_char")
+
+
+def _position_matrix(positions: List[Dict[str, int]]) -> np.ndarray:
+    """[{"page_start", "page_end", "start_char", "end_char"}, ...] -> (n, 4) int64."""
+    return np.array([[int(p.get(f, -1)) for f in POSITION_FIELDS] for p in positions],
+                    dtype=np.int64).reshape(len(positions), 4)
+
+
+def _chunk_position(store: Dict[str, Any], idx: int) -> Dict[str, int]:
+    """Position fields of one chunk ({} for stores built without positions)."""
+    if store.get("positions") is None:
+        return {}
+    row = store["positions"][idx]
+    return {f: int(v) for f, v in zip(POSITION_FIELDS, row) if v >= 0}
+
+
+
+# IN-PROCESS LRU CACHE
+
+class _StoreCache:
+    """
+    Thread-safe LRU of loaded stores, bounded by total bytes.
+
+    Entries are fully materialized (normalized matrix + text sidecar in RAM),
+    so a hit only stats the meta file: a store rebuilt or appended to (by any
+    process) changes its stamp and is reloaded.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, stamp: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            store = self._entries.get(key)
+            if store is not None and stamp is not None and store.get("stamp") != stamp:
+                # stale: the store changed on disk since it was cached
+                self._entries.pop(key)
+                self._bytes -= store["nbytes"]
+                metrics.set("vector_cache_bytes", self._bytes)
+                store = None
+            if store is None:
+                metrics.inc("vector_cache_misses")
+                return None
+            self._entries.move_to_end(key)
+            metrics.inc("vector_cache_hits")
+            return store
+
+    def put(self, key: str, store: Dict[str, Any]):
+        with self._lock:
+            self._put_locked(key, store)
+
+    def _put_locked(self, key: str, store: Dict[str, Any]):
+        size = store["nbytes"]
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old["nbytes"]
+        while self._entries and self._bytes + size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["nbytes"]
+            metrics.inc("vector_cache_evictions")
+        self._entries[key] = store
+        self._bytes += size
+        metrics.set("vector_cache_bytes", self._bytes)
+
+    def peek(self, key: str, stamp: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        """Entry if cached and still at stamp (no LRU or metrics side effects)."""
+        with self._lock:
+            store = self._entries.get(key)
+            return store if store is not None and store.get("stamp") == stamp else None
+
+    def swap(self, key: str, old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+        """Replace entry old by new; drops the key instead if old is no longer cached."""
+        with self._lock:
+            if self._entries.get(key) is not old:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry["nbytes"]
+                    metrics.set("vector_cache_bytes", self._bytes)
+                return False
+            self._put_locked(key, new)
+            return True
+
+    def invalidate(self, key: str):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old["nbytes"]
+                metrics.set("vector_cache_bytes", self._bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            metrics.set("vector_cache_bytes", 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_cache = _StoreCache(CACHE_MAX_BYTES)
+
+
+def _meta_stamp(key: str) -> Optional[tuple]:
+    """(inode, mtime, size) of the meta file; changes whenever the store is rewritten."""
+    try:
+        st = _store_paths(key)["meta"].stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _load_store(key: str) -> Dict[str, Any]:
+    """Return a searchable store, from the LRU cache when possible."""
+    stamp = _meta_stamp(key)
+    store = _cache.get(key, stamp)
+    if store is not None:
+        return store
+
+    mapped = _open_store(key)
+    meta = mapped["meta"]
+    nbytes = meta["count"] * meta["dim"] * 4 + (meta["count"] + 1) * 8 + meta["text_bytes"]
+    if meta.get("positions"):
+        nbytes += meta["count"] * 32
+    if nbytes > _cache.max_bytes:
+        # too big to keep in RAM: search straight from the memmap
+        store = {
+            "meta": meta,
+            "embeddings": _searchable(mapped),
+            "offsets": mapped["offsets"],
+            "text": mapped["text"],
+            "positions": mapped["positions"],
+        }
+        store["index"] = _attach_index(key, store)
+        return store
+
+    store = {
+        "meta": dict(mapped["meta"], normalized=True),
+        "embeddings": np.array(_searchable(mapped), dtype=np.float32),
+        "offsets": np.array(mapped["offsets"]),
+        "text": np.array(mapped["text"]),
+        "positions": None if mapped["positions"] is None else np.array(mapped["positions"]),
+    }
+    store["index"] = _attach_index(key, store)
+    if store["index"] is not None:
+        nbytes += store["index"].nbytes
+    store["nbytes"] = nbytes
+    store["stamp"] = stamp if stamp is not None else _meta_stamp(key)
+    _cache.put(key, store)
+    return store
+
+
+def _grow(buffer: np.ndarray, used: int, rows: np.ndarray) -> np.ndarray:
+    """
+    buffer[:used] followed by rows. Rows go into the spare capacity of
+    buffer when it has room (readers only ever see views of [:used]),
+    otherwise into a new buffer with CACHE_GROWTH headroom.
+    """
+    need = used + len(rows)
+    if need > len(buffer):
+        bigger = np.empty((max(need, int(need * CACHE_GROWTH)),) + buffer.shape[1:], dtype=buffer.dtype)
+        bigger[:used] = buffer[:used]
+        buffer = bigger
+    buffer[used:need] = rows
+    return buffer
+
+
+def _extend_cached(key: str, stamp: Optional[tuple], meta: Dict[str, Any], matrix: np.ndarray,
+                   text: bytes, offsets: np.ndarray, positions: Optional[np.ndarray]):
+    """
+    After an append, grow the cached copy of the store by the new rows
+    instead of dropping it, so the next query does not reload the whole
+    matrix from disk. Amortized cost is proportional to the appended rows.
+    """
+    old = _cache.peek(key, stamp)
+    if old is None:
+        _cache.invalidate(key)
+        return
+    count, used_text = old["meta"]["count"], old["meta"]["text_bytes"]
+    buffers = old.get("buffers") or {
+        name: old[name] for name in ("embeddings", "offsets", "text", "positions") if old[name] is not None
+    }
+    grown = {
+        "embeddings": _grow(buffers["embeddings"], count, matrix),
+        "offsets": _grow(buffers["offsets"], count + 1, offsets),
+        "text": _grow(buffers["text"], used_text, np.frombuffer(text, dtype=np.uint8)),
+    }
+    if positions is not None and "positions" in buffers:
+        grown["positions"] = _grow(buffers["positions"], count, positions)
+
+    new_count = count + len(matrix)
+    store = {
+        "meta": dict(meta, normalized=True),
+        "embeddings": grown["embeddings"][:new_count],
+        "offsets": grown["offsets"][:new_count + 1],
+        "text": grown["text"][:meta["text_bytes"]],
+        "positions": grown["positions"][:new_count] if "positions" in grown else None,
+        "index": old["index"] if meta.get("index") else None,
+        "buffers": grown,
+        "stamp": _meta_stamp(key),
+    }
+    if store["index"] is not None:
+        store["index"].rebind(store["embeddings"])  # let the old buffer go
+    store["nbytes"] = sum(b.nbytes for b in grown.values()) + \
+        (store["index"].nbytes if store["index"] is not None else 0)
+    _cache.swap(key, old, store)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Current LRU occupancy; hit/miss/eviction counters live in metrics."""
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
+
+
+
 # BUILD STORE
-  
-def build_store(key: str, chunks: List[str], embeddings: List[List[float]]):
+
+def build_store(key: str, chunks: List[str], embeddings: List[List[float]],
+                params: Optional[Dict[str, Any]] = None,
+                positions: Optional[List[Dict[str, int]]] = None):
     """
     Build a vector store (chunks + embeddings) and save to disk.
 
-    Expected: embeddings shape = (num_chunks, 768)
+    Expected: embeddings shape = (num_chunks, dim), usually dim = 768
+    params: how the chunks were produced (chunker settings); has_store()
+    only reuses a store when these match.
+    positions: optional per-chunk {"page_start", "page_end", "start_char",
+    "end_char"}; returned with query results so clients can cite pages and
+    fetch chunk text lazily (get_chunk).
     """
 
-    if not embeddings or len(embeddings) != len(chunks):
+    if len(embeddings) == 0 or len(embeddings) != len(chunks):
         raise ValueError("Embeddings list must match chunks list length.")
+    if positions is not None and len(positions) != len(chunks):
+        raise ValueError("Positions list must match chunks list length.")
 
-    store = {
-        "chunks": chunks,
-        "embeddings": embeddings,    # list of 768-dim vectors
-        "dim": 768,
-        "count": len(chunks),
-    }
+    try:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+    except ValueError:
+        raise ValueError("All embeddings must have the same dimension.")
+    if matrix.ndim != 2 or matrix.shape[1] == 0:
+        raise ValueError("Embeddings must be a non-empty 2-D matrix.")
+
+    # all-zero rows are embedding calls that failed (see tools/embeddings.py)
+    failed_rows = int(np.count_nonzero(~matrix.any(axis=1)))
+    matrix = _normalize_rows(matrix)
+
+    encoded = [c.encode("utf-8") for c in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    paths = _store_paths(key)
+    _save_array(paths["vec"], matrix)
+    _save_bytes(paths["txt"], b"".join(encoded))
+    _save_array(paths["off"], offsets)
+    if positions is not None:
+        _save_array(paths["pos"], _position_matrix(positions))
+
+    # meta last: the store is complete once this exists
+    _save_json(paths["meta"], {
+        "format": STORE_FORMAT,
+        "dim": int(matrix.shape[1]),
+        "count": int(matrix.shape[0]),
+        "normalized": True,
+        "text_bytes": int(offsets[-1]),
+        "failed_rows": failed_rows,
+        "positions": positions is not None,
+        "params": params or {},
+    })
+    _cache.invalidate(key)
+
+
+def append_store(key: str, chunks: List[str], embeddings: List[List[float]],
+                 positions: Optional[List[Dict[str, int]]] = None) -> int:
+    """
+    Append rows to an existing store (or build it). Returns the new row count.
+
+    Important:
+    - Only the new rows are written: vectors/text/offsets are appended in
+      place and the meta file is replaced last, so readers never see a
+      partial append.
+    - Bytes past what the meta file describes (an interrupted append) are
+      truncated first.
+    - Callers must serialize appends to the same key.
+    - In a store with positions, rows appended without them get -1 (unknown).
+    """
+    paths = _store_paths(key)
+    if not paths["meta"].exists() and not _store_path(key).exists():
+        build_store(key, chunks, embeddings, positions=positions)
+        return len(chunks)
+    if len(embeddings) != len(chunks):
+        raise ValueError("Embeddings list must match chunks list length.")
+    if positions is not None and len(positions) != len(chunks):
+        raise ValueError("Positions list must match chunks list length.")
+    if len(chunks) == 0:
+        return _open_store(key)["meta"]["count"]
+
+    meta = _open_store(key)["meta"]  # migrates a legacy JSON store if needed
+    stamp = _meta_stamp(key)
+    count, dim = meta["count"], meta["dim"]
+    try:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+    except ValueError:
+        raise ValueError("All embeddings must have the same dimension.")
+    if matrix.ndim != 2 or matrix.shape[1] != dim:
+        raise ValueError(f"Embedding dim mismatch: expected {dim}")
+
+    failed_rows = int(np.count_nonzero(~matrix.any(axis=1)))
+    if not meta.get("normalized"):
+        # keep the whole file in one convention
+        old = np.fromfile(paths["vec"], dtype=np.float32, count=count * dim).reshape(count, dim)
+        _save_array(paths["vec"], _normalize_rows(old))
+    matrix = _normalize_rows(matrix)
+
+    encoded = [c.encode("utf-8") for c in chunks]
+    offsets = meta["text_bytes"] + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+
+    text = b"".join(encoded)
+    position_rows = _position_matrix(positions or [{}] * len(chunks)) if meta.get("positions") else None
+    writes = [
+        ("vec", count * dim * 4, np.ascontiguousarray(matrix).tobytes()),
+        ("txt", meta["text_bytes"], text),
+        ("off", (count + 1) * 8, offsets.tobytes()),
+    ]
+    if position_rows is not None:
+        writes.append(("pos", count * 32, position_rows.tobytes()))
+
+    for name, size, data in writes:
+        with paths[name].open("r+b") as f:
+            f.truncate(size)
+            f.seek(size)
+            f.write(data)
+
+    if meta.get("index"):
+        meta = dict(meta, index_rows=meta.get("index_rows", count))  # new rows are searched exactly
+    meta = dict(
+        meta,
+        format=STORE_FORMAT,
+        count=count + len(chunks),
+        normalized=True,
+        text_bytes=int(offsets[-1]),
+        failed_rows=meta.get("failed_rows", 0) + failed_rows,
+    )
+    _save_json(paths["meta"], meta)
+    _extend_cached(key, stamp, meta, matrix, text, offsets, position_rows)
+    return count + len(chunks)
+
+
+def store_count(key: str) -> int:
+    """Number of rows in a binary store (0 when it does not exist)."""
+    try:
+        return int(_load_json(_store_paths(key)["meta"])["count"])
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+def has_store(key: str, params: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    True when a complete binary store exists for key, was built with the same
+    params, and has no failed (all-zero) embeddings. Used to skip re-ingesting
+    a document that was already uploaded.
+    """
+    paths = _store_paths(key)
+    if not paths["meta"].exists():
+        return False
+    try:
+        meta = _load_json(paths["meta"])
+        count, dim = meta["count"], meta["dim"]
+        sizes_ok = (
+            paths["vec"].stat().st_size == count * dim * 4
+            and paths["off"].stat().st_size == (count + 1) * 8
+            and paths["txt"].stat().st_size == meta["text_bytes"]
+            and (not meta.get("positions") or paths["pos"].stat().st_size == count * 32)
+        )
+    except (OSError, ValueError, KeyError):
+        return False
+
+    return (
+        sizes_ok
+        and meta.get("failed_rows", 0) == 0
+        and meta.get("params", {}) == (params or {})
+    )
+
+
+
+# LEGACY JSON MIGRATION
+
+def migrate_json_store(key: str) -> bool:
+    """
+    Convert a legacy <key>.json store into the binary format.
+
+    The JSON file is left in place; binary files take precedence once written.
+    Returns False when there is nothing to migrate.
+    """
+    path = _store_path(key)
+    if not path.exists():
+        return False
+
+    store = _load_json(path)
+    build_store(key, store["chunks"], store["embeddings"])
+    return True
+
+
+def migrate_all_json_stores() -> List[str]:
+    """Migrate every legacy JSON store in STORE_DIR. Returns migrated keys."""
+    migrated = []
+    for path in sorted(STORE_DIR.glob("*.json")):
+        if path.name.endswith(".meta.json"):
+            continue
+        key = path.stem
+        if _store_paths(key)["meta"].exists():
+            continue
+        if migrate_json_store(key):
+            migrated.append(key)
+    return migrated
 
-    _save_json(_store_path(key), store)
 
 
-  
 # QUERY STORE – top-k cosine similarity
-  
+
+def _as_query_matrix(query_embeddings, dim: int) -> np.ndarray:
+    matrix = np.asarray(query_embeddings, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.shape[1] != dim:
+        got = matrix.shape[-1] if matrix.ndim else 0
+        raise ValueError(
+            f"Query embedding dim mismatch: got {got} but expected {dim}"
+        )
+    return _normalize_rows(matrix)
+
+
+def _build_results(store: Dict[str, Any], hits: List[tuple],
+                   with_text: bool = False, excerpt_chars: int = 300) -> List[Dict[str, Any]]:
+    """Result dicts for one query's (row, score) hits (only winning chunks are decoded)."""
+    top_results = []
+    for idx, score in hits:
+        result = {"chunk_id": f"chunk-{idx}", "score": score}
+        result.update(_chunk_position(store, idx))
+        if with_text or excerpt_chars > 0:
+            text = _chunk_text(store, idx)
+            if excerpt_chars > 0:
+                result["text_excerpt"] = text[:excerpt_chars].replace("\n", " ").strip()
+            if with_text:
+                result["text"] = text
+        top_results.append(result)
+    return top_results
+
+
+def _top_hits(key: str, query_matrix, k: int, row_ranges: Optional[List[tuple]] = None) -> tuple:
+    """
+    (store, [[(row, score), ...] per query]); ANN index when the store has
+    one. row_ranges [(start, end), ...] restricts an exact search to those rows.
+    """
+    store = _load_store(key)
+    queries = _as_query_matrix(query_matrix, store["meta"]["dim"])
+
+    if row_ranges is not None:
+        rows = np.concatenate([np.arange(a, b, dtype=np.int64) for a, b in row_ranges] or
+                              [np.zeros(0, dtype=np.int64)])
+        scores = queries @ np.asarray(store["embeddings"][rows]).T
+        return store, [[(int(rows[i]), float(row[i])) for i in _top_k(row, k)] for row in scores]
+
+    if store.get("index") is not None:
+        scores, ids = store["index"].search(queries, k)
+        hits = [[(int(i), float(sc)) for i, sc in zip(id_row, score_row) if i >= 0]
+                for id_row, score_row in zip(ids, scores)]
+        indexed = store["meta"].get("index_rows", store["meta"]["count"])
+        if indexed < store["meta"]["count"]:
+            # rows appended since the index was built: exact scores, merged in
+            tail = queries @ np.asarray(store["embeddings"][indexed:]).T
+            hits = [sorted(row + [(indexed + int(i), float(t[i])) for i in _top_k(t, k)],
+                           key=lambda hit: -hit[1])[:k]
+                    for row, t in zip(hits, tail)]
+        return store, hits
+
+    # (q, dim) @ (dim, n) -> (q, n) cosine similarities
+    scores = queries @ store["embeddings"].T
+    return store, [[(int(i), float(row[i])) for i in _top_k(row, k)] for row in scores]
+
+
 def query_store(
     key: str,
     query_embedding: List[float],
-    k: int = 3
+    k: int = 3,
+    with_text: bool = False,
+    excerpt_chars: int = 300
 ) -> List[Dict[str, Any]]:
     """
     Perform similarity search for query_embedding in the stored document.
@@ -71,45 +653,224 @@ def query_store(
         {
             "chunk_id": "chunk-0",
             "score": 0.91,
-            "text_excerpt": "first 300 chars..."
+            "page_start": 2, "page_end": 3,   (stores built with positions)
+            "start_char": 3000, "end_char": 6000,
+            "text_excerpt": "first 300 chars...",   (omitted with excerpt_chars=0)
+            "text": "full chunk"          (only with with_text=True)
         },
         ...
     ]
     """
+    return query_store_batch(key, [query_embedding], k=k, with_text=with_text,
+                             excerpt_chars=excerpt_chars)[0]
 
-    path = _store_path(key)
-    if not path.exists():
-        raise FileNotFoundError(f"Vector store not found for key: {key}")
 
-    store = _load_json(path)
+def query_store_batch(
+    key: str,
+    query_matrix: List[List[float]],
+    k: int = 3,
+    with_text: bool = False,
+    excerpt_chars: int = 300
+) -> List[List[Dict[str, Any]]]:
+    """
+    Search several query embeddings, shape (q, dim), against one stored document.
 
-    chunks = store["chunks"]
-    embeddings = np.array(store["embeddings"], dtype=float)
-    dim = store.get("dim", 768)
+    All scores come from a single matrix product; returns one query_store-style
+    result list per query, in input order.
+    """
 
-    query_vec = np.array(query_embedding, dtype=float)
-    if query_vec.shape[0] != dim:
-        raise ValueError(
-            f"Query embedding dim mismatch: got {query_vec.shape[0]} but expected {dim}"
-        )
+    store, hits = _top_hits(key, query_matrix, k)
+    return [_build_results(store, row, with_text, excerpt_chars) for row in hits]
 
-    # Compute cosine similarity for each chunk
-    similarities = []
-    for i, emb_vec in enumerate(embeddings):
-        sim = 1 - cosine(query_vec, emb_vec)  # cosine similarity
-        similarities.append((i, sim))
 
-    # Sort by similarity score descending
-    similarities.sort(key=lambda x: x[1], reverse=True)
+def search_store(key: str, query_matrix: List[List[float]], k: int = 3,
+                 row_ranges: Optional[List[tuple]] = None) -> List[List[tuple]]:
+    """
+    Like query_store_batch, but returns (row_index, score) pairs without
+    decoding any text; for callers that keep their own row -> record mapping.
+    row_ranges: only search rows in these [start, end) ranges (exact search).
+    """
+    return _top_hits(key, query_matrix, k, row_ranges)[1]
 
-    # Build output structure
-    top_results = []
-    for idx, score in similarities[:k]:
-        excerpt = chunks[idx][:300].replace("\n", " ").strip()
-        top_results.append({
-            "chunk_id": f"chunk-{idx}",
-            "score": float(score),
-            "text_excerpt": excerpt
-        })
 
-    return top_results
+
+# ROW ACCESS – for callers that copy rows between stores (corpus shards)
+
+def read_rows(key: str, start: int = 0, end: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Rows [start, end) of a store: {"chunks", "embeddings" (normalized,
+    float32), "positions" (list of dicts, or None)}.
+    """
+    store = _open_store(key)
+    end = store["meta"]["count"] if end is None else end
+    positions = None
+    if store["positions"] is not None:
+        positions = [_chunk_position(store, i) for i in range(start, end)]
+    return {
+        "chunks": [_chunk_text(store, i) for i in range(start, end)],
+        "embeddings": np.array(_searchable(store)[start:end], dtype=np.float32),
+        "positions": positions,
+    }
+
+
+def delete_store(key: str):
+    """Remove every file of a store (missing files are ignored)."""
+    paths = _store_paths(key)
+    _cache.invalidate(key)
+    # meta first: the store disappears for readers before its data files do
+    for path in [paths.pop("meta")] + list(paths.values()) + [_store_path(key), STORE_DIR / f"{key}.items.json"]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+
+# CHUNK LOOKUP – lazy citation resolution
+
+def get_chunk(key: str, chunk_id: str) -> Optional[Dict[str, Any]]:
+    """
+    {"chunk_id", "text", page/char position fields} for "chunk-N" of a
+    store, or None when the store or chunk does not exist.
+    """
+    try:
+        idx = int(chunk_id.rsplit("-", 1)[-1])
+        store = _load_store(key)
+    except (ValueError, OSError):
+        return None
+    if not 0 <= idx < store["meta"]["count"]:
+        return None
+    return dict({"chunk_id": f"chunk-{idx}", "text": _chunk_text(store, idx)},
+                **_chunk_position(store, idx))
+
+
+
+# ANN INDEX
+# An optional IVF index next to a store's vectors (vector_index.py). Queries
+# use it transparently; appends invalidate it until index_store() runs again.
+
+def _attach_index(key: str, store: Dict[str, Any]):
+    """Index for a freshly loaded store, or None (missing/unusable -> exact search)."""
+    kind = store["meta"].get("index")
+    if not kind:
+        return None
+    try:
+        return load_ivf(kind, _store_paths(key)["ivf"], store["embeddings"])
+    except (OSError, ValueError, KeyError, RuntimeError):
+        return None
+
+
+def index_store(key: str, nlist: Optional[int] = None,
+                min_rows: int = VECTOR_INDEX_MIN_ROWS) -> bool:
+    """
+    Build (or rebuild) the ANN index of a store. Returns False when the
+    store is below min_rows and stays exact-search only.
+    Callers must serialize with appends to the same key.
+    """
+    built = train_store_index(key, nlist, min_rows)
+    if built is None:
+        return False
+    attach_store_index(key, *built)
+    return True
+
+
+def train_store_index(key: str, nlist: Optional[int] = None,
+                      min_rows: int = VECTOR_INDEX_MIN_ROWS) -> Optional[tuple]:
+    """
+    First half of index_store: (index, rows) over the store's current rows,
+    or None below min_rows. Safe to run while other callers append.
+    """
+    store = _open_store(key)
+    rows = store["meta"]["count"]
+    if rows < max(1, min_rows):
+        return None
+    return build_ivf(_searchable(store)[:rows], nlist), rows
+
+
+def attach_store_index(key: str, index, rows: int):
+    """
+    Second half of index_store: save the index and record it in the meta
+    file. Rows appended after training stay exact-searched. Quick; this is
+    the part callers must serialize with appends.
+    """
+    paths = _store_paths(key)
+    meta = _load_json(paths["meta"])
+    if rows > meta["count"]:
+        return  # store was rebuilt smaller while training; the index is stale
+    index.save(paths["ivf"])
+    _save_json(paths["meta"], dict(meta, index=index.kind, index_rows=rows))
+    _cache.invalidate(key)
+
+
+def indexed_count(key: str) -> int:
+    """Rows covered by the store's ANN index (0 without one)."""
+    try:
+        meta = _load_json(_store_paths(key)["meta"])
+    except (OSError, ValueError):
+        return 0
+    return int(meta.get("index_rows", meta["count"])) if meta.get("index") else 0
+
+
+def build_index(embeddings: List[List[float]], nlist: Optional[int] = None,
+                min_rows: int = VECTOR_INDEX_MIN_ROWS):
+    """
+    In-memory index over embeddings (rows are L2-normalized first): IVF from
+    min_rows rows, exact FlatIndex below that.
+    """
+    vectors = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+    if len(vectors) < max(1, min_rows):
+        return FlatIndex(vectors)
+    return build_ivf(vectors, nlist)
+
+
+def search_index(index, query_embeddings, top_k: int = 5, nprobe: Optional[int] = None) -> tuple:
+    """
+    FAISS-style search: (scores, ids), each shaped (num_queries, top_k), best
+    first; ids are row numbers, -1 where fewer than top_k rows were found.
+    A single embedding is treated as one query.
+    """
+    queries = np.asarray(query_embeddings, dtype=np.float32)
+    if queries.ndim == 1:
+        queries = queries[None, :]
+    return index.search(_as_query_matrix(queries, index.dim), top_k, nprobe)
+
+
+def persist_index(index, metadatas: List[Dict[str, Any]], store_name: str):
+    """
+    Save an in-memory index as a regular vector store named store_name:
+    metadatas[i] describes row i; its "text" becomes the chunk text and the
+    remaining fields are kept in <store_name>.items.json (see load_index).
+    """
+    if len(metadatas) != index.ntotal:
+        raise ValueError("Metadatas list must match the number of indexed rows.")
+
+    vectors = index.all_vectors()
+    paths = _store_paths(store_name)
+    _save_json(STORE_DIR / f"{store_name}.items.json",
+               {"items": [{k: v for k, v in m.items() if k != "text"} for m in metadatas]})
+    build_store(store_name, [m.get("text", "") for m in metadatas], vectors)
+    if isinstance(index, FlatIndex):
+        return  # exact search needs nothing beyond the store itself
+    index.save(paths["ivf"])
+    meta = _load_json(paths["meta"])
+    _save_json(paths["meta"], dict(meta, index=index.kind))
+    _cache.invalidate(store_name)
+
+
+def load_index(store_name: str) -> tuple:
+    """
+    (index, metadatas) of a store saved by persist_index. metadatas carry
+    their chunk "text" again. Stores below VECTOR_INDEX_MIN_ROWS rows get an
+    exact FlatIndex; larger ones their saved IVF index (or a fresh one).
+    """
+    store = _load_store(store_name)
+    if store["meta"]["count"] < VECTOR_INDEX_MIN_ROWS:
+        index = FlatIndex(store["embeddings"])  # also for small stores saved with an IVF index
+    else:
+        index = store.get("index") or build_ivf(store["embeddings"])
+    items_path = STORE_DIR / f"{store_name}.items.json"
+    items = _load_json(items_path)["items"] if items_path.exists() else \
+        [{"chunk_id": f"chunk-{i}"} for i in range(store["meta"]["count"])]
+    metadatas = [dict(item, text=_chunk_text(store, i)) for i, item in enumerate(items)]
+    return index, metadatas
+